@@ -1,11 +1,78 @@
+import json
+import queue
 import socket
 import threading
 import time
 import sys
 import subprocess
+from collections import deque
 from pathlib import Path
 import tkinter as tk
-from tkinter import ttk
+from tkinter import filedialog, ttk
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "base"))
+from histogram import LatencyHistogram
+from loadgen import LoadEngine
+
+LOG_MAX_LINES = 2000        # 每个日志面板最多保留的行数，超出后裁掉最早的行
+LOG_FLUSH_MS = 50           # 日志队列的批量写入周期（毫秒）
+LOG_BATCH_LIMIT = 20000     # 单次最多取出的日志条数，剩余的留到下一周期，避免一次卡住界面
+METRICS_FPS = 10            # 统计文字的刷新帧率
+LOAD_SAMPLE_MS = 500        # 压测面板的采样周期（毫秒），每个周期取一次区间直方图并追加图表数据点
+CHART_POINTS = 120          # 图表保留的数据点数（默认即最近 60 秒）
+CHART_COLORS = {"rate": "#0a84ff", "p50": "#34c759", "p99": "#ff9500", "max": "#ff3b30"}
+
+
+class LogView:
+    """
+    线程安全的日志面板：任意线程调用 write() 只是入队（SimpleQueue，无需加锁），
+    由 Tk 主循环定时 flush() 批量写入 Text，并只保留最近 max_lines 行
+    """
+
+    def __init__(self, widget: tk.Text, max_lines: int = LOG_MAX_LINES):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.dropped = 0
+        self._queue = queue.SimpleQueue()
+
+    def write(self, text: str):
+        self._queue.put(text)
+
+    def _take(self, limit: int):
+        items = []
+        get = self._queue.get_nowait
+        try:
+            while len(items) < limit:
+                items.append(get())
+        except queue.Empty:
+            pass
+        return items
+
+    def flush(self):
+        items = self._take(LOG_BATCH_LIMIT)
+        if not items:
+            return
+        text = "".join(items)
+        lines = text.splitlines(keepends=True)
+        if len(lines) > self.max_lines:
+            # 一个周期内到达的行数已超过面板容量：较早的行反正会被裁掉，直接跳过不再插入；
+            # 提示行占一行，连同其后 max_lines - 1 行恰好填满面板，不会被下面的裁剪删掉
+            keep = max(self.max_lines - 1, 0)
+            skipped = len(lines) - keep
+            self.dropped += skipped
+            text = f"...（日志过快，省略 {skipped} 行）\n" + ("".join(lines[-keep:]) if keep else "")
+        w = self.widget
+        at_bottom = w.yview()[1] >= 0.999
+        w.insert(tk.END, text)
+        excess = int(w.index("end-1c").split(".")[0]) - 1 - self.max_lines
+        if excess > 0:
+            w.delete("1.0", f"{excess + 1}.0")
+        if at_bottom:
+            w.see(tk.END)
+
+    def clear(self):
+        self._take(sys.maxsize)
+        self.widget.delete("1.0", tk.END)
 
 
 class VisualizerApp:
@@ -24,20 +91,31 @@ class VisualizerApp:
         self.tcp_bytes_sent = 0
         self.tcp_bytes_recv = 0
         self.tcp_msg_count = 0
-        self.tcp_rtts = []
+        self.tcp_hist = LatencyHistogram()   # 单条发送的 RTT（纳秒），内存固定
         self.tcp_server_proc = None
         self.tcp_server_running = False
         self.udp_bytes_sent = 0
         self.udp_bytes_recv = 0
         self.udp_msg_count = 0
-        self.udp_rtts = []
+        self.udp_hist = LatencyHistogram()
         self.udp_socket = None
         self.udp_client_started = False
         self.udp_server_proc = None
         self.udp_server_running = False
         self.project_root = Path(__file__).resolve().parent.parent
         self.base_dir = self.project_root / "base"
+        self.load_engine = None
+        self._load_starting = False
+        self._load_reported = False
+        self.load_series = {key: deque(maxlen=CHART_POINTS) for key in CHART_COLORS}
+        # 工作线程不直接操作 Tk 控件：日志进 LogView 队列，其余界面更新经 _post() 交给主循环执行
+        self._ui_calls = queue.SimpleQueue()
         self._build_ui()
+        self.tcp_log = LogView(self.tcp_text)
+        self.udp_log = LogView(self.udp_text)
+        self.root.after(LOG_FLUSH_MS, self._pump)
+        self.root.after(1000 // METRICS_FPS, self._refresh_metrics)
+        self.root.after(LOAD_SAMPLE_MS, self._sample_load)
 
     def _setup_theme(self, style: ttk.Style):
         bg = "#f5f5f7"
@@ -71,21 +149,25 @@ class VisualizerApp:
         seg = ttk.Frame(self.root, style="TFrame")
         self._seg_tcp_btn = ttk.Button(seg, text="TCP", style="Segmented.Selected.TButton", command=lambda: self._show_page("tcp"))
         self._seg_udp_btn = ttk.Button(seg, text="UDP", style="Segmented.TButton", command=lambda: self._show_page("udp"))
+        self._seg_load_btn = ttk.Button(seg, text="压测", style="Segmented.TButton", command=lambda: self._show_page("load"))
         self._seg_tcp_btn.pack(side=tk.LEFT, padx=(16, 0), pady=8)
         self._seg_udp_btn.pack(side=tk.LEFT, padx=(6, 0), pady=8)
+        self._seg_load_btn.pack(side=tk.LEFT, padx=(6, 0), pady=8)
         seg.pack(fill=tk.X)
 
         pages = ttk.Frame(self.root, style="TFrame")
         pages.pack(fill=tk.BOTH, expand=True)
         tcp_frame = ttk.Frame(pages, style="TFrame")
         udp_frame = ttk.Frame(pages, style="TFrame")
+        load_frame = ttk.Frame(pages, style="TFrame")
         self._page_tcp = tcp_frame
         self._page_udp = udp_frame
+        self._page_load = load_frame
 
         self.tcp_host_var = tk.StringVar(value="127.0.0.1")
         self.tcp_port_var = tk.StringVar(value="50000")
         self.tcp_status_var = tk.StringVar(value="未连接")
-        self.tcp_metrics_var = tk.StringVar(value="消息:0 发送字节:0 接收字节:0 平均RTT:0ms")
+        self.tcp_metrics_var = tk.StringVar(value="消息:0 发送字节:0 接收字节:0 RTT 平均:0.000ms p50:0.000ms p99:0.000ms")
 
         server_box_tcp = ttk.LabelFrame(tcp_frame, text="服务器控制", style="Section.TLabelframe")
         ttk.Button(server_box_tcp, text="启动服务器", command=self.tcp_server_start).grid(row=0, column=0, padx=4, pady=4)
@@ -108,7 +190,7 @@ class VisualizerApp:
         self.tcp_msg_var = tk.StringVar()
         ttk.Entry(tcp_mid, textvariable=self.tcp_msg_var, width=60).grid(row=0, column=0, padx=8)
         ttk.Button(tcp_mid, text="发送", command=self.tcp_send, style="Accent.TButton").grid(row=0, column=1, padx=8)
-        ttk.Button(tcp_mid, text="清空日志", command=lambda: self._clear_text(self.tcp_text)).grid(row=0, column=2, padx=8)
+        ttk.Button(tcp_mid, text="清空日志", command=lambda: self.tcp_log.clear()).grid(row=0, column=2, padx=8)
         ttk.Label(tcp_mid, textvariable=self.tcp_metrics_var, style="Muted.TLabel").grid(row=0, column=3, padx=8)
         tcp_mid.pack(fill=tk.X, pady=6, padx=24)
 
@@ -124,7 +206,7 @@ class VisualizerApp:
 
         self.udp_host_var = tk.StringVar(value="127.0.0.1")
         self.udp_port_var = tk.StringVar(value="50000")
-        self.udp_metrics_var = tk.StringVar(value="消息:0 发送字节:0 接收字节:0 平均RTT:0ms")
+        self.udp_metrics_var = tk.StringVar(value="消息:0 发送字节:0 接收字节:0 RTT 平均:0.000ms p50:0.000ms p99:0.000ms")
 
         server_box_udp = ttk.LabelFrame(udp_frame, text="服务器控制", style="Section.TLabelframe")
         ttk.Button(server_box_udp, text="启动服务器", command=self.udp_server_start).grid(row=0, column=0, padx=4, pady=4)
@@ -146,7 +228,7 @@ class VisualizerApp:
         self.udp_msg_var = tk.StringVar()
         ttk.Entry(udp_mid, textvariable=self.udp_msg_var, width=60).grid(row=0, column=0, padx=8)
         ttk.Button(udp_mid, text="发送", command=self.udp_send, style="Accent.TButton").grid(row=0, column=1, padx=8)
-        ttk.Button(udp_mid, text="清空日志", command=lambda: self._clear_text(self.udp_text)).grid(row=0, column=2, padx=8)
+        ttk.Button(udp_mid, text="清空日志", command=lambda: self.udp_log.clear()).grid(row=0, column=2, padx=8)
         ttk.Label(udp_mid, textvariable=self.udp_metrics_var, style="Muted.TLabel").grid(row=0, column=3, padx=8)
         udp_mid.pack(fill=tk.X, pady=6, padx=24)
 
@@ -160,35 +242,218 @@ class VisualizerApp:
         log_wrap_udp.pack(fill=tk.BOTH, expand=True, padx=24, pady=12)
         udp_bottom.pack(fill=tk.BOTH, expand=True)
 
+        self._build_load_page(load_frame)
+
         self._page_tcp.pack(fill=tk.BOTH, expand=True)
         self._page_udp.pack_forget()
 
-        # 去除定时重绘：不展示 RTT 图
+    def _build_load_page(self, frame):
+        self.load_proto_var = tk.StringVar(value="tcp")
+        self.load_framing_var = tk.StringVar(value="raw")
+        self.load_host_var = tk.StringVar(value="127.0.0.1")
+        self.load_port_var = tk.StringVar(value="50000")
+        self.load_mode_var = tk.StringVar(value="突发")
+        self.load_requests_var = tk.StringVar(value="100000")
+        self.load_duration_var = tk.StringVar(value="0")
+        self.load_rate_var = tk.StringVar(value="0")
+        self.load_concurrency_var = tk.StringVar(value="8")
+        self.load_connections_var = tk.StringVar(value="8")
+        self.load_size_var = tk.StringVar(value="64")
+        self.load_status_var = tk.StringVar(value="未运行")
+        self.load_live_var = tk.StringVar(value="吞吐:0 条/秒 p50:- p99:- 最大:-")
+        self.load_total_var = tk.StringVar(value="累计: 发送 0 成功 0 错误 0 超时 0")
+
+        box = ttk.LabelFrame(frame, text="突发 / 持续压测", style="Section.TLabelframe")
+        fields = [
+            ("协议", ttk.Combobox(box, textvariable=self.load_proto_var, values=("tcp", "udp"), width=6, state="readonly")),
+            ("分帧", ttk.Combobox(box, textvariable=self.load_framing_var, values=("raw", "length"), width=7, state="readonly")),
+            ("地址", ttk.Entry(box, textvariable=self.load_host_var, width=15)),
+            ("端口", ttk.Entry(box, textvariable=self.load_port_var, width=8)),
+            ("模式", ttk.Combobox(box, textvariable=self.load_mode_var, values=("突发", "持续"), width=6, state="readonly")),
+            ("请求数", ttk.Entry(box, textvariable=self.load_requests_var, width=10)),
+            ("时长(s,0=手动停止)", ttk.Entry(box, textvariable=self.load_duration_var, width=8)),
+            ("速率(条/秒,0=闭环)", ttk.Entry(box, textvariable=self.load_rate_var, width=8)),
+            ("并发", ttk.Entry(box, textvariable=self.load_concurrency_var, width=6)),
+            ("连接数", ttk.Entry(box, textvariable=self.load_connections_var, width=6)),
+            ("大小分布", ttk.Entry(box, textvariable=self.load_size_var, width=18)),
+        ]
+        for i, (label, widget) in enumerate(fields):
+            row, col = divmod(i, 4)
+            ttk.Label(box, text=label).grid(row=row, column=col * 2, sticky="w", padx=(8, 2), pady=3)
+            widget.grid(row=row, column=col * 2 + 1, sticky="w", padx=(0, 8), pady=3)
+        buttons = ttk.Frame(box)
+        ttk.Button(buttons, text="开始", command=self.load_start, style="Accent.TButton").pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text="停止", command=self.load_stop).pack(side=tk.LEFT, padx=4)
+        ttk.Button(buttons, text="导出直方图", command=self.load_export).pack(side=tk.LEFT, padx=4)
+        ttk.Label(buttons, textvariable=self.load_status_var, style="Muted.TLabel").pack(side=tk.LEFT, padx=8)
+        buttons.grid(row=3, column=0, columnspan=8, sticky="w", pady=6)
+        box.pack(fill=tk.X, pady=6, padx=24)
+
+        ttk.Label(frame, textvariable=self.load_live_var, font=("Segoe UI", 12, "bold")).pack(anchor="w", padx=24)
+        ttk.Label(frame, textvariable=self.load_total_var, style="Muted.TLabel").pack(anchor="w", padx=24, pady=(2, 6))
+
+        charts = ttk.Frame(frame)
+        self.load_rate_canvas = tk.Canvas(charts, height=200, bg="#ffffff", highlightthickness=1, highlightbackground="#d1d1d6")
+        self.load_latency_canvas = tk.Canvas(charts, height=200, bg="#ffffff", highlightthickness=1, highlightbackground="#d1d1d6")
+        self.load_rate_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 6))
+        self.load_latency_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(6, 0))
+        charts.pack(fill=tk.BOTH, expand=True, padx=24, pady=6)
 
     def _show_page(self, key: str):
-        if key == "tcp":
-            self._page_udp.pack_forget()
-            self._page_tcp.pack(fill=tk.BOTH, expand=True)
-            self._seg_tcp_btn.configure(style="Segmented.Selected.TButton")
-            self._seg_udp_btn.configure(style="Segmented.TButton")
-        else:
-            self._page_tcp.pack_forget()
-            self._page_udp.pack(fill=tk.BOTH, expand=True)
-            self._seg_tcp_btn.configure(style="Segmented.TButton")
-            self._seg_udp_btn.configure(style="Segmented.Selected.TButton")
-
-    def _update_tcp_metrics(self):
-        avg = int(sum(self.tcp_rtts) / len(self.tcp_rtts)) if self.tcp_rtts else 0
-        self.tcp_metrics_var.set(f"消息:{self.tcp_msg_count} 发送字节:{self.tcp_bytes_sent} 接收字节:{self.tcp_bytes_recv} 平均RTT:{avg}ms")
-
-    def _update_udp_metrics(self):
-        avg = int(sum(self.udp_rtts) / len(self.udp_rtts)) if self.udp_rtts else 0
-        self.udp_metrics_var.set(f"消息:{self.udp_msg_count} 发送字节:{self.udp_bytes_sent} 接收字节:{self.udp_bytes_recv} 平均RTT:{avg}ms")
-
-    # 已移除 RTT 绘制与重绘函数
-
-    def _clear_text(self, widget):
-        widget.delete("1.0", tk.END)
+        pages = {"tcp": (self._page_tcp, self._seg_tcp_btn), "udp": (self._page_udp, self._seg_udp_btn),
+                 "load": (self._page_load, self._seg_load_btn)}
+        for name, (page, button) in pages.items():
+            if name == key:
+                page.pack(fill=tk.BOTH, expand=True)
+                button.configure(style="Segmented.Selected.TButton")
+            else:
+                page.pack_forget()
+                button.configure(style="Segmented.TButton")
+
+    def _post(self, func, *args):
+        """从任意线程安排 func(*args) 在 Tk 主循环中执行"""
+        self._ui_calls.put((func, args))
+
+    def _pump(self):
+        """主循环定时任务：执行工作线程投递的界面更新，并把日志队列批量写入文本框"""
+        try:
+            while True:
+                func, args = self._ui_calls.get_nowait()
+                func(*args)
+        except queue.Empty:
+            pass
+        self.tcp_log.flush()
+        self.udp_log.flush()
+        self.root.after(LOG_FLUSH_MS, self._pump)
+
+    @staticmethod
+    def _rtt_text(hist: LatencyHistogram) -> str:
+        pct = hist.percentiles((50.0, 99.0))
+        return f"RTT 平均:{hist.mean() / 1e6:.3f}ms p50:{pct[50.0] / 1e6:.3f}ms p99:{pct[99.0] / 1e6:.3f}ms"
+
+    def _refresh_metrics(self):
+        """按固定帧率重绘统计：工作线程只累加计数，不再每条消息都触发界面更新"""
+        text = (f"消息:{self.tcp_msg_count} 发送字节:{self.tcp_bytes_sent} 接收字节:{self.tcp_bytes_recv} "
+                f"{self._rtt_text(self.tcp_hist)}")
+        if self.tcp_log.dropped:
+            text += f" 省略日志:{self.tcp_log.dropped}行"
+        if text != self.tcp_metrics_var.get():
+            self.tcp_metrics_var.set(text)
+        text = (f"消息:{self.udp_msg_count} 发送字节:{self.udp_bytes_sent} 接收字节:{self.udp_bytes_recv} "
+                f"{self._rtt_text(self.udp_hist)}")
+        if self.udp_log.dropped:
+            text += f" 省略日志:{self.udp_log.dropped}行"
+        if text != self.udp_metrics_var.get():
+            self.udp_metrics_var.set(text)
+        self.root.after(1000 // METRICS_FPS, self._refresh_metrics)
+
+    # ---------- 压测面板 ----------
+    def load_start(self):
+        # 建连阶段 engine.running 仍为 False，需另外记录，避免重复点击留下无人管理的压测
+        if self._load_starting or (self.load_engine is not None and self.load_engine.running):
+            return
+        try:
+            burst = self.load_mode_var.get() == "突发"
+            engine = LoadEngine(
+                self.load_proto_var.get(), self.load_host_var.get().strip(), int(self.load_port_var.get()),
+                framing=self.load_framing_var.get(),
+                connections=int(self.load_connections_var.get()), concurrency=int(self.load_concurrency_var.get()),
+                size=self.load_size_var.get().strip(), rate=float(self.load_rate_var.get()),
+                duration=0 if burst else float(self.load_duration_var.get()),
+                requests=int(self.load_requests_var.get()) if burst else 0)
+        except ValueError as e:
+            self.load_status_var.set(f"参数无效: {e}")
+            return
+        self.load_engine = engine
+        self._load_reported = False
+        for series in self.load_series.values():
+            series.clear()
+        self.load_status_var.set("正在建立连接...")
+        self._load_starting = True
+
+        def run():
+            # 建连可能阻塞，放到后台线程；工作线程启动后由 _sample_load 在主循环中定时采样
+            try:
+                engine.start()
+                self._post(self.load_status_var.set, f"运行中：{engine.describe()}")
+            except OSError as e:
+                # start() 已关闭建立到一半的连接
+                self._post(self.load_status_var.set, f"启动失败: {e}")
+            finally:
+                self._load_starting = False
+        threading.Thread(target=run, daemon=True).start()
+
+    def load_stop(self):
+        if self.load_engine is not None:
+            self.load_engine.stop()
+
+    def load_export(self):
+        """把本次压测的累计直方图与汇总导出为 JSON（与 loadgen.py --json 格式相同）"""
+        engine = self.load_engine
+        if engine is None or not engine.started_ns:
+            self.load_status_var.set("尚无可导出的压测结果")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")],
+                                            initialfile="loadtest.json")
+        if not path:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(engine.result(include_histogram=True), f, ensure_ascii=False, indent=2)
+        self.load_status_var.set(f"直方图已导出: {path}")
+
+    def _sample_load(self):
+        """每 LOAD_SAMPLE_MS 取一次区间直方图：更新实时 p50/p99/最大值、吞吐与图表"""
+        engine = self.load_engine
+        if engine is not None and engine.started_ns and not self._load_reported:
+            finished = not engine.running
+            sample = engine.sample()
+            hist, seconds = sample["hist"], sample["seconds"]
+            if seconds > 0 and (hist.total_count or not finished):
+                pct = hist.percentiles((50.0, 99.0))
+                rate = hist.total_count / seconds
+                self.load_series["rate"].append(rate)
+                self.load_series["p50"].append(pct[50.0] / 1e6)
+                self.load_series["p99"].append(pct[99.0] / 1e6)
+                self.load_series["max"].append((hist.max or 0) / 1e6)
+                self.load_live_var.set(f"吞吐:{rate:,.0f} 条/秒 p50:{pct[50.0] / 1e6:.3f}ms "
+                                       f"p99:{pct[99.0] / 1e6:.3f}ms 最大:{(hist.max or 0) / 1e6:.3f}ms")
+                self._draw_chart(self.load_rate_canvas, ("rate",), "吞吐 (条/秒)")
+                self._draw_chart(self.load_latency_canvas, ("p50", "p99", "max"), "延迟 (ms)")
+            result = engine.result()
+            lat = result["latency_us"]
+            self.load_total_var.set(
+                f"累计: 发送 {result['sent']} 成功 {result['ok']} 错误 {result['errors']} 超时 {result['timeouts']}  "
+                f"{result['throughput_msg_s']:,.0f} 条/秒  p50 {lat['p50'] / 1e3:.3f}ms  p99 {lat['p99'] / 1e3:.3f}ms  "
+                f"p99.9 {lat['p99.9'] / 1e3:.3f}ms  最大 {lat['max'] / 1e3:.3f}ms")
+            if finished:
+                # 最后一次采样已取走剩余的区间数据，之后保持最终结果直到下一次开始
+                self._load_reported = True
+                self.load_status_var.set(f"已结束，用时 {result['duration_s']:.2f}s，可导出直方图")
+        self.root.after(LOAD_SAMPLE_MS, self._sample_load)
+
+    def _draw_chart(self, canvas: tk.Canvas, keys, title: str):
+        canvas.delete("all")
+        width = max(canvas.winfo_width(), 100)
+        height = max(canvas.winfo_height(), 60)
+        pad_left, pad_top, pad_bottom = 56, 20, 8
+        values = [v for key in keys for v in self.load_series[key]]
+        top = max(values) * 1.1 if values and max(values) > 0 else 1.0
+        canvas.create_text(pad_left, 4, text=title, anchor="nw", fill="#6e6e73")
+        canvas.create_text(pad_left - 4, pad_top, text=f"{top:,.3g}", anchor="ne", fill="#6e6e73")
+        canvas.create_text(pad_left - 4, height - pad_bottom, text="0", anchor="se", fill="#6e6e73")
+        canvas.create_line(pad_left, height - pad_bottom, width - 8, height - pad_bottom, fill="#d1d1d6")
+        step = (width - 8 - pad_left) / max(CHART_POINTS - 1, 1)
+        plot_h = height - pad_top - pad_bottom
+        for i, key in enumerate(keys):
+            series = self.load_series[key]
+            if len(series) < 2:
+                continue
+            coords = []
+            for j, v in enumerate(series):
+                coords += [pad_left + j * step, height - pad_bottom - v / top * plot_h]
+            canvas.create_line(*coords, fill=CHART_COLORS[key], width=2)
+            if len(keys) > 1:
+                canvas.create_text(width - 10 - 48 * (len(keys) - 1 - i), 4, text=key, anchor="ne", fill=CHART_COLORS[key])
 
     def tcp_connect(self):
         if self.tcp_connected:
@@ -197,7 +462,7 @@ class VisualizerApp:
         try:
             port = int(self.tcp_port_var.get().strip())
         except Exception:
-            self.tcp_text.insert(tk.END, "端口无效\n")
+            self.tcp_log.write("端口无效\n")
             return
         def run():
             try:
@@ -205,10 +470,10 @@ class VisualizerApp:
                 s.connect((host, port))
                 self.tcp_socket = s
                 self.tcp_connected = True
-                self.tcp_status_var.set("已连接")
-                self.tcp_text.insert(tk.END, f"连接到 {host}:{port}\n")
+                self._post(self.tcp_status_var.set, "已连接")
+                self.tcp_log.write(f"连接到 {host}:{port}\n")
             except Exception as e:
-                self.tcp_text.insert(tk.END, f"连接失败: {e}\n")
+                self.tcp_log.write(f"连接失败: {e}\n")
         threading.Thread(target=run, daemon=True).start()
 
     def tcp_disconnect(self):
@@ -220,38 +485,35 @@ class VisualizerApp:
         self.tcp_socket = None
         self.tcp_connected = False
         self.tcp_status_var.set("未连接")
-        self.tcp_text.insert(tk.END, "已断开\n")
+        self.tcp_log.write("已断开\n")
 
     def tcp_send(self):
         msg = self.tcp_msg_var.get().strip()
         if not msg:
             return
         if not self.tcp_connected or not self.tcp_socket:
-            self.tcp_text.insert(tk.END, "未连接\n")
+            self.tcp_log.write("未连接\n")
             return
         def run():
             try:
-                start = time.time()
+                start = time.perf_counter_ns()
                 data = msg.encode("utf-8")
                 self.tcp_socket.sendall(data)
                 self.tcp_bytes_sent += len(data)
                 resp = self.tcp_socket.recv(4096)
-                end = time.time()
+                end = time.perf_counter_ns()
                 if resp:
                     self.tcp_bytes_recv += len(resp)
-                    rtt = int((end - start) * 1000)
-                    self.tcp_rtts.append(rtt)
-                    if len(self.tcp_rtts) > 200:
-                        self.tcp_rtts = self.tcp_rtts[-200:]
+                    rtt_ns = end - start
+                    self.tcp_hist.record(rtt_ns)
                     self.tcp_msg_count += 1
-                    self._update_tcp_metrics()
-                    self.tcp_text.insert(tk.END, f"发送:{msg}\n")
-                    self.tcp_text.insert(tk.END, f"回复:{resp.decode('utf-8', errors='ignore')} RTT:{rtt}ms\n")
+                    self.tcp_log.write(f"发送:{msg}\n")
+                    self.tcp_log.write(f"回复:{resp.decode('utf-8', errors='ignore')} RTT:{rtt_ns / 1e6:.3f}ms\n")
                 else:
-                    self.tcp_text.insert(tk.END, "连接关闭\n")
-                    self.tcp_disconnect()
+                    self.tcp_log.write("连接关闭\n")
+                    self._post(self.tcp_disconnect)
             except Exception as e:
-                self.tcp_text.insert(tk.END, f"异常:{e}\n")
+                self.tcp_log.write(f"异常:{e}\n")
         threading.Thread(target=run, daemon=True).start()
 
     def tcp_server_start(self):
@@ -259,24 +521,24 @@ class VisualizerApp:
             return
         tcp_server_path = self.base_dir / "tcp" / "tcp_server.py"
         if not tcp_server_path.exists():
-            self.tcp_text.insert(tk.END, f"找不到服务器脚本: {tcp_server_path}\n")
+            self.tcp_log.write(f"找不到服务器脚本: {tcp_server_path}\n")
             return
         def run():
             try:
                 proc = subprocess.Popen([sys.executable, str(tcp_server_path)], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
                 self.tcp_server_proc = proc
                 self.tcp_server_running = True
-                self.tcp_server_status_var.set("运行中")
-                self.tcp_text.insert(tk.END, f"已启动TCP服务器: {tcp_server_path}\n")
+                self._post(self.tcp_server_status_var.set, "运行中")
+                self.tcp_log.write(f"已启动TCP服务器: {tcp_server_path}\n")
                 def reader():
                     try:
                         for line in proc.stdout:
-                            self.tcp_text.insert(tk.END, line)
+                            self.tcp_log.write(line)
                     except Exception:
                         pass
                 threading.Thread(target=reader, daemon=True).start()
             except Exception as e:
-                self.tcp_text.insert(tk.END, f"启动失败: {e}\n")
+                self.tcp_log.write(f"启动失败: {e}\n")
         threading.Thread(target=run, daemon=True).start()
 
     def tcp_server_stop(self):
@@ -288,7 +550,7 @@ class VisualizerApp:
         self.tcp_server_proc = None
         self.tcp_server_running = False
         self.tcp_server_status_var.set("未运行")
-        self.tcp_text.insert(tk.END, "TCP服务器已停止\n")
+        self.tcp_log.write("TCP服务器已停止\n")
 
     def udp_send(self):
         msg = self.udp_msg_var.get().strip()
@@ -298,34 +560,31 @@ class VisualizerApp:
         try:
             port = int(self.udp_port_var.get().strip())
         except Exception:
-            self.udp_text.insert(tk.END, "端口无效\n")
+            self.udp_log.write("端口无效\n")
             return
         if not self.udp_client_started or not self.udp_socket:
-            self.udp_text.insert(tk.END, "UDP客户端未启动\n")
+            self.udp_log.write("UDP客户端未启动\n")
             return
         def run():
             try:
-                start = time.time()
+                start = time.perf_counter_ns()
                 data = msg.encode("utf-8")
                 self.udp_socket.settimeout(3)
                 self.udp_socket.sendto(data, (host, port))
                 self.udp_bytes_sent += len(data)
                 try:
                     resp, addr = self.udp_socket.recvfrom(4096)
-                    end = time.time()
+                    end = time.perf_counter_ns()
                     self.udp_bytes_recv += len(resp)
-                    rtt = int((end - start) * 1000)
-                    self.udp_rtts.append(rtt)
-                    if len(self.udp_rtts) > 200:
-                        self.udp_rtts = self.udp_rtts[-200:]
+                    rtt_ns = end - start
+                    self.udp_hist.record(rtt_ns)
                     self.udp_msg_count += 1
-                    self._update_udp_metrics()
-                    self.udp_text.insert(tk.END, f"发送:{msg}\n")
-                    self.udp_text.insert(tk.END, f"回复:{resp.decode('utf-8', errors='ignore')} RTT:{rtt}ms\n")
+                    self.udp_log.write(f"发送:{msg}\n")
+                    self.udp_log.write(f"回复:{resp.decode('utf-8', errors='ignore')} RTT:{rtt_ns / 1e6:.3f}ms\n")
                 except socket.timeout:
-                    self.udp_text.insert(tk.END, "超时\n")
+                    self.udp_log.write("超时\n")
             except Exception as e:
-                self.udp_text.insert(tk.END, f"异常:{e}\n")
+                self.udp_log.write(f"异常:{e}\n")
         threading.Thread(target=run, daemon=True).start()
 
     def udp_client_start(self):
@@ -335,9 +594,9 @@ class VisualizerApp:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self.udp_socket = s
             self.udp_client_started = True
-            self.udp_text.insert(tk.END, "UDP客户端已启动\n")
+            self.udp_log.write("UDP客户端已启动\n")
         except Exception as e:
-            self.udp_text.insert(tk.END, f"UDP客户端启动失败: {e}\n")
+            self.udp_log.write(f"UDP客户端启动失败: {e}\n")
 
     def udp_client_stop(self):
         if self.udp_socket:
@@ -347,31 +606,31 @@ class VisualizerApp:
                 pass
         self.udp_socket = None
         self.udp_client_started = False
-        self.udp_text.insert(tk.END, "UDP客户端已停止\n")
+        self.udp_log.write("UDP客户端已停止\n")
 
     def udp_server_start(self):
         if self.udp_server_running:
             return
         udp_server_path = self.base_dir / "udp" / "udp_server.py"
         if not udp_server_path.exists():
-            self.udp_text.insert(tk.END, f"找不到服务器脚本: {udp_server_path}\n")
+            self.udp_log.write(f"找不到服务器脚本: {udp_server_path}\n")
             return
         def run():
             try:
                 proc = subprocess.Popen([sys.executable, str(udp_server_path)], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
                 self.udp_server_proc = proc
                 self.udp_server_running = True
-                self.udp_server_status_var.set("运行中")
-                self.udp_text.insert(tk.END, f"已启动UDP服务器: {udp_server_path}\n")
+                self._post(self.udp_server_status_var.set, "运行中")
+                self.udp_log.write(f"已启动UDP服务器: {udp_server_path}\n")
                 def reader():
                     try:
                         for line in proc.stdout:
-                            self.udp_text.insert(tk.END, line)
+                            self.udp_log.write(line)
                     except Exception:
                         pass
                 threading.Thread(target=reader, daemon=True).start()
             except Exception as e:
-                self.udp_text.insert(tk.END, f"启动失败: {e}\n")
+                self.udp_log.write(f"启动失败: {e}\n")
         threading.Thread(target=run, daemon=True).start()
 
     def udp_server_stop(self):
@@ -383,7 +642,7 @@ class VisualizerApp:
         self.udp_server_proc = None
         self.udp_server_running = False
         self.udp_server_status_var.set("未运行")
-        self.udp_text.insert(tk.END, "UDP服务器已停止\n")
+        self.udp_log.write("UDP服务器已停止\n")
 
 
 def main():
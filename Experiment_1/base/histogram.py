@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+固定内存的延迟直方图（HDR 风格的对数-线性分桶）
+- 不保存每个样本，只为每个桶计数，内存与样本数量无关（默认约 4 千个桶，32 KB）
+- 每个 2 的幂区间再线性切分为 2^(sub_bucket_bits-1) 个子桶，
+  默认 sub_bucket_bits=8 时相对误差不超过 1/128（约 0.8%）
+- 数值单位由调用方决定，推荐使用纳秒（time.perf_counter_ns）
+
+用法示例：
+    h = LatencyHistogram()
+    h.record(time.perf_counter_ns() - start)
+    print(h.percentile(99.0) / 1e6, "ms")
+"""
+
+import math
+from array import array
+
+DEFAULT_SUB_BUCKET_BITS = 8
+DEFAULT_MAX_VALUE = 1 << 40   # 纳秒单位下约 18 分钟，超过的值截断到最大桶
+
+
+class LatencyHistogram:
+    """对数-线性分桶直方图，记录非负整数值"""
+
+    def __init__(self, sub_bucket_bits: int = DEFAULT_SUB_BUCKET_BITS, max_value: int = DEFAULT_MAX_VALUE):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.max_value = max_value
+        self._sub_count = 1 << sub_bucket_bits
+        self._half = self._sub_count >> 1
+        self.counts = array("Q", [0]) * (self._index_of(max_value) + 1)
+        self.total_count = 0
+        self.total_sum = 0
+        self.min = None
+        self.max = None
+
+    # ---------- 分桶换算 ----------
+    def _index_of(self, value: int) -> int:
+        if value < self._sub_count:
+            return value
+        exp = value.bit_length() - self.sub_bucket_bits
+        mantissa = value >> exp
+        return self._sub_count + (exp - 1) * self._half + (mantissa - self._half)
+
+    def _bounds_of(self, index: int):
+        """返回桶覆盖的闭区间 [low, high]"""
+        if index < self._sub_count:
+            return index, index
+        k = index - self._sub_count
+        exp = k // self._half + 1
+        mantissa = k % self._half + self._half
+        low = mantissa << exp
+        return low, low + (1 << exp) - 1
+
+    # ---------- 记录 ----------
+    def record(self, value: int, count: int = 1):
+        value = int(value)
+        if value < 0:
+            value = 0
+        elif value > self.max_value:
+            value = self.max_value
+        self.counts[self._index_of(value)] += count
+        self.total_count += count
+        self.total_sum += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """合并另一个同规格的直方图（例如各线程各自记录，最后汇总）"""
+        if other.sub_bucket_bits != self.sub_bucket_bits or len(other.counts) != len(self.counts):
+            raise ValueError("只能合并分桶规格相同的直方图")
+        # other 可能仍在被工作线程写入（压测中途采样）：record 先加桶计数再加总数，
+        # 因此先读总数再复制桶，保证桶内计数之和不小于 total_count，百分位总能落在某个桶里
+        total_count, total_sum, other_min, other_max = other.total_count, other.total_sum, other.min, other.max
+        counts = self.counts
+        for i, c in enumerate(other.counts):
+            if c:
+                counts[i] += c
+        self.total_count += total_count
+        self.total_sum += total_sum
+        if other_min is not None and (self.min is None or other_min < self.min):
+            self.min = other_min
+        if other_max is not None and (self.max is None or other_max > self.max):
+            self.max = other_max
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.total_count = 0
+        self.total_sum = 0
+        self.min = None
+        self.max = None
+
+    # ---------- 查询 ----------
+    def mean(self) -> float:
+        return self.total_sum / self.total_count if self.total_count else 0.0
+
+    def _rank(self, pct: float) -> int:
+        """第 pct 百分位对应的样本序号（从 1 开始）"""
+        return max(1, min(self.total_count, math.ceil(self.total_count * pct / 100.0)))
+
+    def percentile(self, pct: float) -> int:
+        """返回第 pct 百分位的值（取桶上界，与 HDR Histogram 的约定一致）"""
+        return self.percentiles([pct])[pct]
+
+    def percentiles(self, pcts):
+        """一次遍历计算多个百分位，返回 {pct: value}"""
+        if not self.total_count:
+            return {p: 0 for p in pcts}
+        targets = sorted((self._rank(p), p) for p in pcts)
+        result = {}
+        running = 0
+        t = 0
+        for i, c in enumerate(self.counts):
+            if not c:
+                continue
+            running += c
+            while t < len(targets) and running >= targets[t][0]:
+                result[targets[t][1]] = min(self._bounds_of(i)[1], self.max)
+                t += 1
+            if t == len(targets):
+                break
+        return result
+
+    def to_dict(self) -> dict:
+        """导出为可 JSON 序列化的字典（只保存非零桶）"""
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "max_value": self.max_value,
+            "total_count": self.total_count,
+            "total_sum": self.total_sum,
+            "min": self.min,
+            "max": self.max,
+            "buckets": [[self._bounds_of(i)[0], c] for i, c in enumerate(self.counts) if c],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        h = cls(data["sub_bucket_bits"], data["max_value"])
+        for low, c in data["buckets"]:
+            h.counts[h._index_of(low)] += c
+        h.total_count = data["total_count"]
+        h.total_sum = data["total_sum"]
+        h.min = data["min"]
+        h.max = data["max"]
+        return h
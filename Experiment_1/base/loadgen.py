@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TCP/UDP 压测客户端（非交互）
+1. 打开指定数量的连接（UDP 为套接字），由若干并发工作线程轮流使用
+2. 按给定的消息大小分布生成负载
+3. 闭环模式：每个线程收到回复后立即发下一条；
+   开环模式（--rate）：按目标速率定时发送，延迟从“计划发送时刻”起算，避免协调遗漏
+4. 用固定内存的直方图统计延迟，输出吞吐与 p50/p90/p99/p99.9
+
+可对接：
+- base/tcp/tcp_server.py（默认 raw 协议，或 --framing length）
+- base/udp/udp_server.py（单进程或 --workers 模式）
+
+用法示例：
+    python loadgen.py tcp --connections 50 --concurrency 50 --duration 10
+    python loadgen.py tcp --framing length --size uniform:64-4096 --rate 20000
+    python loadgen.py udp --concurrency 8 --size choice:32,256,1024 --duration 5
+    python loadgen.py tcp --concurrency 16 --requests 100000      # 突发：发满 10 万条即结束
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "tcp"))
+from framing import FrameDecoder, FrameError, send_frame
+from histogram import LatencyHistogram
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 50000
+TCP_REPLY_PREFIX = "服务器已收到：".encode("utf-8")
+UDP_REPLY_PREFIX = "UDP 回显（大写）：".encode("utf-8")
+RAW_TCP_MAX_SIZE = 1024   # raw 协议下服务器单次 recv(1024) 视为一条消息
+UDP_TIMEOUT = 1.0         # UDP 等待回复的超时（秒），超时计为丢包
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class SizeDistribution:
+    """
+    消息大小分布，规格字符串：
+      64                 固定 64 字节
+      uniform:64-1024    [64, 1024] 均匀分布
+      choice:64,512,1400 在给定值中等概率选择
+      exp:256            均值 256 的指数分布（截断到上限）
+    """
+
+    def __init__(self, spec: str, max_size: int = 0):
+        self.spec = spec
+        self.max_size = max_size
+        kind, _, arg = spec.partition(":")
+        if not arg:
+            value = int(kind)
+            self._sample = lambda rng: value
+        elif kind == "uniform":
+            low, high = (int(x) for x in arg.split("-"))
+            self._sample = lambda rng: rng.randint(low, high)
+        elif kind == "choice":
+            values = [int(x) for x in arg.split(",")]
+            self._sample = lambda rng: rng.choice(values)
+        elif kind == "exp":
+            mean = float(arg)
+            self._sample = lambda rng: int(rng.expovariate(1.0 / mean))
+        else:
+            raise ValueError(f"无法识别的大小分布：{spec}")
+
+    def sample(self, rng: random.Random) -> int:
+        size = max(self._sample(rng), 16)  # 至少能放下序号
+        if self.max_size:
+            size = min(size, self.max_size)
+        return size
+
+
+def make_payload(seq: int, size: int) -> bytes:
+    """负载 = 10 位序号 + 小写填充（纯 ASCII，服务器转大写/加前缀后长度可预测）"""
+    head = b"%010d" % (seq % 10 ** 10)
+    return head + b"x" * (size - len(head))
+
+
+# ---------- 不同协议的单次请求 ----------
+class RawTcpChannel:
+    """raw 协议：一次 sendall 一条消息，读满预期长度的回复"""
+
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.buf = bytearray(RAW_TCP_MAX_SIZE * 4)
+        self.view = memoryview(self.buf)
+
+    def request(self, seq: int, payload: bytes) -> bool:
+        self.sock.sendall(payload)
+        expected = len(TCP_REPLY_PREFIX) + len(payload)
+        got = 0
+        while got < expected:
+            n = self.sock.recv_into(self.view[got:expected])
+            if not n:
+                raise ConnectionError("服务器已关闭连接")
+            got += n
+        return self.view[len(TCP_REPLY_PREFIX):expected] == payload
+
+    def close(self):
+        self.sock.close()
+
+
+class FramedTcpChannel:
+    """length 分帧协议：请求号即序号"""
+
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.decoder = FrameDecoder()
+
+    def request(self, seq: int, payload: bytes) -> bool:
+        req_id = seq & 0xFFFFFFFF
+        send_frame(self.sock, req_id, payload)
+        while True:
+            for rid, reply in self.decoder.frames():
+                return rid == req_id and reply[len(TCP_REPLY_PREFIX):] == payload
+            if not self.decoder.recv_from(self.sock):
+                raise ConnectionError("服务器已关闭连接")
+
+    def close(self):
+        self.sock.close()
+
+
+class UdpChannel:
+    """UDP：按序号匹配回复，丢弃迟到的旧回复"""
+
+    def __init__(self, host, port):
+        self.addr = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.settimeout(UDP_TIMEOUT)
+        self.buf = bytearray(65536)
+        self.view = memoryview(self.buf)
+
+    def request(self, seq: int, payload: bytes) -> bool:
+        self.sock.sendto(payload, self.addr)
+        head = payload[:10]
+        deadline = time.monotonic() + UDP_TIMEOUT
+        while True:
+            n, _ = self.sock.recvfrom_into(self.buf)  # 超时抛出 socket.timeout
+            if self.view[len(UDP_REPLY_PREFIX):len(UDP_REPLY_PREFIX) + 10] == head:
+                return n == len(UDP_REPLY_PREFIX) + len(payload)
+            if time.monotonic() > deadline:
+                raise socket.timeout()
+
+    def close(self):
+        self.sock.close()
+
+
+# ---------- 压测主体 ----------
+class WorkerStats:
+    __slots__ = ("hist", "interval", "sent", "ok", "errors", "timeouts", "bytes_sent")
+
+    def __init__(self):
+        self.hist = LatencyHistogram()       # 整个压测的累计延迟
+        self.interval = LatencyHistogram()   # 自上次 LoadEngine.sample() 以来的延迟，供实时展示
+        self.sent = 0
+        self.ok = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.bytes_sent = 0
+
+
+def worker(idx, channels, sizes, rate, start_gate, stats, stop_event, quota=0):
+    """单个并发工作线程：轮流使用分配给自己的连接，每次只有一个请求在途；quota>0 时发满即停"""
+    rng = random.Random(idx)
+    interval_ns = int(1e9 / rate) if rate else 0
+    seq = idx << 24
+    start_gate.wait()
+    next_ns = time.perf_counter_ns()
+    i = 0
+    while not stop_event.is_set() and not (quota and stats.sent >= quota):
+        now = time.perf_counter_ns()
+        if interval_ns:
+            # 开环：等到计划发送时刻；落后时立刻补发，延迟从计划时刻起算
+            if now < next_ns:
+                time.sleep((next_ns - now) / 1e9)
+            start = next_ns
+            next_ns += interval_ns
+        else:
+            start = now
+        channel = channels[i % len(channels)]
+        i += 1
+        seq += 1
+        payload = make_payload(seq, sizes.sample(rng))
+        stats.sent += 1
+        stats.bytes_sent += len(payload)
+        try:
+            ok = channel.request(seq, payload)
+        except socket.timeout:
+            stats.timeouts += 1
+            continue
+        except (OSError, FrameError):
+            # FrameError：分帧回复不合法，与连接错误一样计入错误，不能让工作线程悄悄退出
+            stats.errors += 1
+            if not interval_ns:
+                stop_event.wait(0.01)
+            continue
+        elapsed_ns = time.perf_counter_ns() - start
+        stats.hist.record(elapsed_ns)
+        stats.interval.record(elapsed_ns)
+        if ok:
+            stats.ok += 1
+        else:
+            stats.errors += 1
+
+
+class LoadEngine:
+    """
+    在后台线程中运行一次压测，供命令行与图形界面共用
+    - duration>0 时到时自动停止，requests>0 时发满指定请求数即停止（突发），两者都为 0 则一直运行到 stop()
+    - sample() 取走各线程自上次调用以来的区间直方图，用于实时展示 p50/p99/最大值与吞吐
+    """
+
+    def __init__(self, proto, host=SERVER_HOST, port=SERVER_PORT, framing="raw", connections=1, concurrency=1,
+                 size="64", rate=0, duration=0, requests=0):
+        if proto == "udp":
+            self.factory = UdpChannel
+            max_size = 1400   # 低于服务器的 BUFFER_SIZE（2048），且不超过常见 MTU
+        elif framing == "length":
+            self.factory = FramedTcpChannel
+            max_size = 0
+        else:
+            self.factory = RawTcpChannel
+            max_size = RAW_TCP_MAX_SIZE
+        self.proto = proto
+        self.framing = framing
+        self.host = host
+        self.port = port
+        self.sizes = SizeDistribution(size, max_size)
+        self.size = size
+        self.concurrency = max(1, concurrency)
+        self.connections = max(connections, self.concurrency)
+        self.rate = rate
+        self.duration = duration
+        self.requests = requests
+        self.stats = [WorkerStats() for _ in range(self.concurrency)]
+        self.stop_event = threading.Event()
+        self.channels = []
+        self.threads = []
+        self.started_ns = None
+        self.finished_ns = None
+        self._last_sample_ns = None
+
+    def describe(self) -> str:
+        mode = f"开环 {self.rate:g} 条/秒" if self.rate else "闭环"
+        limit = f"{self.requests} 条请求" if self.requests else (f"时长 {self.duration:g}s" if self.duration else "持续运行")
+        return (f"{self.proto.upper()} {self.host}:{self.port}，连接 {self.connections}，并发 {self.concurrency}，"
+                f"大小 {self.size}，{mode}，{limit}")
+
+    def start(self):
+        """建立全部连接并启动工作线程；连接失败时关闭已建立的连接并抛出 OSError"""
+        self.channels = []
+        try:
+            for _ in range(self.connections):
+                self.channels.append(self.factory(self.host, self.port))
+        except OSError:
+            for ch in self.channels:
+                ch.close()
+            self.channels = []
+            raise
+        groups = [self.channels[i::self.concurrency] for i in range(self.concurrency)]
+        per_worker_rate = self.rate / self.concurrency if self.rate else 0
+        quotas = [self.requests // self.concurrency + (i < self.requests % self.concurrency)
+                  for i in range(self.concurrency)] if self.requests else [0] * self.concurrency
+        start_gate = threading.Barrier(self.concurrency + 1)
+        self.threads = [
+            threading.Thread(target=worker, daemon=True,
+                             args=(i, groups[i], self.sizes, per_worker_rate, start_gate, self.stats[i],
+                                   self.stop_event, quotas[i]))
+            for i in range(self.concurrency)
+        ]
+        for t in self.threads:
+            t.start()
+        # 所有线程就绪后统一开始计时
+        start_gate.wait()
+        self.started_ns = self._last_sample_ns = time.perf_counter_ns()
+        threading.Thread(target=self._supervise, daemon=True).start()
+
+    def _supervise(self):
+        deadline = time.monotonic() + self.duration if self.duration else None
+        for t in self.threads:
+            t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if t.is_alive():
+                break
+        self.stop_event.set()
+        for t in self.threads:
+            t.join()
+        self.finished_ns = time.perf_counter_ns()
+        for ch in self.channels:
+            ch.close()
+
+    @property
+    def running(self) -> bool:
+        return self.started_ns is not None and self.finished_ns is None
+
+    def stop(self):
+        self.stop_event.set()
+
+    def wait(self, timeout=None) -> bool:
+        """等待压测结束，返回是否已结束"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.running:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_ns is None:
+            return 0.0
+        return ((self.finished_ns or time.perf_counter_ns()) - self.started_ns) / 1e9
+
+    def sample(self) -> dict:
+        """取走各线程的区间直方图并合并，返回 {"seconds": 区间秒数, "hist": 区间直方图}"""
+        hist = LatencyHistogram()
+        for s in self.stats:
+            h, s.interval = s.interval, LatencyHistogram()
+            hist.merge(h)
+        now = self.finished_ns or time.perf_counter_ns()   # 结束后的空闲时间不计入最后一个区间
+        seconds = (now - self._last_sample_ns) / 1e9 if self._last_sample_ns else 0.0
+        self._last_sample_ns = now
+        return {"seconds": seconds, "hist": hist}
+
+    def total(self) -> WorkerStats:
+        total = WorkerStats()
+        for s in self.stats:
+            total.hist.merge(s.hist)
+            total.sent += s.sent
+            total.ok += s.ok
+            total.errors += s.errors
+            total.timeouts += s.timeouts
+            total.bytes_sent += s.bytes_sent
+        return total
+
+    def result(self, total: WorkerStats = None, include_histogram: bool = False) -> dict:
+        """与命令行 --json 相同格式的结果字典"""
+        total = total or self.total()
+        hist = total.hist
+        elapsed = self.elapsed
+        pct = hist.percentiles(PERCENTILES)
+        result = {
+            "proto": self.proto,
+            "framing": self.framing if self.proto == "tcp" else None,
+            "connections": self.connections,
+            "concurrency": self.concurrency,
+            "size": self.size,
+            "rate": self.rate,
+            "requests": self.requests,
+            "duration_s": elapsed,
+            "sent": total.sent,
+            "ok": total.ok,
+            "errors": total.errors,
+            "timeouts": total.timeouts,
+            "throughput_msg_s": hist.total_count / elapsed if elapsed else 0.0,
+            "throughput_mb_s": total.bytes_sent / elapsed / 1e6 if elapsed else 0.0,
+            "latency_us": {
+                "mean": hist.mean() / 1e3,
+                **{f"p{p:g}": pct[p] / 1e3 for p in PERCENTILES},
+                "max": (hist.max or 0) / 1e3,
+            },
+        }
+        if include_histogram:
+            result["histogram"] = hist.to_dict()
+        return result
+
+
+def run(args):
+    engine = LoadEngine(args.proto, args.host, args.port, framing=args.framing, connections=args.connections,
+                        concurrency=args.concurrency, size=args.size, rate=args.rate,
+                        duration=0 if args.requests else args.duration, requests=args.requests)
+    print(f"[准备] {engine.describe()}")
+    engine.start()
+    try:
+        engine.wait()
+    except KeyboardInterrupt:
+        print("[信息] 提前结束")
+    engine.stop()
+    engine.wait()
+    return report(args, engine)
+
+
+def report(args, engine: LoadEngine) -> dict:
+    total = engine.total()
+    result = engine.result(total, include_histogram=bool(args.json))
+    lat = result["latency_us"]
+    print(f"[结果] 用时 {result['duration_s']:.2f}s，发送 {total.sent}，成功 {total.ok}，错误 {total.errors}，"
+          f"超时 {total.timeouts}")
+    print(f"[吞吐] {result['throughput_msg_s']:.0f} 条/秒，{result['throughput_mb_s']:.2f} MB/s（请求方向）")
+    print("[延迟] " + "  ".join(f"{k}={v / 1e3:.3f}ms" for k, v in lat.items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"[输出] 结果已写入 {args.json}")
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="TCP/UDP 压测客户端")
+    parser.add_argument("proto", choices=("tcp", "udp"), help="协议")
+    parser.add_argument("--host", default=SERVER_HOST, help="服务器地址")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="服务器端口")
+    parser.add_argument("--framing", choices=("raw", "length"), default="raw",
+                        help="TCP 协议：raw 对接默认服务器，length 对接 --framing length 的服务器")
+    parser.add_argument("--connections", type=int, default=1, help="连接（套接字）数量，不少于并发数")
+    parser.add_argument("--concurrency", type=int, default=1, help="并发工作线程数（同时在途的请求数）")
+    parser.add_argument("--size", default="64", help="消息大小分布，如 64、uniform:64-1024、choice:64,512、exp:256")
+    parser.add_argument("--rate", type=float, default=0, help="开环目标速率（条/秒，0 表示闭环）")
+    parser.add_argument("--duration", type=float, default=10.0, help="压测时长（秒）")
+    parser.add_argument("--requests", type=int, default=0, help="突发模式：发满指定请求数即结束（忽略 --duration）")
+    parser.add_argument("--json", help="把结果（含直方图）写入 JSON 文件")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    run(parse_args())
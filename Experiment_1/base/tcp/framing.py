@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TCP 长度前缀分帧（客户端与服务器共用）
+TCP 是字节流，一次 recv() 既可能只拿到半条消息，也可能拿到好几条粘在一起的消息。
+这里给每条消息加上固定 8 字节的帧头：
+
+    +----------------+----------------+------------------+
+    | 长度 (uint32)  | 请求号 (uint32) | 负载 (长度 字节) |
+    +----------------+----------------+------------------+
+
+- 长度：负载字节数（网络字节序），超过 max_frame 直接判为协议错误
+- 请求号：由客户端分配，服务器原样带回，用于流水线（pipelining）时匹配请求与回复
+
+FrameDecoder 直接 recv_into() 到自己的缓冲区，并以 memoryview 切片返回负载，
+重组过程不产生额外拷贝；只有残留的半帧会在缓冲区用尽时被挪到开头。
+"""
+
+import socket
+import struct
+
+HEADER = struct.Struct("!II")
+HEADER_SIZE = HEADER.size
+MAX_FRAME = 16 * 1024 * 1024   # 默认单帧上限 16 MiB
+INITIAL_BUFFER = 64 * 1024     # 解码缓冲区初始大小
+
+
+class FrameError(Exception):
+    """分帧协议错误（例如帧长度超过上限）"""
+
+
+def encode_header(req_id: int, length: int) -> bytes:
+    return HEADER.pack(length, req_id)
+
+
+def encode_frame(req_id: int, payload: bytes) -> bytes:
+    """把一条消息编码为完整的帧（帧头 + 负载）"""
+    return HEADER.pack(len(payload), req_id) + payload
+
+
+def send_frame(sock: socket.socket, req_id: int, payload) -> None:
+    """发送一帧；支持 sendmsg 的平台上帧头与负载分开提交，避免拼接拷贝"""
+    header = HEADER.pack(len(payload), req_id)
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(header + bytes(payload))
+        return
+    total = HEADER_SIZE + len(payload)
+    sent = sock.sendmsg([header, payload])
+    if sent < total:
+        # 部分发送：剩余部分退回到 sendall
+        rest = memoryview(header + bytes(payload))[sent:]
+        sock.sendall(rest)
+
+
+class FrameDecoder:
+    """
+    增量帧解码器
+    用法：
+        decoder = FrameDecoder()
+        while decoder.recv_from(sock):
+            for req_id, payload in decoder.frames():
+                ...  # payload 为 memoryview，下一次 recv_from() 之前有效
+    """
+
+    def __init__(self, max_frame: int = MAX_FRAME, initial_size: int = INITIAL_BUFFER):
+        self.max_frame = max_frame
+        self._buf = bytearray(initial_size)
+        self._view = memoryview(self._buf)
+        self._start = 0   # 尚未消费数据的起点
+        self._end = 0     # 已写入数据的终点
+
+    @property
+    def buffered(self) -> int:
+        """缓冲区中尚未组成完整帧的字节数"""
+        return self._end - self._start
+
+    def _reserve(self, need: int):
+        """保证缓冲区尾部至少还有 need 字节空闲"""
+        if len(self._buf) - self._end >= need:
+            return
+        pending = self._end - self._start
+        if pending + need <= len(self._buf):
+            # 空间足够，只需把残留的半帧挪到开头
+            self._view[:pending] = self._view[self._start:self._end]
+        else:
+            # 需要扩容：新建缓冲区，旧缓冲区上的 memoryview 仍然有效
+            size = len(self._buf)
+            while size < pending + need:
+                size *= 2
+            new_buf = bytearray(size)
+            new_buf[:pending] = self._view[self._start:self._end]
+            self._buf = new_buf
+            self._view = memoryview(new_buf)
+        self._start = 0
+        self._end = pending
+
+    def _wanted(self) -> int:
+        """根据当前残留数据估算下一帧还需要多少字节"""
+        pending = self._end - self._start
+        if pending < HEADER_SIZE:
+            return HEADER_SIZE - pending
+        length, _ = HEADER.unpack_from(self._buf, self._start)
+        if length > self.max_frame:
+            raise FrameError(f"帧长度 {length} 超过上限 {self.max_frame}")
+        return max(HEADER_SIZE + length - pending, 1)
+
+    def recv_from(self, sock: socket.socket, min_read: int = 4096) -> int:
+        """从套接字读取数据到内部缓冲区，返回读取的字节数（0 表示对端关闭）"""
+        self._reserve(max(self._wanted(), min_read))
+        n = sock.recv_into(self._view[self._end:])
+        self._end += n
+        return n
+
+    def feed(self, data) -> None:
+        """手动喂入数据（用于非套接字来源）"""
+        n = len(data)
+        self._reserve(n)
+        self._view[self._end:self._end + n] = data
+        self._end += n
+
+    def frames(self):
+        """逐个产出缓冲区中已完整的帧：(请求号, 负载 memoryview)"""
+        while self._end - self._start >= HEADER_SIZE:
+            length, req_id = HEADER.unpack_from(self._buf, self._start)
+            if length > self.max_frame:
+                raise FrameError(f"帧长度 {length} 超过上限 {self.max_frame}")
+            frame_end = self._start + HEADER_SIZE + length
+            if frame_end > self._end:
+                break
+            payload = self._view[self._start + HEADER_SIZE:frame_end]
+            self._start = frame_end
+            yield req_id, payload
+        if self._start == self._end:
+            # 缓冲区已全部消费，复位读写位置
+            self._start = self._end = 0
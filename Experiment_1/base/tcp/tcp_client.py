@@ -7,34 +7,123 @@ TCP 客户端
 2. 发送一条或多条消息
 3. 接收服务器返回的数据并打印
 4. 用户输入 "exit" / "quit" 可退出客户端
+5. 可选分帧模式（--framed，需服务器以 --framing length 启动）：
+   - 每条消息带长度前缀，支持任意长度与粘包
+   - --pipeline N：在一条连接上保持 N 个请求同时在途，按请求号匹配回复
+
+用法示例：
+    python tcp_client.py
+    python tcp_client.py --framed
+    python tcp_client.py --framed --pipeline 64 --count 10000 --size 512
 """
 
+import argparse
+import selectors
 import socket
+import time
+
+from framing import FrameDecoder, MAX_FRAME, encode_frame
 
 SERVER_HOST = "127.0.0.1"  # 默认连接本机
 SERVER_PORT = 50000        # 需和服务器保持一致
 
 
-def main():
-    # 1. 创建 TCP 套接字
-    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+class FramedClient:
+    """分帧协议客户端：为每个请求分配请求号，可在一条连接上流水线发送"""
 
-    try:
-        # 2. 连接到服务器
-        client_socket.connect((SERVER_HOST, SERVER_PORT))
-        print(f"[连接] 已连接到服务器 {SERVER_HOST}:{SERVER_PORT}")
-
-        # 3. 交互式发送消息
-        while True:
-            msg = input("请输入要发送的内容（输入 exit/quit 退出）：").strip()
-            if msg.lower() in ("exit", "quit"):
-                print("[信息] 退出客户端")
-                break
+    def __init__(self, sock: socket.socket, max_frame: int = MAX_FRAME):
+        self.sock = sock
+        self.decoder = FrameDecoder(max_frame)
+        self._next_id = 0
+
+    def _alloc_id(self) -> int:
+        req_id = self._next_id
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        return req_id
+
+    def request(self, payload: bytes) -> bytes:
+        """发送一条请求并等待对应回复"""
+        return self.request_many([payload], window=1)[0]
+
+    def request_many(self, payloads, window: int = 32):
+        """
+        流水线发送多条请求，最多保持 window 个请求在途
+        返回与 payloads 顺序一致的回复列表（按请求号匹配，不依赖到达顺序）
+        发送与接收交替进行：大帧时若先把整个窗口 sendall 出去再读回复，
+        双方的套接字缓冲区都会被填满，彼此阻塞在发送上
+        """
+        replies = [None] * len(payloads)
+        in_flight = {}  # 请求号 -> payloads 下标
+        next_idx = 0
+        done = 0
+        outbuf = bytearray()  # 已编码、尚未发出的帧
+        out_pos = 0
+        timeout = self.sock.gettimeout()
+        sel = selectors.DefaultSelector()
+        self.sock.setblocking(False)
+        sel.register(self.sock, selectors.EVENT_READ)
+        try:
+            while done < len(payloads):
+                # 1. 补满发送窗口，并尽量发出积压的数据（多个帧合并为一次系统调用）
+                while next_idx < len(payloads) and len(in_flight) < window:
+                    req_id = self._alloc_id()
+                    in_flight[req_id] = next_idx
+                    outbuf += encode_frame(req_id, payloads[next_idx])
+                    next_idx += 1
+                if out_pos < len(outbuf):
+                    try:
+                        out_pos += self.sock.send(memoryview(outbuf)[out_pos:])
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    if out_pos == len(outbuf):
+                        outbuf.clear()
+                        out_pos = 0
+                    elif out_pos > len(outbuf) // 2:
+                        del outbuf[:out_pos]
+                        out_pos = 0
+
+                # 2. 等待可读（还有积压时同时等待可写），读到的回复按请求号归位
+                sel.modify(self.sock, selectors.EVENT_READ | (selectors.EVENT_WRITE if outbuf else 0))
+                events = sel.select(timeout)
+                if not events:
+                    raise socket.timeout("等待服务器回复超时")
+                if not events[0][1] & selectors.EVENT_READ:
+                    continue
+                try:
+                    n = self.decoder.recv_from(self.sock)
+                except (BlockingIOError, InterruptedError):
+                    continue
+                if not n:
+                    raise ConnectionError("服务器已关闭连接")
+                for req_id, payload in self.decoder.frames():
+                    idx = in_flight.pop(req_id, None)
+                    if idx is None:
+                        print(f"[警告] 收到未知请求号 #{req_id} 的回复，已忽略")
+                        continue
+                    replies[idx] = bytes(payload)
+                    done += 1
+        finally:
+            sel.close()
+            self.sock.settimeout(timeout)
+        return replies
+
+
+def run_interactive(client_socket: socket.socket, framed: bool):
+    """交互式发送消息"""
+    framed_client = FramedClient(client_socket) if framed else None
+    while True:
+        msg = input("请输入要发送的内容（输入 exit/quit 退出）：").strip()
+        if msg.lower() in ("exit", "quit"):
+            print("[信息] 退出客户端")
+            break
 
-            if not msg:
-                print("[提示] 不能发送空消息")
-                continue
+        if not msg:
+            print("[提示] 不能发送空消息")
+            continue
 
+        if framed_client:
+            data = framed_client.request(msg.encode("utf-8"))
+        else:
             # 发送数据
             client_socket.sendall(msg.encode("utf-8"))
 
@@ -44,7 +133,49 @@ def main():
                 print("[信息] 服务器已关闭连接")
                 break
 
-            print(f"[服务器回复] {data.decode('utf-8', errors='ignore')}")
+        print(f"[服务器回复] {data.decode('utf-8', errors='ignore')}")
+
+
+def run_pipeline(client_socket: socket.socket, window: int, count: int, size: int):
+    """非交互流水线测试：发送 count 条 size 字节的消息并统计吞吐"""
+    client = FramedClient(client_socket)
+    payloads = [(f"{i}:".encode("utf-8") + b"x" * size)[:max(size, 1)] for i in range(count)]
+    start = time.perf_counter()
+    replies = client.request_many(payloads, window=window)
+    elapsed = time.perf_counter() - start
+    expected = "服务器已收到：".encode("utf-8")
+    bad = sum(1 for p, r in zip(payloads, replies) if r != expected + p)
+    print(f"[流水线] 窗口 {window}，{count} 条 × {size} 字节，用时 {elapsed:.3f}s，"
+          f"{count / elapsed:.0f} 条/秒，不匹配回复 {bad} 条")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="TCP 客户端")
+    parser.add_argument("--host", default=SERVER_HOST, help="服务器地址")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="服务器端口")
+    parser.add_argument("--framed", action="store_true", help="使用长度前缀分帧协议")
+    parser.add_argument("--pipeline", type=int, default=0, metavar="N",
+                        help="分帧模式下的流水线测试：同时在途的请求数（0 表示交互模式）")
+    parser.add_argument("--count", type=int, default=1000, help="流水线测试的消息条数")
+    parser.add_argument("--size", type=int, default=64, help="流水线测试的消息字节数")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # 1. 创建 TCP 套接字
+    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+    try:
+        # 2. 连接到服务器
+        client_socket.connect((args.host, args.port))
+        print(f"[连接] 已连接到服务器 {args.host}:{args.port}")
+
+        # 3. 发送消息
+        if args.pipeline > 0:
+            run_pipeline(client_socket, args.pipeline, args.count, args.size)
+        else:
+            run_interactive(client_socket, args.framed)
 
     except ConnectionRefusedError:
         print("[错误] 无法连接到服务器，请确认服务器已启动且地址/端口正确")
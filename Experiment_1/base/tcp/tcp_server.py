@@ -2,19 +2,39 @@
 # -*- coding: utf-8 -*-
 
 """
-TCP 服务器（多线程版）
+TCP 服务器（多线程 / 事件循环版）
 1. 在本机指定端口上监听 TCP 连接
 2. 接收客户端发送的一条或多条消息
 3. 打印客户端地址和消息内容
 4. 把收到的消息回显给客户端（简单回声服务器）
-5. 支持多个客户端并发（用线程处理）
+5. 支持多个客户端并发，两种模式可选：
+   - threaded：每个连接一个线程（默认）
+   - selectors：单线程非阻塞事件循环，适合上万个空闲长连接
+
+6. 可选长度前缀分帧（--framing length，协议见 framing.py），支持客户端流水线发送
+
+用法示例：
+    python tcp_server.py                              # 多线程模式
+    python tcp_server.py --mode selectors --backlog 4096
+    python tcp_server.py --framing length             # 分帧协议
 """
 
+import argparse
+import selectors
 import socket
 import threading
 
+from framing import FrameDecoder, FrameError, MAX_FRAME, encode_frame, send_frame
+
 HOST = "0.0.0.0"  # 监听所有网卡
 PORT = 50000       # 服务器端口，可自行修改
+BACKLOG = 128      # 默认等待队列长度（实际上限受系统 somaxconn 限制）
+RECV_SIZE = 1024   # 单次读取字节数，与多线程模式保持一致
+
+
+def build_reply(text: str) -> bytes:
+    """根据收到的文本构造回显内容（两种模式共用）"""
+    return f"服务器已收到：{text}".encode("utf-8")
 
 
 def handle_client(conn: socket.socket, addr):
@@ -33,15 +53,44 @@ def handle_client(conn: socket.socket, addr):
             print(f"[收到] 来自 {addr} 的消息：{text}")
 
             # 进阶示例：在回显前加上服务器前缀
-            reply = f"服务器已收到：{text}"
-            conn.sendall(reply.encode("utf-8"))
-    except ConnectionResetError:
-        print(f"[异常] 客户端 {addr} 异常断开连接")
+            conn.sendall(build_reply(text))
+    except OSError as e:
+        print(f"[异常] 客户端 {addr} 异常断开连接：{e}")
     finally:
         conn.close()
 
 
-def main():
+def handle_client_framed(conn: socket.socket, addr, max_frame: int = MAX_FRAME):
+    """分帧模式下处理单个客户端：按帧读取，回复带回原请求号"""
+    print(f"[连接建立] 客户端 {addr} 已连接（分帧模式）")
+    decoder = FrameDecoder(max_frame)
+    try:
+        while decoder.recv_from(conn):
+            for req_id, payload in decoder.frames():
+                text = str(payload, "utf-8", errors="ignore")
+                print(f"[收到] 来自 {addr} 的消息 #{req_id}：{text}")
+                send_frame(conn, req_id, build_reply(text))
+        print(f"[连接关闭] 客户端 {addr} 已断开")
+    except FrameError as e:
+        print(f"[异常] 客户端 {addr} 协议错误：{e}")
+    except OSError as e:
+        print(f"[异常] 客户端 {addr} 异常断开连接：{e}")
+    finally:
+        conn.close()
+
+
+class _Connection:
+    """事件循环模式下单个连接的状态，使用 __slots__ 压缩每连接内存"""
+    __slots__ = ("sock", "addr", "outbuf", "decoder")
+
+    def __init__(self, sock: socket.socket, addr):
+        self.sock = sock
+        self.addr = addr
+        self.outbuf = None   # 待发送数据（bytearray），空闲连接不占用缓冲区
+        self.decoder = None  # 分帧模式下的解码器，只在存在半帧时保留
+
+
+def create_listen_socket(host: str, port: int, backlog: int) -> socket.socket:
     # 1. 创建 TCP 套接字（AF_INET：IPv4，SOCK_STREAM：TCP）
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
@@ -49,20 +98,199 @@ def main():
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
     # 3. 绑定 IP 和端口
-    server_socket.bind((HOST, PORT))
+    server_socket.bind((host, port))
+
+    # 4. 开始监听，并设置等待队列长度（突发连接时避免 SYN 被丢弃）
+    server_socket.listen(backlog)
+    return server_socket
 
-    # 4. 开始监听，并设置等待队列长度
-    server_socket.listen(5)
-    print(f"[启动] TCP 服务器启动成功，监听 {HOST}:{PORT}")
+
+def serve_threaded(server_socket: socket.socket, framed: bool = False, max_frame: int = MAX_FRAME):
+    """多线程模式：每个新连接创建一个线程"""
+    print(f"[启动] TCP 服务器启动成功（threaded），监听 {server_socket.getsockname()}")
+    target = handle_client_framed if framed else handle_client
+    extra = (max_frame,) if framed else ()
 
     # 5. 主循环：接受新的客户端连接
     while True:
         conn, addr = server_socket.accept()
         # 为每一个新连接创建一个线程进行处理
-        t = threading.Thread(target=handle_client, args=(conn, addr), daemon=True)
+        t = threading.Thread(target=target, args=(conn, addr) + extra, daemon=True)
         t.start()
         print(f"[线程] 为客户端 {addr} 启动处理线程 {t.name}")
 
 
+def _close_connection(sel: selectors.BaseSelector, state: _Connection):
+    try:
+        sel.unregister(state.sock)
+    except (KeyError, ValueError):
+        pass
+    state.sock.close()
+    state.outbuf = None
+    state.decoder = None
+
+
+def _on_readable(sel: selectors.BaseSelector, state: _Connection, recv_buf: bytearray, recv_view: memoryview):
+    """读取数据并生成回显；所有连接共用同一块接收缓冲区"""
+    try:
+        n = state.sock.recv_into(recv_buf)
+    except (BlockingIOError, InterruptedError):
+        return
+    except OSError as e:
+        # 除对端复位外，ETIMEDOUT、EHOSTUNREACH 等错误也只影响这一个连接
+        print(f"[异常] 客户端 {state.addr} 异常断开连接：{e}")
+        _close_connection(sel, state)
+        return
+
+    if n == 0:
+        print(f"[连接关闭] 客户端 {state.addr} 已断开")
+        _close_connection(sel, state)
+        return
+
+    text = bytes(recv_view[:n]).decode("utf-8", errors="ignore")
+    print(f"[收到] 来自 {state.addr} 的消息：{text}")
+    _queue_send(sel, state, build_reply(text))
+
+
+def _on_readable_framed(sel: selectors.BaseSelector, state: _Connection, max_frame: int):
+    """分帧模式：读取到连接自己的解码器中，凑齐完整帧后逐帧回显"""
+    if state.decoder is None:
+        state.decoder = FrameDecoder(max_frame, initial_size=RECV_SIZE)
+    try:
+        n = state.decoder.recv_from(state.sock, min_read=RECV_SIZE)
+    except (BlockingIOError, InterruptedError):
+        return
+    except OSError as e:
+        # 除对端复位外，ETIMEDOUT、EHOSTUNREACH 等错误也只影响这一个连接
+        print(f"[异常] 客户端 {state.addr} 异常断开连接：{e}")
+        _close_connection(sel, state)
+        return
+    except FrameError as e:
+        print(f"[异常] 客户端 {state.addr} 协议错误：{e}")
+        _close_connection(sel, state)
+        return
+
+    if n == 0:
+        print(f"[连接关闭] 客户端 {state.addr} 已断开")
+        _close_connection(sel, state)
+        return
+
+    replies = []
+    try:
+        for req_id, payload in state.decoder.frames():
+            text = str(payload, "utf-8", errors="ignore")
+            print(f"[收到] 来自 {state.addr} 的消息 #{req_id}：{text}")
+            replies.append(encode_frame(req_id, build_reply(text)))
+    except FrameError as e:
+        print(f"[异常] 客户端 {state.addr} 协议错误：{e}")
+        _close_connection(sel, state)
+        return
+    if state.decoder.buffered == 0:
+        # 没有残留半帧：释放解码缓冲区，让空闲连接保持轻量
+        state.decoder = None
+    if replies:
+        _queue_send(sel, state, b"".join(replies))
+
+
+def _queue_send(sel: selectors.BaseSelector, state: _Connection, reply: bytes):
+    """尽量立即发送；发不完的部分进入连接的发送缓冲区，等待可写事件"""
+    if state.outbuf:
+        # 之前还有未发完的数据，按顺序排队
+        state.outbuf += reply
+        return
+    try:
+        sent = state.sock.send(reply)
+    except (BlockingIOError, InterruptedError):
+        sent = 0
+    except OSError as e:
+        print(f"[异常] 客户端 {state.addr} 异常断开连接：{e}")
+        _close_connection(sel, state)
+        return
+    if sent < len(reply):
+        # 发送缓冲区已满：保存剩余数据，并同时关注可写事件
+        state.outbuf = bytearray(reply[sent:])
+        sel.modify(state.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, state)
+
+
+def _on_writable(sel: selectors.BaseSelector, state: _Connection):
+    try:
+        sent = state.sock.send(state.outbuf)
+    except (BlockingIOError, InterruptedError):
+        return
+    except OSError as e:
+        print(f"[异常] 客户端 {state.addr} 异常断开连接：{e}")
+        _close_connection(sel, state)
+        return
+    del state.outbuf[:sent]
+    if not state.outbuf:
+        state.outbuf = None
+        sel.modify(state.sock, selectors.EVENT_READ, state)
+
+
+def serve_selectors(server_socket: socket.socket, framed: bool = False, max_frame: int = MAX_FRAME):
+    """单线程事件循环模式：基于 selectors（Linux 下为 epoll）"""
+    server_socket.setblocking(False)
+    sel = selectors.DefaultSelector()
+    sel.register(server_socket, selectors.EVENT_READ, None)
+    recv_buf = bytearray(RECV_SIZE)
+    recv_view = memoryview(recv_buf)
+    print(f"[启动] TCP 服务器启动成功（selectors/{type(sel).__name__}），监听 {server_socket.getsockname()}")
+
+    while True:
+        for key, mask in sel.select():
+            if key.data is None:
+                # 监听套接字可读：一次性接受所有排队的新连接
+                while True:
+                    try:
+                        conn, addr = server_socket.accept()
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError as e:
+                        # 例如文件描述符耗尽（EMFILE），先处理已有连接
+                        print(f"[异常] accept 失败：{e}")
+                        break
+                    conn.setblocking(False)
+                    print(f"[连接建立] 客户端 {addr} 已连接")
+                    sel.register(conn, selectors.EVENT_READ, _Connection(conn, addr))
+                continue
+
+            state = key.data
+            if mask & selectors.EVENT_READ:
+                if framed:
+                    _on_readable_framed(sel, state, max_frame)
+                else:
+                    _on_readable(sel, state, recv_buf, recv_view)
+            if mask & selectors.EVENT_WRITE and state.outbuf is not None:
+                _on_writable(sel, state)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="TCP 回显服务器")
+    parser.add_argument("--host", default=HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=PORT, help="监听端口")
+    parser.add_argument("--mode", choices=("threaded", "selectors"), default="threaded",
+                        help="threaded：每连接一个线程；selectors：单线程事件循环")
+    parser.add_argument("--backlog", type=int, default=BACKLOG, help="listen() 等待队列长度")
+    parser.add_argument("--framing", choices=("raw", "length"), default="raw",
+                        help="raw：每次 recv 视为一条消息（兼容旧客户端）；length：长度前缀分帧")
+    parser.add_argument("--max-frame", type=int, default=MAX_FRAME, help="分帧模式下单帧最大字节数")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    server_socket = create_listen_socket(args.host, args.port, args.backlog)
+    try:
+        framed = args.framing == "length"
+        if args.mode == "selectors":
+            serve_selectors(server_socket, framed, args.max_frame)
+        else:
+            serve_threaded(server_socket, framed, args.max_frame)
+    except KeyboardInterrupt:
+        print("[信息] 服务器已停止")
+    finally:
+        server_socket.close()
+
+
 if __name__ == "__main__":
     main()
@@ -7,25 +7,51 @@ UDP 服务器
 2. 通过 recvfrom() 接收客户端数据
 3. 打印客户端地址和接收到的消息
 4. 把消息处理后（转大写）再通过 sendto() 发回客户端
+5. 进阶：多进程工作池模式（--workers N）
+   - N 个进程各自创建套接字，通过 SO_REUSEPORT 绑定同一端口，由内核分发数据报
+   - 每个进程用 recvfrom_into() 把数据报批量读入预分配缓冲区（复用 memoryview）
+   - 逐包打印改为可选的采样日志，每个进程定期报告 包/秒
+
+用法示例：
+    python udp_server.py                                   # 单进程，逐包打印
+    python udp_server.py --workers 4 --batch 64            # 4 个工作进程
+    python udp_server.py --workers 4 --log-sample 1000     # 每 1000 个包打印一条
 """
 
+import argparse
+import multiprocessing
+import os
+import select
 import socket
+import time
 
 HOST = "0.0.0.0"  # 接收所有网卡上的数据
 PORT = 50000       # UDP 端口，可与 TCP 共用，也可分开
 
+BATCH_SIZE = 64         # 每批最多连续读取的数据报数
+BUFFER_SIZE = 2048      # 每个数据报的预分配缓冲区大小
+REPORT_INTERVAL = 1.0   # 包速率报告间隔（秒）
+REPLY_PREFIX = "UDP 回显（大写）："
+REPLY_PREFIX_BYTES = REPLY_PREFIX.encode("utf-8")
 
-def main():
-    # 1. 创建 UDP 套接字（SOCK_DGRAM）
-    udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
-    # 2. 绑定 IP 和端口
-    udp_socket.bind((HOST, PORT))
-    print(f"[启动] UDP 服务器启动成功，监听 {HOST}:{PORT}")
+def build_reply(payload) -> bytes:
+    """构造回显内容；纯 ASCII 负载直接在字节上转大写，省去解码/编码"""
+    data = bytes(payload)
+    if data.isascii():
+        return REPLY_PREFIX_BYTES + data.upper()
+    text = data.decode("utf-8", errors="ignore")
+    return (REPLY_PREFIX + text.upper()).encode("utf-8")
+
+
+def serve_single(udp_socket: socket.socket):
+    """单进程模式：逐包收发并打印（原始行为）"""
+    host, port = udp_socket.getsockname()
+    print(f"[启动] UDP 服务器启动成功，监听 {host}:{port}")
 
     # 3. 循环接收来自客户端的数据
     while True:
-        data, addr = udp_socket.recvfrom(1024)  # data: bytes, addr: (ip, port)
+        data, addr = udp_socket.recvfrom(BUFFER_SIZE)  # data: bytes, addr: (ip, port)；与工作池模式同样按 BUFFER_SIZE 接收
         text = data.decode("utf-8", errors="ignore")
         print(f"[收到] 来自 {addr} 的消息：{text}")
 
@@ -34,5 +60,141 @@ def main():
         udp_socket.sendto(reply.encode("utf-8"), addr)
 
 
+def create_reuseport_socket(host: str, port: int, rcvbuf: int = 0) -> socket.socket:
+    """创建开启 SO_REUSEPORT 的 UDP 套接字，多个进程可以绑定同一端口"""
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise OSError("当前平台不支持 SO_REUSEPORT，无法使用多进程模式")
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    if rcvbuf:
+        # 调大接收缓冲区，突发流量时减少内核丢包
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    sock.bind((host, port))
+    sock.setblocking(False)
+    return sock
+
+
+def worker_loop(worker_id: int, host: str, port: int, batch_size: int, log_sample: int,
+                report_interval: float, rcvbuf: int):
+    """工作进程：批量收包、回显，并定期报告包速率"""
+    sock = create_reuseport_socket(host, port, rcvbuf)
+    pid = os.getpid()
+
+    # 预分配一整块缓冲区，按槽位切成 batch_size 个 memoryview，循环复用
+    arena = bytearray(batch_size * BUFFER_SIZE)
+    arena_view = memoryview(arena)
+    slots = [arena_view[i * BUFFER_SIZE:(i + 1) * BUFFER_SIZE] for i in range(batch_size)]
+    lengths = [0] * batch_size
+    addrs = [None] * batch_size
+
+    total = 0
+    window_packets = 0
+    window_start = time.monotonic()
+    print(f"[工作进程 {worker_id}] pid={pid} 已绑定 {host}:{port}（批大小 {batch_size}）", flush=True)
+
+    try:
+        while True:
+            # 1. 等待可读（带超时，保证即使空闲也能按时报告）
+            readable, _, _ = select.select([sock], [], [], report_interval)
+
+            # 2. 批量读取：一次唤醒尽量把套接字里排队的数据报读完
+            count = 0
+            if readable:
+                while count < batch_size:
+                    try:
+                        lengths[count], addrs[count] = sock.recvfrom_into(slots[count])
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    count += 1
+
+            # 3. 逐个处理并回复
+            for i in range(count):
+                payload = slots[i][:lengths[i]]
+                try:
+                    sock.sendto(build_reply(payload), addrs[i])
+                except (BlockingIOError, InterruptedError):
+                    pass  # 发送缓冲区满时丢弃回复（UDP 语义允许丢包）
+                total += 1
+                if log_sample and total % log_sample == 0:
+                    text = bytes(payload).decode("utf-8", errors="ignore")
+                    print(f"[采样][工作进程 {worker_id}] 来自 {addrs[i]} 的消息：{text}", flush=True)
+            window_packets += count
+
+            # 4. 定期报告包速率
+            now = time.monotonic()
+            if now - window_start >= report_interval:
+                pps = window_packets / (now - window_start)
+                print(f"[统计][工作进程 {worker_id}] {pps:.0f} 包/秒，累计 {total} 包", flush=True)
+                window_packets = 0
+                window_start = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+
+def serve_workers(host: str, port: int, workers: int, batch_size: int, log_sample: int,
+                  report_interval: float, rcvbuf: int):
+    """多进程模式：启动 N 个工作进程并等待其退出"""
+    # 先在父进程里试绑定一次，尽早暴露端口占用或平台不支持等问题
+    create_reuseport_socket(host, port).close()
+
+    procs = []
+    for i in range(workers):
+        p = multiprocessing.Process(
+            target=worker_loop,
+            args=(i, host, port, batch_size, log_sample, report_interval, rcvbuf),
+            daemon=True,
+        )
+        p.start()
+        procs.append(p)
+    print(f"[启动] UDP 服务器启动成功（{workers} 个工作进程，SO_REUSEPORT），监听 {host}:{port}", flush=True)
+
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        print("[信息] 正在停止工作进程...")
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="UDP 回显服务器")
+    parser.add_argument("--host", default=HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=PORT, help="监听端口")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="工作进程数（0 表示单进程逐包模式）")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="每批最多读取的数据报数")
+    parser.add_argument("--log-sample", type=int, default=0, metavar="K",
+                        help="每 K 个包打印一条采样日志（0 表示不打印）")
+    parser.add_argument("--report-interval", type=float, default=REPORT_INTERVAL,
+                        help="包速率报告间隔（秒）")
+    parser.add_argument("--rcvbuf", type=int, default=0, help="SO_RCVBUF 字节数（0 表示系统默认）")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.workers > 0:
+        serve_workers(args.host, args.port, args.workers, args.batch, args.log_sample,
+                      args.report_interval, args.rcvbuf)
+        return
+
+    # 1. 创建 UDP 套接字（SOCK_DGRAM）
+    udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    # 2. 绑定 IP 和端口
+    udp_socket.bind((args.host, args.port))
+    try:
+        serve_single(udp_socket)
+    except KeyboardInterrupt:
+        print("[信息] 服务器已停止")
+    finally:
+        udp_socket.close()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# 文件路径: Experiment_2/bench/bench_async.py
+"""
+asyncio 规模基准：单个客户端进程同时保持数千个安全会话，并在每个会话上流水线发送消息
+
+在临时目录中启动 CA 中心与安全服务器（--server async 为 async_tcp_server.py，threaded 为 tcp_server.py，
+两者线路兼容，可直接对比），客户端凭据由 AsyncSecureTcpClient 通过异步 CA 客户端申请。
+依次测量：
+- 建立会话：--sessions 个连接完成握手（同一用户的后续会话可能走会话恢复），握手/秒与延迟
+- 流水线收发：每个会话发送 --messages 条消息，每次最多 --depth 条在途，消息/秒与单条延迟
+- 服务器 CPU（含 RSA 工作进程）与常驻内存
+会话数较大时注意文件描述符上限（ulimit -n），客户端与服务器各占一个描述符。
+
+用法（在 Experiment_2 目录下）：
+    python bench/bench_async.py
+    python bench/bench_async.py --sessions 5000 --messages 50 --depth 8
+    python bench/bench_async.py --server threaded --sessions 1000
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_DIR, "tcp"))
+sys.path.append(os.path.join(BASE_DIR, "udp"))
+import udp_client
+from async_tcp_client import AsyncSecureTcpClient, load_credentials
+from harness import free_ports, percentile, process_tree_cpu, start_ca, start_server, stop
+
+SERVER_SCRIPTS = {"async": "async_tcp_server.py", "threaded": "tcp_server.py"}
+
+
+def rss_mb(pid: int):
+    """进程常驻内存（MB），依赖 Linux /proc"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def summarize(latencies, elapsed):
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "ok": n,
+        "per_sec": n / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / n * 1e3 if n else None,
+        "p50_ms": percentile(latencies, 50) * 1e3 if n else None,
+        "p99_ms": percentile(latencies, 99) * 1e3 if n else None,
+    }
+
+
+async def open_sessions(args, port):
+    users = [f"async_{i}" for i in range(args.users)]
+    # 先并发准备各用户的密钥与证书（异步 CA 客户端），避免计入握手延迟
+    await asyncio.gather(*(load_credentials(u) for u in users))
+
+    gate = asyncio.Semaphore(args.connect_concurrency)
+    latencies, failures = [], 0
+
+    async def connect(i):
+        nonlocal failures
+        client = AsyncSecureTcpClient(users[i % len(users)], server_port=port, resume=not args.no_resume)
+        async with gate:
+            t0 = time.perf_counter()
+            try:
+                ok = await client.connect()
+            except (OSError, ValueError):
+                ok = False
+        if ok:
+            latencies.append(time.perf_counter() - t0)
+            return client
+        failures += 1
+        return None
+
+    start = time.perf_counter()
+    clients = await asyncio.gather(*(connect(i) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    clients = [c for c in clients if c is not None]
+    result = summarize(latencies, elapsed)
+    result.update(failures=failures, resumed=sum(c.last_resumed for c in clients), elapsed_s=elapsed)
+    return clients, result
+
+
+async def pipeline(clients, args):
+    latencies, failures = [], 0
+
+    async def one(client, i):
+        nonlocal failures
+        t0 = time.perf_counter()
+        try:
+            reply = await client.send(f"msg {i}")
+        except (OSError, ValueError):
+            failures += 1
+            return
+        if reply.endswith(f"msg {i}"):
+            latencies.append(time.perf_counter() - t0)
+        else:
+            failures += 1
+
+    async def session(client):
+        for base in range(0, args.messages, args.depth):
+            await asyncio.gather(*(one(client, i) for i in range(base, min(base + args.depth, args.messages))))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(c) for c in clients))
+    elapsed = time.perf_counter() - start
+    result = summarize(latencies, elapsed)
+    result.update(failures=failures, elapsed_s=elapsed)
+    return result
+
+
+async def run(args, port, server_pid):
+    cpu0 = process_tree_cpu(server_pid)
+    clients, handshakes = await open_sessions(args, port)
+    cpu1 = process_tree_cpu(server_pid)
+    rss = rss_mb(server_pid)
+    messages = await pipeline(clients, args)
+    cpu2 = process_tree_cpu(server_pid)
+    await asyncio.gather(*(c.close() for c in clients))
+    if None not in (cpu0, cpu1, cpu2):
+        handshakes["server_cpu_ms_each"] = (cpu1 - cpu0) / max(handshakes["ok"], 1) * 1e3
+        messages["server_cpu_ms_each"] = (cpu2 - cpu1) / max(messages["ok"], 1) * 1e3
+    return handshakes, messages, rss
+
+
+def fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asyncio 客户端驱动数千个并发安全会话的基准")
+    parser.add_argument("--server", choices=sorted(SERVER_SCRIPTS), default="async", help="被测服务器实现")
+    parser.add_argument("--sessions", type=int, default=2000, help="同时保持的会话数")
+    parser.add_argument("--users", type=int, default=4, help="会话分摊到的用户（证书）数")
+    parser.add_argument("--messages", type=int, default=20, help="每个会话发送的消息数")
+    parser.add_argument("--depth", type=int, default=4, help="每个会话的流水线深度（同时在途的消息数）")
+    parser.add_argument("--connect-concurrency", type=int, default=256, help="同时进行中的握手数上限")
+    parser.add_argument("--no-resume", action="store_true", help="每个会话都做完整 RSA 握手")
+    parser.add_argument("--server-arg", dest="server_args", action="append", default=[],
+                        help="传给服务器脚本的额外参数，可重复")
+    args = parser.parse_args()
+
+    server_args = list(args.server_args)
+    if args.server == "async":
+        server_args.append("--quiet")
+    else:
+        # 阻塞服务器每个会话占用一个线程，需按会话数放开线程数与连接上限
+        server_args += ["--conn-workers", str(args.sessions), "--max-connections", str(args.sessions)]
+
+    tmp = tempfile.mkdtemp(prefix="bench_async_")
+    old_cwd = os.getcwd()
+    ca = server = None
+    try:
+        ca_port, port = free_ports(2)
+        ca = start_ca(ca_port, ca_port, tmp)
+        server = start_server(port, tmp, ca_key=os.path.join(tmp, "ca_keys", "ca_public_key.pem"),
+                              extra_args=server_args, script=SERVER_SCRIPTS[args.server])
+        os.chdir(tmp)
+        udp_client.CA_PORT = udp_client.CA_TCP_PORT = ca_port
+        # 被拒绝等情况下客户端的提示会刷屏，测量期间丢弃客户端输出
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            handshakes, messages, rss = asyncio.run(run(args, port, server.pid))
+    finally:
+        os.chdir(old_cwd)
+        for proc in (server, ca):
+            if proc is not None:
+                stop(proc)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"服务器: {SERVER_SCRIPTS[args.server]}，会话 {args.sessions}，每会话 {args.messages} 条消息，"
+          f"流水线深度 {args.depth}")
+    print(f"{'阶段':<10}{'成功':>8}{'失败':>6}{'每秒':>10}{'均值 ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'服务器CPU ms':>14}")
+    for label, r in (("建立会话", handshakes), ("流水线收发", messages)):
+        print(f"{label:<10}{r['ok']:>8}{r['failures']:>6}{r['per_sec']:>10.1f}{fmt(r['mean_ms']):>10}"
+              f"{fmt(r['p50_ms']):>10}{fmt(r['p99_ms']):>10}{fmt(r.get('server_cpu_ms_each'), '.3f'):>14}")
+    print(f"其中会话恢复 {handshakes['resumed']} 个；全部会话在线时服务器主进程常驻内存 {fmt(rss, '.1f')} MB")
+
+
+if __name__ == "__main__":
+    main()
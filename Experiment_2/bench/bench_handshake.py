@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# 文件路径: Experiment_2/bench/bench_handshake.py
+"""
+握手基准：比较完整握手（证书验证 + RSA）与会话恢复（仅 HMAC + 对称加密）的每秒握手数
+
+在随机空闲端口上启动 tcp/tcp_server.py 子进程，然后用同一用户反复执行
+connect_and_send（握手 + 一条消息往返），分别统计两种模式的 握手/秒 与延迟。
+需要客户端已有证书（例如先运行一次 test.py，或使用仓库自带的 Alice）。
+
+用法（在 Experiment_2 目录下）：
+    python bench/bench_handshake.py
+    python bench/bench_handshake.py --count 500 --user Alice
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_DIR, "tcp"))
+from harness import free_port, percentile, start_server, stop
+from tcp_client import SecureTcpClient, SESSION_CACHE
+
+
+def run_mode(client: SecureTcpClient, count: int, expect_resumed: bool):
+    """连续执行 count 次握手，返回 (握手/秒, 各次耗时列表[秒], 失败次数)"""
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    # 客户端与服务器的逐步打印会严重干扰计时，测量期间丢弃客户端输出
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(count):
+            t0 = time.perf_counter()
+            reply = client.connect_and_send(f"ping {i}")
+            latencies.append(time.perf_counter() - t0)
+            if reply is None or client.last_resumed != expect_resumed:
+                failures += 1
+    elapsed = time.perf_counter() - start
+    return count / elapsed, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="完整握手 vs 会话恢复 基准")
+    parser.add_argument("--count", type=int, default=200, help="每种模式的握手次数")
+    parser.add_argument("--user", default="Alice", help="用于握手的用户（需已持有证书）")
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR)
+    port = free_port()
+    server = start_server(port, BASE_DIR)
+    try:
+        full_client = SecureTcpClient(args.user, server_host="127.0.0.1", server_port=port, resume=False)
+        resume_client = SecureTcpClient(args.user, server_host="127.0.0.1", server_port=port, resume=True)
+
+        results = []
+        results.append(("完整握手", *run_mode(full_client, args.count, expect_resumed=False)))
+        SESSION_CACHE.clear()
+        # 先做一次完整握手拿到会话 ID，之后的连接都走恢复路径
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            resume_client.connect_and_send("warm up")
+        results.append(("会话恢复", *run_mode(resume_client, args.count, expect_resumed=True)))
+    finally:
+        stop(server)
+
+    print(f"{'模式':<10}{'握手/秒':>12}{'平均 ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'失败':>6}")
+    for name, rate, latencies, failures in results:
+        lat = sorted(latencies)
+        mean = sum(lat) / len(lat)
+        print(f"{name:<10}{rate:>12.1f}{mean * 1e3:>10.2f}{percentile(lat, 50) * 1e3:>10.2f}"
+              f"{percentile(lat, 99) * 1e3:>10.2f}{failures:>6}")
+    if len(results) == 2 and results[0][1]:
+        print(f"会话恢复加速比: {results[1][1] / results[0][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# 文件路径: Experiment_2/bench/bench_keygen.py
+"""
+身份启动基准：为 N 个新身份准备 RSA 密钥对文件所需的时间
+- 同步生成：逐个调用 RSA.generate（原有方式）
+- 密钥池（冷启动）：计时包含创建 KeyPairPool，密钥由多个后台进程并行生成
+- 密钥池（预热）：池在空闲时已填满，计时只包含取用和原子落盘
+
+密钥写入临时目录，结束后删除。
+
+用法：
+    python bench/bench_keygen.py
+    python bench/bench_keygen.py --count 32 --workers 4
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.join(BASE_DIR, "udp"))
+import udp_client
+from key_pool import KeyPairPool
+from secure_comm_lib import SecureCommLib
+
+
+def spin_up(lib, count, prefix, key_pool=None) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        udp_client.ensure_keypair(lib, f"{prefix}{i}", key_pool)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="新身份密钥准备耗时：同步生成 vs 密钥池")
+    parser.add_argument("--count", type=int, default=16, help="新身份数量 N")
+    parser.add_argument("--workers", type=int, default=0, help="密钥池后台进程数（0 表示 CPU 核数）")
+    parser.add_argument("--key-size", type=int, default=2048, help="RSA 密钥长度")
+    args = parser.parse_args()
+
+    lib = SecureCommLib()
+    tmp = tempfile.mkdtemp(prefix="keygen_bench_")
+    udp_client.KEYS_DIR = tmp
+    results = []
+    try:
+        results.append(("同步生成", spin_up(lib, args.count, "sync_")))
+
+        start = time.perf_counter()
+        with KeyPairPool(size=args.count, key_size=args.key_size, workers=args.workers or None) as pool:
+            spin_up(lib, args.count, "cold_", pool)
+            results.append(("密钥池（冷启动）", time.perf_counter() - start))
+
+        with KeyPairPool(size=args.count, key_size=args.key_size, workers=args.workers or None) as pool:
+            pool.wait_ready()
+            results.append(("密钥池（预热）", spin_up(lib, args.count, "warm_", pool)))
+
+        # 抽查：写出的密钥对可以正常解析且公私钥匹配
+        for prefix in ("sync_", "cold_", "warm_"):
+            priv = lib.load_key(os.path.join(tmp, f"{prefix}0_private.pem"))
+            pub = lib.load_key(os.path.join(tmp, f"{prefix}0_public.pem"))
+            assert priv.publickey() == pub
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{'方式':<16}{'总耗时 s':>10}{'每个身份 ms':>14}")
+    for name, elapsed in results:
+        print(f"{name:<16}{elapsed:>10.3f}{elapsed / args.count * 1e3:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
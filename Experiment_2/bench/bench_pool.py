@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# 文件路径: Experiment_2/bench/bench_pool.py
+"""
+连接池基准：发送 N 条小消息，比较逐条建连（connect_and_send）与连接池复用（PooledSecureTcpClient）
+
+在随机空闲端口上启动 tcp/tcp_server.py 子进程，由多个线程并发发送，统计 消息/秒 与单条消息延迟。
+逐条建连模式默认启用会话恢复（每条消息仍需 TCP 建连 + HMAC 握手），加 --no-resume 则每条都做完整 RSA 握手。
+需要客户端已有证书（例如先运行一次 test.py，或使用仓库自带的 Alice）。
+
+用法（在 Experiment_2 目录下）：
+    python bench/bench_pool.py
+    python bench/bench_pool.py --messages 10000 --threads 8 --pool-size 8
+"""
+import argparse
+import contextlib
+import os
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_DIR, "tcp"))
+from harness import free_port, percentile, start_server, stop
+from tcp_client import PooledSecureTcpClient, SecureTcpClient
+
+
+def run_threads(threads: int, messages: int, send):
+    """threads 个线程共发送 messages 条消息；send(线程号, 序号) 返回回显或 None"""
+    latencies = [[] for _ in range(threads)]
+    failures = [0] * threads
+
+    def worker(t):
+        for i in range(t, messages, threads):
+            t0 = time.perf_counter()
+            try:
+                reply = send(t, i)
+            except (OSError, ValueError, RuntimeError):
+                reply = None
+            if reply is None:
+                failures[t] += 1
+            else:
+                latencies[t].append(time.perf_counter() - t0)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    lat = sorted(l for per in latencies for l in per)
+    return len(lat) / elapsed, lat, sum(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="逐条建连 vs 连接池 的小消息吞吐基准")
+    parser.add_argument("--messages", type=int, default=10000, help="每种模式发送的消息数")
+    parser.add_argument("--threads", type=int, default=8, help="并发发送线程数")
+    parser.add_argument("--pool-size", type=int, default=8, help="连接池大小")
+    parser.add_argument("--user", default="Alice", help="发送消息的用户（需已持有证书）")
+    parser.add_argument("--no-resume", action="store_true", help="逐条建连模式不使用会话恢复（每条消息完整握手）")
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR)
+    port = free_port()
+    server = start_server(port, BASE_DIR)
+    results = []
+    try:
+        # 客户端逐步打印会严重干扰计时，测量期间丢弃客户端输出
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            clients = [SecureTcpClient(args.user, server_host="127.0.0.1", server_port=port,
+                                       resume=not args.no_resume) for _ in range(args.threads)]
+            clients[0].connect_and_send("warm up")   # 先拿到可恢复的会话，避免各线程同时完整握手
+            results.append(("逐条建连", *run_threads(
+                args.threads, args.messages, lambda t, i: clients[t].connect_and_send(f"msg {i}"))))
+
+            with PooledSecureTcpClient(args.user, server_host="127.0.0.1", server_port=port,
+                                       max_size=args.pool_size) as pool:
+                results.append(("连接池", *run_threads(
+                    args.threads, args.messages, lambda t, i: pool.send(f"msg {i}"))))
+                pool_stats = pool.stats()
+    finally:
+        stop(server)
+
+    print(f"{'模式':<10}{'消息/秒':>12}{'平均 ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'失败':>6}")
+    for name, rate, lat, failures in results:
+        mean = sum(lat) / len(lat) if lat else 0.0
+        p50 = percentile(lat, 50) if lat else 0.0
+        p99 = percentile(lat, 99) if lat else 0.0
+        print(f"{name:<10}{rate:>12.1f}{mean * 1e3:>10.3f}{p50 * 1e3:>10.3f}{p99 * 1e3:>10.3f}{failures:>6}")
+    print(f"连接池统计: {pool_stats}")
+    if results[0][1]:
+        print(f"连接池加速比: {results[1][1] / results[0][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# 文件路径: Experiment_2/bench/bench_suite.py
+"""
+握手与吞吐基准套件：结果写入 JSON 文件，便于在不同改动之间对比
+
+在临时目录中启动独立的 CA 中心和安全服务器（随机空闲端口，主动探测就绪），
+批量为 N 个新身份申请证书，然后由 N 个并发 SecureTcpClient 依次测量：
+- 完整握手 / 会话恢复：握手/秒，延迟 (均值、p50、p99)，每次握手的服务器与客户端 CPU 毫秒
+- 加密吞吐：每个客户端经安全通道上传一个文件，统计总 MB/s
+临时目录（密钥、证书、登记表、上传文件）在结束后删除，不影响仓库中的 ca_keys/ 等目录。
+
+用法（在 Experiment_2 目录下）：
+    python bench/bench_suite.py
+    python bench/bench_suite.py --clients 32 --rounds 20 --file-mb 16
+    python bench/bench_suite.py --compare bench/results/上一次.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.join(BASE_DIR, "tcp"))
+sys.path.append(os.path.join(BASE_DIR, "udp"))
+import udp_client
+from harness import free_ports, percentile, process_tree_cpu, start_ca, start_server, stop
+from key_pool import KeyPairPool
+from tcp_client import SecureTcpClient, SESSION_CACHE
+
+RESULTS_DIR = os.path.join(BASE_DIR, "bench", "results")
+# --compare 时对比的指标：(结果分组, 指标名, 数值越大越好)
+COMPARE_METRICS = [
+    ("handshake_full", "handshakes_per_sec", True),
+    ("handshake_full", "p99_ms", False),
+    ("handshake_full", "server_cpu_ms_per_handshake", False),
+    ("handshake_resumed", "handshakes_per_sec", True),
+    ("handshake_resumed", "p99_ms", False),
+    ("throughput", "mb_per_sec", True),
+]
+
+
+def run_concurrent(clients, job):
+    """每个客户端一个线程，同时开始执行 job(index, client)，返回墙钟耗时与各线程结果"""
+    results = [None] * len(clients)
+    barrier = threading.Barrier(len(clients) + 1)
+
+    def worker(i, client):
+        barrier.wait()
+        results[i] = job(i, client)
+
+    threads = [threading.Thread(target=worker, args=(i, c)) for i, c in enumerate(clients)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, results
+
+
+def handshake_once(client) -> bool:
+    """建立连接并完成一次握手（不发送数据）"""
+    with socket.create_connection((client.server_host, client.server_port)) as sock:
+        return client._open_session(sock) is not None
+
+
+def measure_handshakes(clients, rounds, server_pid):
+    def job(i, client):
+        latencies, failures = [], 0
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            try:
+                ok = handshake_once(client)
+            except (OSError, ValueError):
+                ok = False   # 连接错误、协议错误或密钥解析失败都记为失败
+            if ok:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                failures += 1
+        return latencies, failures
+
+    server_cpu0, client_cpu0 = process_tree_cpu(server_pid), time.process_time()
+    elapsed, results = run_concurrent(clients, job)
+    server_cpu1, client_cpu1 = process_tree_cpu(server_pid), time.process_time()
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    ok = len(latencies)
+    result = {
+        "handshakes": ok,
+        "failures": sum(f for _, f in results),
+        "elapsed_s": elapsed,
+        "handshakes_per_sec": ok / elapsed,
+        "mean_ms": sum(latencies) / ok * 1e3 if ok else None,
+        "p50_ms": percentile(latencies, 50) * 1e3 if ok else None,
+        "p99_ms": percentile(latencies, 99) * 1e3 if ok else None,
+        "server_cpu_ms_per_handshake": None,
+        # 客户端与驱动线程在同一进程，CPU 中也包含测量本身的开销
+        "client_cpu_ms_per_handshake": (client_cpu1 - client_cpu0) / ok * 1e3 if ok else None,
+    }
+    if ok and server_cpu0 is not None and server_cpu1 is not None:
+        result["server_cpu_ms_per_handshake"] = (server_cpu1 - server_cpu0) / ok * 1e3
+    return result
+
+
+def measure_throughput(clients, path, server_pid):
+    size = os.path.getsize(path)
+
+    def job(i, client):
+        return client.send_file(path) is not None
+
+    server_cpu0 = process_tree_cpu(server_pid)
+    elapsed, results = run_concurrent(clients, job)
+    server_cpu1 = process_tree_cpu(server_pid)
+    ok = sum(results)
+    total_mb = ok * size / 1e6
+    result = {
+        "uploads": ok,
+        "failures": len(results) - ok,
+        "file_mb": size / 1e6,
+        "elapsed_s": elapsed,
+        "mb_per_sec": total_mb / elapsed,
+        "server_cpu_ms_per_mb": None,
+    }
+    if total_mb and server_cpu0 is not None and server_cpu1 is not None:
+        result["server_cpu_ms_per_mb"] = (server_cpu1 - server_cpu0) / total_mb * 1e3
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(args):
+    tmp = tempfile.mkdtemp(prefix="bench_suite_")
+    old_cwd = os.getcwd()
+    ca = server = None
+    results = {}
+    try:
+        ca_port, server_port = free_ports(2)
+        ca = start_ca(ca_port, ca_port, tmp)
+        server = start_server(server_port, tmp, ca_key=os.path.join(tmp, "ca_keys", "ca_public_key.pem"),
+                              extra_args=args.server_args)
+
+        # 客户端的密钥、证书和 CA 公钥都写在临时目录下
+        os.chdir(tmp)
+        udp_client.CA_PORT = udp_client.CA_TCP_PORT = ca_port
+        user_ids = [f"bench_{i}" for i in range(args.clients)]
+        start = time.perf_counter()
+        with KeyPairPool(size=args.clients) as pool, open(os.devnull, "w") as devnull, \
+                contextlib.redirect_stdout(devnull):
+            errors = udp_client.enroll_users(user_ids, key_pool=pool)
+        results["enroll"] = {"identities": len(user_ids) - len(errors), "failures": len(errors),
+                             "elapsed_s": time.perf_counter() - start}
+        if errors:
+            raise RuntimeError(f"证书申请失败: {errors}")
+
+        with open("payload.bin", "wb") as f:
+            f.write(os.urandom(int(args.file_mb * 1e6)))
+
+        # 客户端逐步打印会严重干扰计时，测量期间丢弃客户端输出
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            full = [SecureTcpClient(u, server_port=server_port, resume=False) for u in user_ids]
+            results["handshake_full"] = measure_handshakes(full, args.rounds, server.pid)
+
+            SESSION_CACHE.clear()
+            resumed = [SecureTcpClient(u, server_port=server_port, resume=True) for u in user_ids]
+            for client in resumed:
+                handshake_once(client)   # 先完整握手一次，拿到会话 ID
+            results["handshake_resumed"] = measure_handshakes(resumed, args.rounds, server.pid)
+
+            results["throughput"] = measure_throughput(resumed, "payload.bin", server.pid)
+    finally:
+        os.chdir(old_cwd)
+        for proc in (server, ca):
+            if proc is not None:
+                stop(proc)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": {"clients": args.clients, "rounds": args.rounds, "file_mb": args.file_mb,
+                   "server_args": args.server_args},
+        "results": results,
+    }
+
+
+def fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+
+def print_report(report):
+    r = report["results"]
+    print(f"{'阶段':<10}{'次数':>8}{'失败':>6}{'握手/秒':>10}{'均值 ms':>10}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'服务器CPU ms':>14}{'客户端CPU ms':>14}")
+    for name, label in (("handshake_full", "完整握手"), ("handshake_resumed", "会话恢复")):
+        h = r[name]
+        print(f"{label:<10}{h['handshakes']:>8}{h['failures']:>6}{h['handshakes_per_sec']:>10.1f}"
+              f"{fmt(h['mean_ms']):>10}{fmt(h['p50_ms']):>10}{fmt(h['p99_ms']):>10}"
+              f"{fmt(h['server_cpu_ms_per_handshake']):>14}{fmt(h['client_cpu_ms_per_handshake']):>14}")
+    t = r["throughput"]
+    print(f"加密吞吐：{t['uploads']} 个 {t['file_mb']:.1f} MB 上传，{t['mb_per_sec']:.1f} MB/s，"
+          f"服务器 CPU {fmt(t['server_cpu_ms_per_mb'])} ms/MB，失败 {t['failures']}")
+
+
+def print_comparison(report, baseline):
+    print(f"\n与 {baseline['meta'].get('git') or '基线'} ({baseline['meta'].get('timestamp')}) 对比：")
+    for group, metric, higher_better in COMPARE_METRICS:
+        old = baseline["results"].get(group, {}).get(metric)
+        new = report["results"].get(group, {}).get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        better = (change > 0) == higher_better
+        print(f"  {group}.{metric:<30}{old:>10.2f} -> {new:>10.2f}  {change:+6.1f}% {'✅' if better else '⚠️'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="握手与加密吞吐基准套件（JSON 输出）")
+    parser.add_argument("--clients", type=int, default=8, help="并发客户端（身份）数 N")
+    parser.add_argument("--rounds", type=int, default=10, help="每个客户端每种模式的握手次数")
+    parser.add_argument("--file-mb", type=float, default=8, help="吞吐测试中每个客户端上传的文件大小 (MB)")
+    parser.add_argument("--output", help="结果 JSON 路径（默认 bench/results/suite-时间戳.json）")
+    parser.add_argument("--compare", metavar="JSON", help="与之前的结果文件对比")
+    parser.add_argument("--server-arg", dest="server_args", action="append", default=[],
+                        help="传给 tcp_server.py 的额外参数，可重复，如 --server-arg=--conn-workers=16")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+    print_report(report)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
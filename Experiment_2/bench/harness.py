@@ -0,0 +1,140 @@
+# 文件路径: Experiment_2/bench/harness.py
+"""
+基准脚本共用的进程管理工具
+- 在随机空闲端口上启动 CA 中心 / 安全服务器子进程，并主动探测就绪（不靠固定 sleep）
+- 读取子进程（含其工作进程）的累计 CPU 时间，用于计算每次握手的 CPU 开销
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+READY_TIMEOUT = 30.0
+
+
+def free_port(kind=socket.SOCK_STREAM) -> int:
+    with socket.socket(socket.AF_INET, kind) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def free_ports(count: int) -> list:
+    """同时占住 count 个端口再释放，保证拿到的端口互不相同（TCP 与 UDP 均空闲）"""
+    socks = []
+    try:
+        while len(socks) < count:
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+            try:
+                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as u:
+                    u.bind(("127.0.0.1", port))
+            except OSError:
+                s.close()
+                continue
+            socks.append(s)
+        return [s.getsockname()[1] for s in socks]
+    finally:
+        for s in socks:
+            s.close()
+
+
+def wait_tcp(port: int, proc, timeout: float = READY_TIMEOUT):
+    """等待 TCP 端口可以连接"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError("服务器进程已退出")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("等待服务器就绪超时")
+
+
+def wait_ca(port: int, proc, timeout: float = READY_TIMEOUT):
+    """等待 CA 中心能应答 get_ca_key（UDP 没有连接，只能发请求探测）"""
+    deadline = time.monotonic() + timeout
+    probe = json.dumps({"action": "get_ca_key"}).encode("utf-8")
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.settimeout(0.2)
+        while time.monotonic() < deadline:
+            if proc is not None and proc.poll() is not None:
+                raise RuntimeError("CA 进程已退出")
+            try:
+                s.sendto(probe, ("127.0.0.1", port))
+                if json.loads(s.recv(65535).decode("utf-8")).get("status") == "ok":
+                    return
+            except (OSError, ValueError):
+                time.sleep(0.05)
+    raise RuntimeError("等待 CA 就绪超时")
+
+
+def start_ca(port: int, tcp_port: int, cwd: str, workers: int = 0, log=subprocess.DEVNULL):
+    """在 cwd 下启动 CA 中心（密钥与登记表都生成在 cwd 中），返回就绪的子进程"""
+    proc = subprocess.Popen([sys.executable, os.path.join(BASE_DIR, "udp", "udp_server.py"),
+                             "--host", "127.0.0.1", "--port", str(port), "--tcp-port", str(tcp_port),
+                             "--workers", str(workers)], cwd=cwd, stdout=log, stderr=log)
+    try:
+        wait_ca(port, proc)
+    except Exception:
+        stop(proc)
+        raise
+    return proc
+
+
+def start_server(port: int, cwd: str, ca_key: str = None, extra_args=(), log=subprocess.DEVNULL,
+                 script: str = "tcp_server.py"):
+    """在 cwd 下启动安全服务器（服务器密钥生成在 cwd 中），返回就绪的子进程；script 可换成 async_tcp_server.py"""
+    cmd = [sys.executable, os.path.join(BASE_DIR, "tcp", script), "--host", "127.0.0.1", "--port", str(port)]
+    if ca_key:
+        cmd += ["--ca-key", ca_key]
+    proc = subprocess.Popen(cmd + list(extra_args), cwd=cwd, stdout=log, stderr=log)
+    try:
+        wait_tcp(port, proc)
+    except Exception:
+        stop(proc)
+        raise
+    return proc
+
+
+def stop(proc, timeout: float = 10.0):
+    """SIGTERM 让服务器走 finally 关闭工作进程，超时再强制结束"""
+    if proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def process_tree_cpu(pid: int):
+    """进程及其所有子进程累计的 user+sys CPU 秒数（依赖 Linux /proc，不可用时返回 None）"""
+    tick = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    total = 0.0
+    stack = [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / tick   # utime, stime
+            # 工作进程可能由任意线程创建，需遍历所有线程的 children
+            for task in os.listdir(f"/proc/{p}/task"):
+                with open(f"/proc/{p}/task/{task}/children") as f:
+                    stack.extend(int(c) for c in f.read().split())
+        except (OSError, ValueError, IndexError):
+            if p == pid:
+                return None
+            # 子进程恰好退出，忽略
+    return total
+
+
+def percentile(sorted_values, p: float) -> float:
+    idx = min(len(sorted_values) - 1, max(0, int(round(p / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[idx]
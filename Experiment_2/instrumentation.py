@@ -0,0 +1,312 @@
+# 文件路径: Experiment_2/instrumentation.py
+"""
+可选的运行时插桩：按操作统计调用次数、累计耗时与延迟直方图
+- 默认关闭：登记过的方法保持原函数，关闭时没有任何额外开销；span() 只返回一个空上下文
+- enable() 把登记的方法替换为计时包装，disable() 恢复原函数；
+  设置环境变量 SECURE_COMM_INSTRUMENT=1 时在导入时自动开启
+- 直方图按 2 的幂分桶（单位微秒），每次记录只是一次加锁和几次整数运算
+- 只统计当前进程：进程池中的 RSA 工作进程不计入（其耗时体现在服务器的阶段延迟中）
+- 嵌套调用各自计时，例如 rsa_encrypt 内部的 rsa_encrypt_bytes 会同时计入两项
+
+导出方式：
+- snapshot() 返回可 JSON 序列化的统计；install_signal_handler() 后收到 SIGUSR1 打印快照
+- start_stats_server(port) 在本机提供 HTTP 端点：GET /stats、POST /reset、GET /profile?seconds=N
+- capture_profile(seconds) 对所有线程采样调用栈，输出 flamegraph.pl / speedscope 可读的折叠栈
+"""
+import contextlib
+import functools
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HISTOGRAM_BUCKETS = 32          # 第 i 桶：耗时 < 2^i 微秒（最后一桶收纳更慢的调用）
+SAMPLE_INTERVAL = 0.005         # 采样剖析的间隔（秒）
+MAX_PROFILE_SECONDS = 60
+
+_registry = []                  # (类, 方法名, 操作名)
+_originals = {}                 # (类, 方法名) -> 原函数
+_stats = {}                     # 操作名 -> OpStats
+_stats_lock = threading.Lock()
+_providers = {}                 # 快照中附带的其他统计：名称 -> 无参函数
+_null_span = contextlib.nullcontext()
+enabled = False
+
+
+class OpStats:
+    """单个操作的计数、累计耗时与对数分桶直方图"""
+
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "buckets", "lock")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.lock = threading.Lock()
+
+    def record(self, elapsed_ns: int):
+        idx = min((elapsed_ns // 1000).bit_length(), HISTOGRAM_BUCKETS - 1)
+        with self.lock:
+            self.count += 1
+            self.total_ns += elapsed_ns
+            self.buckets[idx] += 1
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+            if self.min_ns is None or elapsed_ns < self.min_ns:
+                self.min_ns = elapsed_ns
+
+    def _quantile_us(self, q: float):
+        """按直方图估计分位数，返回所在桶的上界（微秒）"""
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return float(1 << i)
+        return self.max_ns / 1e3
+
+    def summary(self) -> dict:
+        with self.lock:
+            if not self.count:
+                return {"count": 0}
+            return {
+                "count": self.count,
+                "total_ms": self.total_ns / 1e6,
+                "mean_us": self.total_ns / self.count / 1e3,
+                "min_us": self.min_ns / 1e3,
+                "max_us": self.max_ns / 1e3,
+                "p50_us": self._quantile_us(0.50),
+                "p99_us": self._quantile_us(0.99),
+                # [桶上界(微秒), 次数]，只列出非空桶
+                "histogram": [[1 << i, n] for i, n in enumerate(self.buckets) if n],
+            }
+
+
+def _op(name: str) -> OpStats:
+    stats = _stats.get(name)
+    if stats is None:
+        with _stats_lock:
+            stats = _stats.setdefault(name, OpStats())
+    return stats
+
+
+def record(name: str, elapsed_ns: int):
+    if enabled:
+        _op(name).record(elapsed_ns)
+
+
+def _timed(func, name):
+    stats = _op(name)
+    clock = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.record(clock() - start)
+    return wrapper
+
+
+class _Span:
+    __slots__ = ("stats", "start")
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(time.perf_counter_ns() - self.start)
+        return False
+
+
+def span(name: str):
+    """为一段代码计时：with span("json.decode"): ...；未开启时返回共享的空上下文"""
+    if not enabled:
+        return _null_span
+    return _Span(_op(name))
+
+
+def register(owner, methods: dict):
+    """登记需要插桩的方法：{方法名: 操作名}；若插桩已开启则立即生效"""
+    for attr, name in methods.items():
+        _registry.append((owner, attr, name))
+        if enabled:
+            _patch(owner, attr, name)
+
+
+def _patch(owner, attr, name):
+    key = (owner, attr)
+    if key in _originals:
+        return
+    original = owner.__dict__[attr]
+    _originals[key] = original
+    setattr(owner, attr, _timed(original, name))
+
+
+def enable():
+    global enabled
+    with _stats_lock:
+        if enabled:
+            return
+        enabled = True
+    for owner, attr, name in _registry:
+        _patch(owner, attr, name)
+
+
+def disable():
+    global enabled
+    enabled = False
+    for (owner, attr), original in list(_originals.items()):
+        setattr(owner, attr, original)
+    _originals.clear()
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
+    # 已打补丁的包装函数持有旧的 OpStats，重新打补丁让它们指向新的统计对象
+    if enabled:
+        disable()
+        enable()
+
+
+def add_provider(name: str, func):
+    """在快照中附带其他统计（例如服务器的 stats()）"""
+    _providers[name] = func
+
+
+def snapshot() -> dict:
+    with _stats_lock:
+        items = sorted(_stats.items())
+    result = {
+        "enabled": enabled,
+        "pid": os.getpid(),
+        "time": time.time(),
+        "operations": {name: stats.summary() for name, stats in items if stats.count},
+    }
+    for name, func in _providers.items():
+        try:
+            result[name] = func()
+        except Exception as e:
+            result[name] = {"error": str(e)}
+    return result
+
+
+# ---------- 导出：信号 / 本机 HTTP 端点 ----------
+def install_signal_handler(signum=None, path: str = None):
+    """收到信号（默认 SIGUSR1）时打印快照，给出 path 则写入该文件；需在主线程调用"""
+    if signum is None:
+        signum = getattr(signal, "SIGUSR1", None)
+        if signum is None:
+            return False  # Windows 没有 SIGUSR1，请改用统计端点
+
+    def dump():
+        data = json.dumps(snapshot(), ensure_ascii=False, indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+        else:
+            print(f"📊 [插桩] 统计快照:\n{data}", flush=True)
+
+    def handler(sig, frame):
+        # 信号处理函数运行在主线程上，而主线程此时可能正持有 snapshot() 要取的锁
+        # （_stats_lock、服务器的统计锁，均不可重入），因此快照交给新线程去做
+        threading.Thread(target=dump, name="stats-dump", daemon=True).start()
+
+    signal.signal(signum, handler)
+    return True
+
+
+class _StatsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self._reply(200, json.dumps(snapshot(), ensure_ascii=False).encode("utf-8"), "application/json")
+        elif url.path == "/profile":
+            try:
+                seconds = float(parse_qs(url.query).get("seconds", ["5"])[0])
+            except ValueError:
+                seconds = 5.0
+            folded = capture_profile(min(max(seconds, 0.1), MAX_PROFILE_SECONDS))
+            self._reply(200, folded.encode("utf-8"), "text/plain; charset=utf-8")
+        else:
+            self._reply(404, b"not found\n", "text/plain")
+
+    def do_POST(self):
+        if urlparse(self.path).path == "/reset":
+            reset()
+            self._reply(200, b'{"status": "ok"}', "application/json")
+        else:
+            self._reply(404, b"not found\n", "text/plain")
+
+    def _reply(self, code, body, content_type):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass  # 不把每次查询打印到服务器日志
+
+
+def start_stats_server(port: int, host: str = "127.0.0.1"):
+    """在后台线程中启动统计端点（默认只监听本机），同时开启插桩；返回 HTTP 服务器对象"""
+    enable()
+    server = ThreadingHTTPServer((host, port), _StatsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stats-endpoint", daemon=True).start()
+    return server
+
+
+# ---------- 采样剖析 ----------
+def _frame_stack(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def capture_profile(seconds: float, interval: float = SAMPLE_INTERVAL, path: str = None) -> str:
+    """
+    在 seconds 秒内每隔 interval 对所有线程采样调用栈，返回折叠栈文本（每行 "栈;帧 次数"）
+    cProfile 只能剖析开启它的那个线程，而服务器的工作在线程池中完成，因此这里用采样方式覆盖全部线程；
+    输出可直接交给 flamegraph.pl 或 speedscope 生成火焰图
+    """
+    me = threading.get_ident()
+    names = {}
+    counts = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frames = sys._current_frames()
+        for ident, frame in frames.items():
+            if ident == me:
+                continue
+            if ident not in names:
+                names = {t.ident: t.name for t in threading.enumerate()}
+            counts[f"{names.get(ident, ident)};{_frame_stack(frame)}"] += 1
+        del frames
+        time.sleep(interval)
+    folded = "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(folded)
+    return folded
+
+
+if os.environ.get("SECURE_COMM_INSTRUMENT", "") not in ("", "0"):
+    enable()
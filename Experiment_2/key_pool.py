@@ -0,0 +1,97 @@
+# 文件路径: Experiment_2/key_pool.py
+"""
+RSA 密钥对预生成池
+- 后台工作进程提前生成密钥对（RSA-2048 单次生成需数百毫秒），池中保持 size 对现成的密钥
+- get() 取走一对后立即补充一对；池空时等待最先完成的后台任务
+- 工作进程只返回 PEM 字节串，落盘由调用方通过 SecureCommLib.save_rsa_keypair 原子完成
+
+用法示例：
+    pool = KeyPairPool(size=16)
+    private_pem, public_pem = pool.get()
+    pool.close()
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Crypto.PublicKey import RSA
+
+DEFAULT_POOL_SIZE = 8
+
+
+def _generate_pem(key_size):
+    key = RSA.generate(key_size)
+    return key.export_key(), key.publickey().export_key()
+
+
+class KeyPairPool:
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, key_size: int = 2048, workers: int = None):
+        self.size = size
+        self.key_size = key_size
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._ready = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.generated = 0
+        self.served = 0
+        self.waited = 0   # 取用时池为空、需要等待的次数
+        for _ in range(size):
+            self._submit()
+
+    def _submit(self):
+        future = self._executor.submit(_generate_pem, self.key_size)
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        if future.cancelled():
+            return
+        try:
+            pair = future.result()
+        except Exception as e:
+            # 后台生成失败时放入异常，由 get() 抛给调用方
+            self._ready.put(e)
+            return
+        with self._lock:
+            self.generated += 1
+        self._ready.put(pair)
+
+    def get(self, timeout: float = None):
+        """取出一对 (私钥 PEM, 公钥 PEM)，并补充一个后台生成任务"""
+        if self._closed:
+            raise RuntimeError("密钥池已关闭")
+        with self._lock:
+            if self._ready.empty():
+                self.waited += 1
+            self.served += 1
+        self._submit()
+        item = self._ready.get(timeout=timeout)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """等待池被填满（预热），返回是否在超时前填满"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._ready.qsize() < self.size:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"ready": self._ready.qsize(), "generated": self.generated,
+                    "served": self.served, "waited": self.waited}
+
+    def close(self):
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
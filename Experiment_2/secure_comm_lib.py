@@ -1,55 +1,423 @@
 # 文件路径: Experiment_2/secure_comm_lib.py
 import base64
+import contextlib
 import hashlib
+import hmac
 import json
 import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Union
+
 import pyDes
 from Crypto.PublicKey import RSA
-from Crypto.Cipher import PKCS1_v1_5
+from Crypto.Cipher import AES, ChaCha20_Poly1305, PKCS1_v1_5
 from Crypto.Signature import PKCS1_v1_5 as Sig_PK
 from Crypto.Hash import SHA256
 
+import instrumentation
+
+# 密钥参数：文件路径 (str)、PEM/DER 字节串，或已解析的 RsaKey 对象
+KeyLike = Union[str, bytes, RSA.RsaKey]
+
+# 会话对称加密算法（按优先级排列）；DES 仅用于兼容旧客户端
+CIPHER_AES_GCM = "AES-256-GCM"
+CIPHER_CHACHA20 = "CHACHA20-POLY1305"
+CIPHER_DES = "DES-CBC"
+SUPPORTED_CIPHERS = (CIPHER_AES_GCM, CIPHER_CHACHA20, CIPHER_DES)
+AEAD_NONCE_SIZE = 12
+AEAD_TAG_SIZE = 16
+ROLE_CLIENT = "client"
+ROLE_SERVER = "server"
+# 每个方向的密钥派生标签与 nonce 前缀：两个方向的密钥不同，nonce 前缀也固定区分方向
+DIRECTIONS = {
+    ROLE_CLIENT: (b"secure-comm client->server", b"\x00\x00\x00\x01"),
+    ROLE_SERVER: (b"secure-comm server->client", b"\x00\x00\x00\x02"),
+}
+RESUME_NONCE_SIZE = 16
+
+# 流式分块加密：头部 = magic(4) + 流 ID(8) + 块大小(4)；每块 = 标志(1) + 密文长度(4) + 密文
+KEYPAIR_LOCK_STALE = 60.0   # 秒；创建密钥对的进程崩溃后遗留的锁文件超过该时间视为失效
+
+STREAM_MAGIC = b"SCS1"
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_ID_SIZE = 8
+STREAM_HEADER = struct.Struct("!4s8sI")
+STREAM_CHUNK_HEADER = struct.Struct("!BI")
+STREAM_AAD = struct.Struct("!8sQB")   # 流 ID + 块序号 + 是否末块，作为每块的附加认证数据
+STREAM_FLAG_FINAL = 1
+
+
+class KeyStore:
+    """
+    已解析 RSA 密钥对象的有界 LRU 缓存
+    - 以文件绝对路径为键，命中时只需一次 stat()，不再读取文件与解析 PEM/ASN.1
+    - 文件的 mtime / inode / 大小任一变化即视为失效，重新加载
+    - 直接传入的 PEM/DER 字节串以其 SHA-256 指纹为键缓存，完全不访问文件系统
+    - 直接传入的 RsaKey 对象原样返回，不经过缓存
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # 绝对路径或 (b"sha256", 指纹) -> (文件签名, RsaKey)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key_or_path: KeyLike) -> RSA.RsaKey:
+        if isinstance(key_or_path, RSA.RsaKey):
+            return key_or_path
+        if isinstance(key_or_path, (bytes, bytearray, memoryview)):
+            return self._get_material(bytes(key_or_path))
+        path = os.path.abspath(key_or_path)
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_ino, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # 解析放在锁外进行，避免阻塞其他线程的命中查询
+        key = self._parse(path)
+        self._store(path, signature, key)
+        return key
+
+    def _get_material(self, material: bytes) -> RSA.RsaKey:
+        cache_key = (b"sha256", hashlib.sha256(material).digest())
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        key = RSA.import_key(material)
+        self._store(cache_key, None, key)
+        return key
+
+    def _store(self, cache_key, signature, key):
+        with self._lock:
+            self._entries[cache_key] = (signature, key)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _parse(self, path: str) -> RSA.RsaKey:
+        with open(path, "r") as f:
+            return RSA.import_key(f.read())
+
+    def invalidate(self, path: str = None):
+        """手动失效某个路径（不传则清空全部缓存，包括按指纹缓存的密钥）"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class SessionCipher:
+    """
+    会话对称加密：统一 DES 与 AEAD 算法的字节接口
+    - AEAD 密文格式：nonce(12) || 密文 || tag(16)
+    - 指定 role（ROLE_CLIENT / ROLE_SERVER）时，用 HMAC-SHA256 从会话密钥分别派生“客户端->服务器”与
+      “服务器->客户端”两把密钥，nonce = 4 字节方向前缀 + 8 字节从 1 开始的序号。
+      解密只接受对端方向、且序号恰好是下一个的记录，反射、重放、重排与丢弃都会被拒绝
+    - 不指定 role 时为本地模式（如 encrypt_stream 写入的文件）：收发同一把密钥、nonce 完全随机，不检查序号
+    - DES 保持原有行为：CBC 模式、全零 IV、PKCS5 填充，无完整性校验
+    """
+
+    def __init__(self, name: str, key: bytes, role: str = None):
+        self.name = name
+        self.role = role
+        if name == CIPHER_DES:
+            self._des = pyDes.des(key[:8], pyDes.CBC, b"\0\0\0\0\0\0\0\0", pad=None, padmode=pyDes.PAD_PKCS5)
+        elif name in (CIPHER_AES_GCM, CIPHER_CHACHA20):
+            if len(key) != 32:
+                raise ValueError(f"{name} 需要 32 字节密钥")
+            if role is None:
+                self._send_key = self._recv_key = key
+                self._send_prefix = self._recv_prefix = None
+            elif role in DIRECTIONS:
+                peer = ROLE_SERVER if role == ROLE_CLIENT else ROLE_CLIENT
+                send_label, self._send_prefix = DIRECTIONS[role]
+                recv_label, self._recv_prefix = DIRECTIONS[peer]
+                self._send_key = hmac.new(key, send_label, hashlib.sha256).digest()
+                self._recv_key = hmac.new(key, recv_label, hashlib.sha256).digest()
+            else:
+                raise ValueError(f"未知的会话角色: {role}")
+            self._send_counter = 0
+            self._recv_counter = 0
+            self._lock = threading.Lock()
+        else:
+            raise ValueError(f"不支持的会话算法: {name}")
+
+    @property
+    def is_aead(self) -> bool:
+        return self.name != CIPHER_DES
+
+    def _new_aead(self, key: bytes, nonce: bytes):
+        if self.name == CIPHER_AES_GCM:
+            return AES.new(key, AES.MODE_GCM, nonce=nonce)
+        return ChaCha20_Poly1305.new(key=key, nonce=nonce)
+
+    def _next_nonce(self) -> bytes:
+        if self._send_prefix is None:
+            return os.urandom(AEAD_NONCE_SIZE)
+        with self._lock:
+            self._send_counter += 1
+            counter = self._send_counter
+        return self._send_prefix + counter.to_bytes(8, "big")
+
+    def encrypt(self, data: bytes, aad: bytes = None) -> bytes:
+        """加密；aad 为附加认证数据（只认证不加密，仅 AEAD 算法支持）"""
+        if self.name == CIPHER_DES:
+            if aad:
+                raise ValueError("DES 不支持附加认证数据")
+            return self._des.encrypt(data)
+        nonce = self._next_nonce()
+        aead = self._new_aead(self._send_key, nonce)
+        if aad:
+            aead.update(aad)
+        ciphertext, tag = aead.encrypt_and_digest(data)
+        return nonce + ciphertext + tag
+
+    def decrypt(self, data: bytes, aad: bytes = None) -> bytes:
+        """解密（data 可为 bytes 或 memoryview）；认证失败、方向不对或序号不是下一个时抛出 ValueError"""
+        if self.name == CIPHER_DES:
+            if aad:
+                raise ValueError("DES 不支持附加认证数据")
+            return self._des.decrypt(bytes(data))
+        if len(data) < AEAD_NONCE_SIZE + AEAD_TAG_SIZE:
+            raise ValueError("密文长度不足")
+        # data 可以是 memoryview：只复制 nonce 与 tag，密文部分直接交给底层实现
+        view = memoryview(data)
+        nonce = bytes(view[:AEAD_NONCE_SIZE])
+        tag = bytes(view[-AEAD_TAG_SIZE:])
+        if self._recv_prefix is None:
+            aead = self._new_aead(self._recv_key, nonce)
+            if aad:
+                aead.update(aad)
+            return aead.decrypt_and_verify(view[AEAD_NONCE_SIZE:-AEAD_TAG_SIZE], tag)
+        with self._lock:
+            expected = self._recv_counter + 1
+            if nonce != self._recv_prefix + expected.to_bytes(8, "big"):
+                raise ValueError("记录方向或序号不符（反射、重放或乱序）")
+            aead = self._new_aead(self._recv_key, nonce)
+            if aad:
+                aead.update(aad)
+            plain = aead.decrypt_and_verify(view[AEAD_NONCE_SIZE:-AEAD_TAG_SIZE], tag)
+            # 只有通过认证的记录才推进序号，伪造的记录不会打乱后续接收
+            self._recv_counter = expected
+        return plain
+
+
+class StreamEncryptor:
+    """
+    分块流式加密：把任意长度的输入切成固定大小的块，每块单独做 AEAD 加密与认证
+    - 附加认证数据绑定 (流 ID, 块序号, 是否末块)，块被重排、替换、丢弃或流被截断都能检测出来
+    - 同一时刻只持有一块数据，内存占用与输入总长度无关
+    """
+
+    def __init__(self, cipher: SessionCipher, chunk_size: int = STREAM_CHUNK_SIZE, stream_id: bytes = None):
+        if not cipher.is_aead:
+            raise ValueError("流式加密需要 AEAD 会话算法")
+        self.cipher = cipher
+        self.chunk_size = chunk_size
+        self.stream_id = stream_id or os.urandom(STREAM_ID_SIZE)
+        self.index = 0
+
+    def seal(self, data, final: bool = False) -> bytes:
+        aad = STREAM_AAD.pack(self.stream_id, self.index, STREAM_FLAG_FINAL if final else 0)
+        self.index += 1
+        return self.cipher.encrypt(data, aad)
+
+    def iter_sealed(self, src):
+        """从类文件对象读取并逐块加密，产出 (密文块, 是否末块)；预读一块以确定末块"""
+        bufs = [bytearray(self.chunk_size), bytearray(self.chunk_size)]
+        cur = 0
+        n = _read_full(src, bufs[cur])
+        while True:
+            nxt = 1 - cur
+            m = _read_full(src, bufs[nxt]) if n == self.chunk_size else 0
+            final = m == 0
+            yield self.seal(memoryview(bufs[cur])[:n], final), final
+            if final:
+                return
+            cur, n = nxt, m
+
+
+class StreamDecryptor:
+    """StreamEncryptor 的逆过程：按顺序校验并解密每一块"""
+
+    def __init__(self, cipher: SessionCipher, stream_id: bytes):
+        if not cipher.is_aead:
+            raise ValueError("流式解密需要 AEAD 会话算法")
+        self.cipher = cipher
+        self.stream_id = stream_id
+        self.index = 0
+        self.finished = False
+
+    def open(self, sealed, final: bool) -> bytes:
+        if self.finished:
+            raise ValueError("流已结束，收到多余的数据块")
+        aad = STREAM_AAD.pack(self.stream_id, self.index, STREAM_FLAG_FINAL if final else 0)
+        plain = self.cipher.decrypt(sealed, aad)
+        self.index += 1
+        self.finished = final
+        return plain
+
+
+def _read_full(src, buf) -> int:
+    """尽量读满 buf（类文件对象可能一次只返回部分数据），返回读到的字节数；0 表示 EOF"""
+    view = memoryview(buf)
+    got = 0
+    while got < len(buf):
+        if hasattr(src, "readinto"):
+            n = src.readinto(view[got:])
+        else:
+            data = src.read(len(buf) - got)
+            n = len(data)
+            view[got:got + n] = data
+        if not n:
+            break
+        got += n
+    return got
+
+
+# 进程内共享的默认密钥缓存：同一进程中的多个 SecureCommLib 实例共用
+DEFAULT_KEY_STORE = KeyStore()
+
+
+def _write_atomic(path: str, data: bytes, mode: int):
+    """写入同目录下的唯一临时文件后原子替换目标文件"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+@contextlib.contextmanager
+def _keypair_lock(private_path: str):
+    """按身份（私钥路径）的进程间互斥：以 O_CREAT | O_EXCL 创建 <私钥>.lock，退出时删除"""
+    lock_path = private_path + ".lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > KEYPAIR_LOCK_STALE:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.02)
+    try:
+        yield
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(lock_path)
+
+
 class SecureCommLib:
     """
     安全通信核心库
     实现了 PDF 文档要求的 DES 加密、RSA 密钥生成/加解密/签名、MD5 摘要与 Base64 转码
+    RSA 相关方法的密钥参数既可以是 PEM 文件路径（经 KeyStore 缓存），也可以是已加载的 RsaKey 对象
     """
+
+    def __init__(self, key_store: KeyStore = None):
+        self.key_store = key_store or DEFAULT_KEY_STORE
+
+    def load_key(self, key_or_path: KeyLike) -> RSA.RsaKey:
+        """获取已解析的 RSA 密钥对象（带缓存）"""
+        return self.key_store.get(key_or_path)
     
     def generate_rsa_keypair(self, key_size=2048, key_dir="keys"):
         """生成 RSA 密钥对并保存到文件 [cite: 32, 42]"""
-        if not os.path.exists(key_dir):
-            os.makedirs(key_dir)
-            
-        key = RSA.generate(key_size)
-        private_key = key.export_key()
-        public_key = key.publickey().export_key()
-        
-        with open(os.path.join(key_dir, "private_key.pem"), "wb") as f:
-            f.write(private_key)
-        with open(os.path.join(key_dir, "public_key.pem"), "wb") as f:
-            f.write(public_key)
+        private_key, public_key = self.new_rsa_keypair_pem(key_size)
+        self.save_rsa_keypair(private_key, public_key,
+                              os.path.join(key_dir, "private_key.pem"), os.path.join(key_dir, "public_key.pem"))
         return private_key, public_key
 
-    def rsa_encrypt(self, message: str, public_key_path: str) -> str:
+    def new_rsa_keypair_pem(self, key_size=2048):
+        """生成 RSA 密钥对，返回 (私钥 PEM, 公钥 PEM) 字节串，不落盘"""
+        key = RSA.generate(key_size)
+        return key.export_key(), key.publickey().export_key()
+
+    def save_rsa_keypair(self, private_pem: bytes, public_pem: bytes, private_path: str, public_path: str):
+        """
+        原子地把密钥对写入各自的文件：先写临时文件再 os.replace，并发启动时不会读到半个文件
+        公钥先落盘、私钥最后落盘，因此“私钥文件存在”即可视为密钥对完整
+        """
+        _write_atomic(public_path, public_pem, 0o644)
+        _write_atomic(private_path, private_pem, 0o600)
+
+    def create_rsa_keypair_files(self, private_path: str, public_path: str, key_size=2048, pool=None):
+        """
+        为某个身份生成密钥对并写入指定文件，返回 (私钥 PEM, 公钥 PEM)；提供 pool（KeyPairPool）时从预生成的池中取用
+        两个文件各自原子替换还不够：检查“不存在”与写入之间，另一个进程可能也在创建同一身份，
+        最后留下 A 的公钥配 B 的私钥。因此按身份加锁，并且在锁内再检查一次，已存在时直接返回已有的密钥对
+        """
+        with _keypair_lock(private_path):
+            if os.path.exists(private_path) and os.path.exists(public_path):
+                with open(private_path, "rb") as f:
+                    private_pem = f.read()
+                with open(public_path, "rb") as f:
+                    return private_pem, f.read()
+            if pool is not None:
+                private_pem, public_pem = pool.get()
+            else:
+                private_pem, public_pem = self.new_rsa_keypair_pem(key_size)
+            self.save_rsa_keypair(private_pem, public_pem, private_path, public_path)
+        return private_pem, public_pem
+
+    def rsa_encrypt(self, message: str, public_key_path: KeyLike) -> str:
         """RSA 公钥加密 (用于 DES 密钥共享) [cite: 75, 94]"""
-        with open(public_key_path, "r") as f:
-            key = RSA.import_key(f.read())
-        cipher = PKCS1_v1_5.new(key)
-        # 必须分块或确保消息短于密钥长度，这里用于加密 DES Key (很短)
-        encrypted_bytes = cipher.encrypt(message.encode("utf-8"))
+        encrypted_bytes = self.rsa_encrypt_bytes(message.encode("utf-8"), public_key_path)
         return base64.b64encode(encrypted_bytes).decode("utf-8")
 
-    def rsa_decrypt(self, b64_encrypted_msg: str, private_key_path: str) -> str:
-        """RSA 私钥解密 [cite: 27]"""
-        with open(private_key_path, "r") as f:
-            key = RSA.import_key(f.read())
+    def rsa_encrypt_bytes(self, data: bytes, public_key_path: KeyLike) -> bytes:
+        """RSA 公钥加密，输入输出均为原始字节（二进制线路格式使用）"""
+        key = self.load_key(public_key_path)
         cipher = PKCS1_v1_5.new(key)
+        # 必须分块或确保消息短于密钥长度，这里用于加密会话密钥 (很短)
+        return cipher.encrypt(data)
+
+    def rsa_decrypt(self, b64_encrypted_msg: str, private_key_path: KeyLike) -> str:
+        """RSA 私钥解密 [cite: 27]"""
         encrypted_bytes = base64.b64decode(b64_encrypted_msg)
+        return self.rsa_decrypt_bytes(encrypted_bytes, private_key_path).decode("utf-8")
+
+    def rsa_decrypt_bytes(self, encrypted_bytes: bytes, private_key_path: KeyLike) -> bytes:
+        """RSA 私钥解密，输入输出均为原始字节"""
+        key = self.load_key(private_key_path)
+        cipher = PKCS1_v1_5.new(key)
         sentinel = object() # 解密失败时的哨兵对象
-        decrypted_msg = cipher.decrypt(encrypted_bytes, sentinel)
+        decrypted_msg = cipher.decrypt(bytes(encrypted_bytes), sentinel)
         if decrypted_msg is sentinel:
             raise ValueError("RSA decryption failed")
-        return decrypted_msg.decode("utf-8")
+        return decrypted_msg
 
     def des_encrypt(self, text: str, key: str) -> str:
         """DES 加密 (使用 pyDes, CBC 模式) [cite: 12, 14]"""
@@ -64,28 +432,113 @@ class SecureCommLib:
         encrypted_bytes = base64.b64decode(b64_text)
         return k.decrypt(encrypted_bytes).decode("utf-8")
 
+    def generate_session_secret(self) -> str:
+        """
+        生成会话密钥材料：32 字节随机数的 Base64 文本（44 字符，可直接 RSA 加密传输）
+        旧版服务器把它当作 DES 密钥使用时只取前 8 个字符，与 DES 回退路径一致
+        """
+        return base64.b64encode(os.urandom(32)).decode("utf-8")
+
+    def negotiate_cipher(self, offered) -> str:
+        """服务器端按本地优先级从客户端提供的列表中选择算法；未提供则回退 DES"""
+        if not offered:
+            return CIPHER_DES
+        for name in SUPPORTED_CIPHERS:
+            if name in offered:
+                return name
+        return CIPHER_DES
+
+    def new_session_cipher(self, name: str, session_secret: str, role: str = None) -> SessionCipher:
+        """
+        根据协商结果和会话密钥材料创建会话加密器；网络会话需指定本端角色（ROLE_CLIENT / ROLE_SERVER），
+        两个方向使用不同的派生密钥并校验序号
+        """
+        if name == CIPHER_DES:
+            return SessionCipher(name, session_secret[:8].encode())
+        return SessionCipher(name, base64.b64decode(session_secret), role)
+
+    def resume_mac(self, session_secret: str, label: bytes, *parts: bytes) -> bytes:
+        """会话恢复用 HMAC-SHA256：以原会话密钥材料为密钥，对标签和各部分（定长）计算消息认证码"""
+        return hmac.new(session_secret.encode("utf-8"), label + b"".join(parts), hashlib.sha256).digest()
+
+    def derive_resumed_secret(self, session_secret: str, server_nonce: bytes, client_nonce: bytes) -> str:
+        """会话恢复时由原密钥材料和双方 nonce 派生本次连接的新密钥材料（格式同 generate_session_secret）"""
+        derived = self.resume_mac(session_secret, b"resume key", server_nonce, client_nonce)
+        return base64.b64encode(derived).decode("utf-8")
+
+    def session_encrypt(self, text: str, cipher: SessionCipher) -> str:
+        """会话加密文本并 Base64 编码（与 des_encrypt 的输出形式一致）"""
+        return base64.b64encode(cipher.encrypt(text.encode("utf-8"))).decode("utf-8")
+
+    def session_decrypt(self, b64_text: str, cipher: SessionCipher) -> str:
+        """会话解密 Base64 文本"""
+        return cipher.decrypt(base64.b64decode(b64_text)).decode("utf-8")
+
+    def encrypt_stream(self, src, dst, cipher: SessionCipher, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """把类文件对象 src 的全部内容分块加密写入 dst，返回明文字节数；内存占用约为两个块"""
+        enc = StreamEncryptor(cipher, chunk_size)
+        dst.write(STREAM_HEADER.pack(STREAM_MAGIC, enc.stream_id, chunk_size))
+        total = 0
+        for sealed, final in enc.iter_sealed(src):
+            dst.write(STREAM_CHUNK_HEADER.pack(STREAM_FLAG_FINAL if final else 0, len(sealed)))
+            dst.write(sealed)
+            total += len(sealed) - AEAD_NONCE_SIZE - AEAD_TAG_SIZE
+        return total
+
+    def decrypt_stream(self, src, dst, cipher: SessionCipher) -> int:
+        """解密 encrypt_stream 的输出并写入 dst，返回明文字节数；认证失败或流被截断时抛出 ValueError"""
+        header = bytearray(STREAM_HEADER.size)
+        if _read_full(src, header) != STREAM_HEADER.size:
+            raise ValueError("流头部不完整")
+        magic, stream_id, chunk_size = STREAM_HEADER.unpack(header)
+        if magic != STREAM_MAGIC:
+            raise ValueError("不是加密流格式")
+        dec = StreamDecryptor(cipher, stream_id)
+        max_sealed = chunk_size + AEAD_NONCE_SIZE + AEAD_TAG_SIZE
+        buf = bytearray(max_sealed)
+        chunk_header = bytearray(STREAM_CHUNK_HEADER.size)
+        total = 0
+        while not dec.finished:
+            if _read_full(src, chunk_header) != STREAM_CHUNK_HEADER.size:
+                raise ValueError("加密流被截断")
+            flags, length = STREAM_CHUNK_HEADER.unpack(chunk_header)
+            if length > max_sealed:
+                raise ValueError("数据块长度超过上限")
+            view = memoryview(buf)[:length]
+            if _read_full(src, view) != length:
+                raise ValueError("加密流被截断")
+            plain = dec.open(view, bool(flags & STREAM_FLAG_FINAL))
+            dst.write(plain)
+            total += len(plain)
+        return total
+
     def md5_digest(self, data: str) -> str:
         """计算 MD5 摘要 (用于端点鉴别) """
         return hashlib.md5(data.encode("utf-8")).hexdigest()
 
-    def sign_data(self, data: str, private_key_path: str) -> str:
+    def sign_data(self, data: str, private_key_path: KeyLike) -> str:
         """数字签名 (RSA 私钥签名) [cite: 28]"""
-        with open(private_key_path, "r") as f:
-            key = RSA.import_key(f.read())
+        key = self.load_key(private_key_path)
         h = SHA256.new(data.encode("utf-8"))
         signer = Sig_PK.new(key)
         signature = signer.sign(h)
         return base64.b64encode(signature).decode("utf-8")
 
-    def verify_signature(self, data: str, b64_signature: str, public_key_path: str) -> bool:
+    def verify_signature(self, data: str, b64_signature: str, public_key_path: KeyLike) -> bool:
         """验证数字签名 (RSA 公钥验签) [cite: 28]"""
-        with open(public_key_path, "r") as f:
-            key = RSA.import_key(f.read())
-        h = SHA256.new(data.encode("utf-8"))
-        verifier = Sig_PK.new(key)
         try:
             signature = base64.b64decode(b64_signature)
-            return verifier.verify(h, signature)
+        except (ValueError, TypeError):
+            return False
+        return self.verify_signature_bytes(data.encode("utf-8"), signature, public_key_path)
+
+    def verify_signature_bytes(self, data: bytes, signature: bytes, public_key_path: KeyLike) -> bool:
+        """验证数字签名，数据与签名均为原始字节"""
+        key = self.load_key(public_key_path)
+        h = SHA256.new(bytes(data))
+        verifier = Sig_PK.new(key)
+        try:
+            return verifier.verify(h, bytes(signature))
         except (ValueError, TypeError):
             return False
 
@@ -97,7 +550,27 @@ class SecureCommLib:
         """Base64 解码辅助"""
         return base64.b64decode(data).decode("utf-8")
         
-    def issue_certificate(self, user_public_key: str, ca_private_key_path: str) -> str:
+    def issue_certificate(self, user_public_key: str, ca_private_key_path: KeyLike) -> str:
         """CA 签发证书：对用户公钥进行签名"""
         # 证书内容就是对“用户公钥”的签名
-        return self.sign_data(user_public_key, ca_private_key_path)
\ No newline at end of file
+        return self.sign_data(user_public_key, ca_private_key_path)
+
+
+# 可选插桩（默认关闭）：instrumentation.enable() 后以下方法才会被替换为计时包装
+instrumentation.register(KeyStore, {"get": "key.load", "_parse": "key.pem_parse"})
+instrumentation.register(SessionCipher, {"encrypt": "session.encrypt", "decrypt": "session.decrypt"})
+instrumentation.register(SecureCommLib, {
+    "new_rsa_keypair_pem": "rsa.generate",
+    "rsa_encrypt_bytes": "rsa.encrypt",
+    "rsa_decrypt_bytes": "rsa.decrypt",
+    "sign_data": "rsa.sign",
+    "verify_signature_bytes": "rsa.verify",
+    "des_encrypt": "des.encrypt",
+    "des_decrypt": "des.decrypt",
+    "session_encrypt": "session.encrypt_b64",
+    "session_decrypt": "session.decrypt_b64",
+    "base64_encode": "base64.encode",
+    "base64_decode": "base64.decode",
+    "md5_digest": "md5",
+    "resume_mac": "hmac.resume",
+})
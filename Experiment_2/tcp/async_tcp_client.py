@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+asyncio 安全客户端：与 tcp_server.py / async_tcp_server.py 使用相同的二进制线路格式
+- 握手流程与 SecureTcpClient 相同（会话恢复优先，失败再完整握手），共享进程内的 SESSION_CACHE
+- RSA 公钥加密、密钥生成与文件读写在线程池中执行，不阻塞事件循环
+- 流水线：send() 写出请求后不等待上一条回复，回复由后台读取任务按发送顺序交给对应的 future，
+  一条连接上可同时有多条请求在途
+- 只支持二进制线路格式（旧版 JSON 服务器请使用 SecureTcpClient）
+"""
+import argparse
+import asyncio
+import base64
+import os
+import sys
+from collections import deque
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../udp")))
+import udp_client
+from async_udp_client import AsyncCertificateClient, obtain_certificate
+from secure_comm_lib import SecureCommLib, SUPPORTED_CIPHERS, ROLE_CLIENT
+from tcp_client import (
+    SecureTcpClient, SESSION_CACHE, SERVER_HOST, SERVER_PORT, build_resume_request, check_resume_result,
+)
+from wire_format import (
+    WIRE_VERSION, REC_HANDSHAKE, REC_HANDSHAKE_RESULT, REC_DATA,
+    F_PUBLIC_KEY, F_CERTIFICATE, F_ENC_SESSION_KEY, F_CIPHERS, F_STATUS, F_MESSAGE, F_CIPHER, F_PAYLOAD,
+    F_SESSION_ID, F_SESSION_TTL,
+    RecordReader, WireFormatError, encode_record, read_record_async, recv_json_document_async,
+)
+
+# 同一进程内同一用户的凭据只准备一次，并发建立的大量会话共用：
+# (KEYS_DIR, 用户) -> (公钥 PEM, 证书文本)，准备过程中为对应的 Task
+_credentials = {}
+
+
+async def load_credentials(user_id, key_pool=None, ca_client=None):
+    """返回 (公钥 PEM, 证书文本)；本地没有证书时通过异步 CA 客户端申请"""
+    key = (os.path.abspath(udp_client.KEYS_DIR), user_id)
+    entry = _credentials.get(key)
+    if isinstance(entry, tuple):
+        return entry
+    if entry is None:
+        entry = _credentials[key] = asyncio.ensure_future(obtain_certificate(user_id, key_pool, ca_client))
+    try:
+        _credentials[key] = await asyncio.shield(entry)
+    except BaseException:
+        if _credentials.get(key) is entry and entry.done():
+            del _credentials[key]   # 申请失败：下次重新尝试
+        raise
+    return _credentials[key]
+
+
+class AsyncSecureTcpClient:
+    def __init__(self, user_id, server_host=SERVER_HOST, server_port=SERVER_PORT, resume=True, key_pool=None,
+                 ca_client=None):
+        self.user_id = user_id
+        self.server_host = server_host
+        self.server_port = server_port
+        self.resume = resume
+        self.last_resumed = False
+        self.lib = SecureCommLib()
+        self.key_pool = key_pool
+        self.ca_client = ca_client or AsyncCertificateClient()
+        self.cipher = None
+        self._stream = None
+        self._writer = None
+        self._reader = None
+        self._reader_task = None
+        self._pending = deque()   # 按发送顺序排列、等待回复的 future
+        self._error = None
+
+    def _session_key(self):
+        return (self.server_host, self.server_port, self.user_id)
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and self._error is None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def connect(self) -> bool:
+        """建立连接并完成握手；服务器繁忙或拒绝证书时返回 False"""
+        credentials = await load_credentials(self.user_id, self.key_pool, self.ca_client)
+        stream, writer = await asyncio.open_connection(self.server_host, self.server_port)
+        try:
+            session = await self._open_session(stream, writer, credentials)
+        except BaseException:
+            writer.close()
+            raise
+        if session is None:
+            writer.close()
+            return False
+        self.cipher, self._reader = session
+        self._stream, self._writer = stream, writer
+        self._error = None
+        self._reader_task = asyncio.create_task(self._read_replies())
+        return True
+
+    async def _open_session(self, stream, writer, credentials):
+        """握手：成功返回 (会话加密器, RecordReader)，被拒绝返回 None"""
+        data = await recv_json_document_async(stream)
+        if data is None:
+            raise ConnectionError("服务器已关闭连接")
+        if data.get("status") == "busy":
+            print("🚦 [Client] 服务器繁忙（连接数已满），请稍后重试。")
+            return None
+        if WIRE_VERSION not in data.get("wire", ()):
+            raise WireFormatError("服务器不支持二进制线路格式，请改用 SecureTcpClient")
+        server_nonce = base64.b64decode(data.get("nonce", ""))
+        reader = RecordReader()
+
+        self.last_resumed = False
+        if self.resume and server_nonce:
+            request = build_resume_request(self.lib, self._session_key(), server_nonce)
+            if request is not None:
+                payload, state = request
+                writer.write(payload)
+                resumed = check_resume_result(self.lib, self._session_key(),
+                                              await read_record_async(stream, reader), state)
+                if resumed is not None:
+                    self.last_resumed = True
+                    return resumed[0], reader
+
+        # 完整握手：RSA 加密会话密钥放到线程池（服务器公钥按 PEM 指纹缓存，只解析一次）
+        my_pub, my_cert = credentials
+        session_secret = self.lib.generate_session_secret()
+        encrypted_key = await asyncio.get_running_loop().run_in_executor(
+            None, self.lib.rsa_encrypt_bytes, session_secret.encode("utf-8"), data["public_key"].encode("utf-8"))
+        writer.write(encode_record(REC_HANDSHAKE, {
+            F_PUBLIC_KEY: my_pub.encode("utf-8"),
+            F_CERTIFICATE: SecureTcpClient._decode_cert(my_cert),
+            F_ENC_SESSION_KEY: encrypted_key,
+            F_CIPHERS: ",".join(SUPPORTED_CIPHERS),
+        }))
+        record = await read_record_async(stream, reader)
+        if record is None or record.type != REC_HANDSHAKE_RESULT:
+            raise WireFormatError("未收到握手结果")
+        if record.get_str(F_STATUS) != "ok":
+            print(f"❌ [Client] 被服务器拒绝！原因: {record.get_str(F_MESSAGE)}")
+            return None
+        cipher_name = record.get_str(F_CIPHER)
+        session_id = record.get_bytes(F_SESSION_ID)
+        session_ttl = record.get_uint(F_SESSION_TTL, 0)
+        if session_id and session_ttl:
+            SESSION_CACHE.put(self._session_key(), (session_id, session_secret, cipher_name), ttl=session_ttl)
+        return self.lib.new_session_cipher(cipher_name, session_secret, ROLE_CLIENT), reader
+
+    async def send(self, message: str) -> str:
+        """发送一条消息并返回解密后的回显；多个协程可并发调用，请求在同一连接上流水线发送"""
+        if not self.connected:
+            raise ConnectionError(f"连接不可用: {self._error}" if self._error else "尚未连接")
+        future = asyncio.get_running_loop().create_future()
+        self._writer.write(encode_record(REC_DATA, {F_PAYLOAD: self.cipher.encrypt(message.encode("utf-8"))}))
+        self._pending.append(future)
+        await self._writer.drain()
+        return await future
+
+    async def _read_replies(self):
+        """后台读取回复：服务器按请求顺序回显，依次交给最早的未完成请求"""
+        try:
+            while True:
+                record = await read_record_async(self._stream, self._reader)
+                if record is None:
+                    raise ConnectionError("服务器已关闭连接")
+                if record.type != REC_DATA:
+                    continue
+                reply = self.cipher.decrypt(record.get_view(F_PAYLOAD)).decode("utf-8")
+                if not self._pending:
+                    raise WireFormatError("收到未请求的回复")
+                future = self._pending.popleft()
+                if not future.done():   # 调用方已取消的请求，其回复直接丢弃
+                    future.set_result(reply)
+        except asyncio.CancelledError:
+            self._fail(ConnectionError("连接已关闭"))
+            raise
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, error):
+        self._error = error
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(ConnectionError(str(error)))
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._writer = None
+
+    async def __aenter__(self):
+        if not await self.connect():
+            raise ConnectionError("握手失败或服务器繁忙")
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def _main(args):
+    async with AsyncSecureTcpClient(args.user, server_host=args.host, server_port=args.port) as client:
+        print(f"✅ [Client] 身份验证通过{'（会话恢复）' if client.last_resumed else ''}，"
+              f"流水线发送 {args.count} 条消息...")
+        replies = await asyncio.gather(*(client.send(f"{args.message} #{i}") for i in range(args.count)))
+        for reply in replies:
+            print(f"📩 [Client] 收到回显: {reply}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asyncio 安全 TCP 客户端（流水线发送）")
+    parser.add_argument("--user", default="user_test", help="用户 ID")
+    parser.add_argument("--message", default="Hello World", help="发送的消息")
+    parser.add_argument("--count", type=int, default=3, help="在同一连接上流水线发送的消息条数")
+    parser.add_argument("--host", default=SERVER_HOST, help="服务器地址")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="服务器端口")
+    asyncio.run(_main(parser.parse_args()))
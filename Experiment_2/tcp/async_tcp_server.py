@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+asyncio 安全服务器：线路协议与 tcp_server.py 完全相同，阻塞客户端与 asyncio 客户端均可连接
+- 每个连接是一个协程而不是一个线程，单进程即可同时保持数千个安全会话
+- 握手中的 RSA 私钥解密交给与 SecureTcpServer 相同的进程池，证书验签放到线程池，
+  事件循环只负责网络 IO、HMAC 会话恢复与短消息的对称加解密
+- 二进制数据阶段支持流水线：一次读到的多条 DATA 记录依次处理，回复按顺序写出后统一 drain
+- 握手、会话缓存、证书缓存、文件接收与统计逻辑都继承自 SecureTcpServer
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+import instrumentation
+from secure_comm_lib import RESUME_NONCE_SIZE
+from tcp_server import (
+    FileUpload, SecureTcpServer, HOST, MAX_UPLOAD_SIZE, PORT, _decrypt_session_key, _init_rsa_worker,
+)
+from wire_format import (
+    MAGIC, REC_DATA, REC_FILE_BEGIN, REC_FILE_RESULT, F_MESSAGE, F_PAYLOAD, F_STATUS,
+    RecordReader, encode_record, read_record_async, recv_json_document_async,
+)
+
+ASYNC_MAX_CONNECTIONS = 10000   # 同时保持的连接上限，超出时回复繁忙（注意进程的文件描述符上限）
+ASYNC_LISTEN_BACKLOG = 1024     # 大量客户端同时建连时避免 SYN 队列溢出
+VERIFY_WORKERS = 4              # 证书验签线程数（多数握手命中证书缓存）
+READ_CHUNK = 64 * 1024
+BUSY_HELLO = b'{"status": "busy", "msg": "Server busy"}'
+
+
+class AsyncSecureTcpServer(SecureTcpServer):
+    def __init__(self, rsa_workers=None, max_connections=ASYNC_MAX_CONNECTIONS, ca_key_path=None,
+                 verify_workers=VERIFY_WORKERS, verbose=True, max_upload_size=MAX_UPLOAD_SIZE):
+        super().__init__(conn_workers=verify_workers, rsa_workers=rsa_workers, max_connections=max_connections,
+                         ca_key_path=ca_key_path, max_upload_size=max_upload_size)
+        self.verbose = verbose  # 数千个会话时逐条打印会拖慢事件循环，可用 --quiet 关闭
+
+    def _log(self, msg):
+        if self.verbose:
+            print(msg)
+
+    def start(self, host=HOST, port=PORT, stats_interval=0):
+        # 与阻塞服务器相同：先创建并预热进程池再绑定端口
+        self.rsa_pool = ProcessPoolExecutor(max_workers=self.rsa_workers, initializer=_init_rsa_worker,
+                                            initargs=(os.path.abspath(self.priv_path),))
+        list(self.rsa_pool.map(abs, range(self.rsa_workers)))
+        self.conn_pool = ThreadPoolExecutor(max_workers=self.conn_workers, thread_name_prefix="verify")
+        try:
+            asyncio.run(self._serve(host, port, stats_interval))
+        except KeyboardInterrupt:
+            print("[Server] 服务已停止")
+        finally:
+            self.conn_pool.shutdown(wait=False, cancel_futures=True)
+            self.rsa_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _serve(self, host, port, stats_interval):
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        with contextlib.suppress(NotImplementedError, RuntimeError):
+            # 被 terminate() 时正常退出事件循环，回到 start() 的 finally 关闭进程池
+            loop.add_signal_handler(signal.SIGTERM, stop.set)
+        server = await asyncio.start_server(self._handle, host, port, backlog=ASYNC_LISTEN_BACKLOG,
+                                            reuse_address=True)
+        print(f"✅ [Server] asyncio 安全文件服务器启动 (TCP {host}:{port}，最多 {self.max_connections} 个连接，"
+              f"{self.rsa_workers} 个 RSA 进程)")
+        print("ℹ️  [Server] 等待安全连接...")
+        reporter = asyncio.create_task(self._report_stats_async(stats_interval)) if stats_interval > 0 else None
+        async with server:
+            await stop.wait()
+        if reporter is not None:
+            reporter.cancel()
+
+    async def _report_stats_async(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(f"📊 [Server] 运行统计: {json.dumps(self.stats(), ensure_ascii=False)}", flush=True)
+
+    async def _handle(self, stream, writer):
+        addr = writer.get_extra_info("peername")
+        with self._stats_lock:
+            admitted = self.pending < self.max_connections
+            if admitted:
+                self.pending += 1
+                self.active += 1
+                self.accepted += 1
+            else:
+                self.rejected += 1
+        if not admitted:
+            self._log(f"🚦 [Server] 连接数已达上限 {self.max_connections}，拒绝 {addr}")
+            writer.write(BUSY_HELLO)
+            writer.close()
+            return
+        try:
+            await self._handle_client(stream, writer, addr)
+        except Exception as e:
+            self._log(f"⚠️ [Server] 连接异常: {e}")
+        finally:
+            with self._stats_lock:
+                self.active -= 1
+                self.pending -= 1
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+
+    async def _handle_client(self, stream, writer, addr):
+        self._log(f"\n🔗 [Server] 客户端 {addr} 尝试连接...")
+        reader = RecordReader()
+        started = time.perf_counter()
+        # 1. 服务器问候（与阻塞服务器相同）
+        server_nonce = os.urandom(RESUME_NONCE_SIZE)
+        writer.write(self._server_hello(server_nonce))
+
+        # 2. 客户端握手；二进制客户端可先尝试恢复会话
+        handshake = await self._read_client_handshake_async(stream, reader)
+        if handshake is None:
+            return
+        binary = handshake["binary"]
+        cipher = None
+        if handshake.get("resume"):
+            cipher, cipher_name, result = self._check_resume(handshake, server_nonce)
+            writer.write(result)
+            if cipher is None:
+                self._log("🔁 [Server] 会话恢复失败，改为完整握手。")
+                handshake = await self._read_client_handshake_async(stream, reader)
+                if handshake is None or handshake.get("resume"):
+                    return
+            else:
+                self._log(f"♻️ [Server] 会话恢复成功，跳过证书验证与 RSA 解密，算法: {cipher_name}")
+        if cipher is None:
+            cipher = await self._full_handshake_async(writer, handshake)
+            if cipher is None:
+                return
+        self._record("handshake", time.perf_counter() - started)
+
+        if binary:
+            await self._serve_binary_async(stream, writer, reader, cipher)
+        else:
+            await self._serve_json_async(stream, writer, cipher)
+
+    async def _read_client_handshake_async(self, stream, reader):
+        if not reader.buffered:
+            data = await stream.read(READ_CHUNK)
+            if not data:
+                return None
+            reader.feed(data)
+        if reader.peek_byte() == MAGIC:
+            record = await read_record_async(stream, reader)
+            return None if record is None else self._handshake_from_record(record)
+        data = await recv_json_document_async(stream, reader.take_pending())
+        return None if data is None else self._handshake_from_json(data)
+
+    async def _full_handshake_async(self, writer, handshake):
+        """完整握手：验签放到线程池，RSA 解密放到进程池；成功返回会话加密器，失败返回 None"""
+        loop = asyncio.get_running_loop()
+        binary = handshake["binary"]
+        cipher_name = self.lib.negotiate_cipher(handshake["ciphers"])
+
+        t0 = time.perf_counter()
+        valid, cached = await loop.run_in_executor(self.conn_pool, self._verify_certificate,
+                                                   handshake["public_key"], handshake["certificate"])
+        self._record("verify", time.perf_counter() - t0)
+        if not valid:
+            self._log(f"❌ [Server] 证书验证失败，拒绝连接。{'（命中缓存）' if cached else ''}")
+            writer.write(self._result_bytes(binary, status="error", msg="Certificate Verification Failed"))
+            return None
+
+        t0 = time.perf_counter()
+        secret = await loop.run_in_executor(self.rsa_pool, _decrypt_session_key, bytes(handshake["encrypted_key"]))
+        self._record("decrypt", time.perf_counter() - t0)
+        cipher, result = self._establish_session(binary, cipher_name, secret.decode("utf-8"))
+        self._log(f"🔑 [Server] 证书验证通过并解密会话密钥，协商算法: {cipher_name}（{'二进制' if binary else 'JSON'} 格式）")
+        writer.write(result)
+        return cipher
+
+    async def _serve_binary_async(self, stream, writer, reader, cipher):
+        """二进制数据阶段：处理完已缓冲的全部记录（流水线请求）后再 drain 并读取下一批数据"""
+        while True:
+            record = reader.next_record()
+            if record is None:
+                await writer.drain()
+                data = await stream.read(READ_CHUNK)
+                if not data:
+                    return
+                reader.feed(data)
+                continue
+            if record.type == REC_FILE_BEGIN:
+                await self._receive_file_async(stream, writer, reader, cipher, record)
+                continue
+            if record.type != REC_DATA:
+                continue
+            t0 = time.perf_counter()
+            msg = cipher.decrypt(record.get_view(F_PAYLOAD)).decode("utf-8")
+            self._log(f"🔓 [Server] 解密后明文: {msg}")
+            reply = f"Server收到: {msg}"
+            writer.write(encode_record(REC_DATA, {F_PAYLOAD: cipher.encrypt(reply.encode("utf-8"))}))
+            self._record("echo", time.perf_counter() - t0)
+
+    async def _receive_file_async(self, stream, writer, reader, cipher, begin):
+        """流式文件上传：与阻塞服务器共用 FileUpload（每块 64 KiB 的解密与写入足够短，直接在事件循环中完成）"""
+        try:
+            upload = FileUpload(cipher, begin, self.max_upload_size)
+        except (ValueError, KeyError, OSError) as e:
+            self._log(f"❌ [Server] 拒绝文件上传: {e}")
+            writer.write(encode_record(REC_FILE_RESULT, {F_STATUS: "error", F_MESSAGE: f"文件头无效: {e}"}))
+            return
+        self._log(f"📥 [Server] 开始接收文件 {upload.name}（{upload.expected_size} 字节）")
+        try:
+            while not upload.finished:
+                record = await read_record_async(stream, reader, READ_CHUNK)
+                if record is None:
+                    raise ValueError("连接在文件传输中途断开")
+                upload.add(record)
+            result = upload.commit()
+        except (ValueError, OSError) as e:
+            self._log(f"❌ [Server] 文件 {upload.name} 接收失败: {e}")
+            writer.write(upload.abort(e))
+            return
+        except BaseException:
+            # 任务被取消等其它异常：同样删除临时文件，再继续向上抛出
+            upload.abort("接收中断")
+            raise
+        self._log(f"✅ [Server] 文件已保存: {upload.path}（{upload.size} 字节）")
+        writer.write(result)
+
+    async def _serve_json_async(self, stream, writer, cipher):
+        """旧版数据阶段：Base64 文本密文，每次读取视为一条消息（与阻塞服务器的语义相同）"""
+        while True:
+            data = await stream.read(4096)
+            if not data:
+                return
+            t0 = time.perf_counter()
+            msg = self.lib.session_decrypt(data.decode("utf-8"), cipher)
+            self._log(f"🔓 [Server] 解密后明文: {msg}")
+            writer.write(self.lib.session_encrypt(f"Server收到: {msg}", cipher).encode("utf-8"))
+            await writer.drain()
+            self._record("echo", time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asyncio 安全 TCP 服务器（与 tcp_server.py 线路兼容）")
+    parser.add_argument("--host", default=HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=PORT, help="监听端口")
+    parser.add_argument("--stats-interval", type=float, default=0, help="每隔多少秒打印运行统计（0 表示不打印）")
+    parser.add_argument("--verify-workers", type=int, default=VERIFY_WORKERS, help="证书验签线程数")
+    parser.add_argument("--rsa-workers", type=int, default=0, help="RSA 解密进程数（0 表示 CPU 核数）")
+    parser.add_argument("--max-connections", type=int, default=ASYNC_MAX_CONNECTIONS, help="同时保持的连接上限")
+    parser.add_argument("--ca-key", help="CA 公钥文件（默认为 Experiment_2/ca_keys/ca_public_key.pem）")
+    parser.add_argument("--max-upload-size", type=int, default=MAX_UPLOAD_SIZE,
+                        help="单个上传文件的大小上限（字节，0 表示不限制）")
+    parser.add_argument("--quiet", action="store_true", help="不打印逐连接 / 逐消息日志")
+    parser.add_argument("--instrument", action="store_true", help="开启插桩，收到 SIGUSR1 时打印统计快照")
+    parser.add_argument("--stats-port", type=int, default=0, help="在本机该端口提供插桩统计 HTTP 端点（0 表示关闭）")
+    args = parser.parse_args()
+    server = AsyncSecureTcpServer(rsa_workers=args.rsa_workers, max_connections=args.max_connections,
+                                  ca_key_path=args.ca_key, verify_workers=args.verify_workers,
+                                  verbose=not args.quiet, max_upload_size=args.max_upload_size)
+    if args.instrument or args.stats_port:
+        instrumentation.enable()
+        instrumentation.add_provider("server", server.stats)
+        instrumentation.install_signal_handler()
+    if args.stats_port:
+        instrumentation.start_stats_server(args.stats_port)
+        print(f"📊 [Server] 插桩统计端点: http://127.0.0.1:{args.stats_port}/stats")
+    server.start(args.host, args.port, args.stats_interval)
@@ -1,12 +1,29 @@
 #!/usr/bin/env python3
+import argparse
+import base64
+import hashlib
+import hmac
 import socket
 import json
+import threading
+import time
 import os
 import sys
+from collections import deque
 from pathlib import Path
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from secure_comm_lib import SecureCommLib
+from secure_comm_lib import (
+    SecureCommLib, StreamEncryptor, SUPPORTED_CIPHERS, ROLE_CLIENT, CIPHER_DES, RESUME_NONCE_SIZE, STREAM_CHUNK_SIZE,
+)
+from ttl_cache import TTLCache
+from wire_format import (
+    WIRE_VERSION, REC_HANDSHAKE, REC_HANDSHAKE_RESULT, REC_DATA, REC_RESUME,
+    REC_FILE_BEGIN, REC_FILE_CHUNK, REC_FILE_RESULT,
+    F_PUBLIC_KEY, F_CERTIFICATE, F_ENC_SESSION_KEY, F_CIPHERS, F_STATUS, F_MESSAGE, F_CIPHER, F_PAYLOAD,
+    F_SESSION_ID, F_SESSION_TTL, F_NONCE, F_PROOF, F_RESUMED, F_FINAL, F_STREAM_ID, F_FILE_SIZE, F_DIGEST,
+    RecordReader, WireFormatError, encode_record, recv_json_document, send_record,
+)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../udp")))
 from udp_client import CertificateClient
 
@@ -14,12 +31,59 @@ SERVER_HOST = "127.0.0.1"
 SERVER_PORT = 50000
 KEYS_DIR = "client_keys"
 
+# 进程内共享的会话缓存：(服务器地址, 端口, 用户) -> (会话 ID, 会话密钥材料, 算法名)
+# 有效期以服务器在握手结果中告知的 TTL 为准
+SESSION_CACHE = TTLCache(max_entries=64)
+
+POOL_MAX_SIZE = 8           # 每个连接池最多保持的连接数（空闲 + 使用中）；服务器每个连接占用一个工作线程
+POOL_IDLE_TIMEOUT = 30.0    # 空闲超过该时间（秒）的连接在下次取用时关闭
+
+
+def build_resume_request(lib, cache_key, server_nonce):
+    """
+    用 SESSION_CACHE 中的会话构造 REC_RESUME 记录；没有可用会话时返回 None
+    返回 (记录字节, 校验服务器回复所需的状态)，阻塞与 asyncio 客户端共用
+    """
+    entry = SESSION_CACHE.get(cache_key)
+    if entry is None:
+        return None
+    session_id, master_secret, cipher_name = entry
+    client_nonce = os.urandom(RESUME_NONCE_SIZE)
+    payload = encode_record(REC_RESUME, {
+        F_SESSION_ID: session_id,
+        F_NONCE: client_nonce,
+        F_PROOF: lib.resume_mac(master_secret, b"client resume", session_id, server_nonce, client_nonce),
+    })
+    return payload, (entry, server_nonce, client_nonce)
+
+
+def check_resume_result(lib, cache_key, record, state):
+    """校验服务器对会话恢复的回复：成功返回 (会话加密器, 算法名)；会话已失效返回 None 并移出缓存"""
+    if record is None or record.type != REC_HANDSHAKE_RESULT:
+        raise WireFormatError("未收到握手结果")
+    (session_id, master_secret, cipher_name), server_nonce, client_nonce = state
+    if record.get_str(F_STATUS) != "ok" or not record.get_uint(F_RESUMED):
+        SESSION_CACHE.pop(cache_key)
+        return None
+    expected = lib.resume_mac(master_secret, b"server resume", session_id, server_nonce, client_nonce)
+    if not hmac.compare_digest(expected, record.get_bytes(F_PROOF, b"")):
+        raise WireFormatError("服务器的会话恢复证明无效")
+    secret = lib.derive_resumed_secret(master_secret, server_nonce, client_nonce)
+    return lib.new_session_cipher(cipher_name, secret, ROLE_CLIENT), cipher_name
+
+
 class SecureTcpClient:
-    def __init__(self, user_id, is_hacker=False):
+    def __init__(self, user_id, is_hacker=False, server_host=SERVER_HOST, server_port=SERVER_PORT, resume=True,
+                 key_pool=None):
         self.user_id = user_id
         self.is_hacker = is_hacker # 标记是否为黑客
+        self.server_host = server_host
+        self.server_port = server_port
+        self.resume = resume  # 是否尝试用缓存的会话跳过 RSA 握手
+        self.last_resumed = False
         self.lib = SecureCommLib()
-        self.cert_client = CertificateClient(user_id)
+        self.cert_client = CertificateClient(user_id, key_pool=key_pool)
+        self._credentials = None  # (公钥 PEM, 证书文本)，首次完整握手时读入内存
         
         # 准备证书
         self.cert_path = os.path.join(KEYS_DIR, f"{user_id}_cert.sig")
@@ -40,58 +104,435 @@ class SecureTcpClient:
              Path("ca_keys").mkdir(exist_ok=True)
              self.cert_client.fetch_ca_public_key(self.ca_pub_path)
 
-    def connect_and_send(self, message):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    @staticmethod
+    def _decode_cert(cert_text: str) -> bytes:
+        """证书文件中保存的是 Base64 签名；二进制格式下发送原始签名字节"""
         try:
-            print(f"\n🚀 [{'Hacker' if self.is_hacker else 'Client'}] 开始连接服务器...")
-            sock.connect((SERVER_HOST, SERVER_PORT))
-            
-            # 1. 接收 Server 公钥
-            data = json.loads(sock.recv(8192).decode("utf-8"))
-            server_pub_str = data["public_key"]
-            temp_srv_key = os.path.join(KEYS_DIR, "temp_server_key.pem")
-            with open(temp_srv_key, "w") as f: f.write(server_pub_str)
-
-            # 2. 发送 {公钥, 证书, DES Key}
-            des_key = "SECRETPW" 
-            enc_des_key = self.lib.rsa_encrypt(des_key, temp_srv_key)
-            
+            return base64.b64decode(cert_text)
+        except (ValueError, TypeError):
+            return cert_text.encode("utf-8")
+
+    def _load_credentials(self):
+        """自己的公钥与证书只在首次使用时读取文件，之后的握手直接使用内存中的副本"""
+        if self._credentials is None:
             with open(self.cert_client.pub_path, "r") as f: my_pub = f.read()
             with open(self.cert_path, "r") as f: my_cert = f.read()
-            
-            sock.sendall(json.dumps({
-                "public_key": my_pub,
-                "certificate": my_cert,
-                "encrypted_des_key": enc_des_key
-            }).encode("utf-8"))
+            self._credentials = (my_pub, my_cert)
+        return self._credentials
+
+    def _session_key(self):
+        return (self.server_host, self.server_port, self.user_id)
+
+    def _resume_session(self, sock, reader, server_nonce):
+        """尝试恢复缓存的会话；成功返回 (会话加密器, 算法名)，否则返回 None（调用方改做完整握手）"""
+        request = build_resume_request(self.lib, self._session_key(), server_nonce)
+        if request is None:
+            return None
+        payload, state = request
+        sock.sendall(payload)
+        resumed = check_resume_result(self.lib, self._session_key(), reader.read_record(sock), state)
+        if resumed is None:
+            print("🔁 [Client] 会话已失效，改为完整握手。")
+        return resumed
+
+    def _open_session(self, sock):
+        """在已连接的套接字上完成握手（会话恢复或完整握手）；成功返回 (会话加密器, RecordReader, 是否二进制)，被拒绝返回 None"""
+        # 1. 接收 Server 公钥（服务器问候保持 JSON，并声明是否支持二进制线路格式）
+        data = recv_json_document(sock)
+        if data.get("status") == "busy":
+            print("🚦 [Client] 服务器繁忙（连接数已满），请稍后重试。")
+            return None
+        binary = WIRE_VERSION in data.get("wire", ())
+        server_nonce = base64.b64decode(data.get("nonce", ""))
+        reader = RecordReader()
+
+        # 1.5 二进制服务器：若缓存了未过期的会话，先尝试恢复（只需对称运算）
+        resumed = None
+        if binary and self.resume and server_nonce:
+            resumed = self._resume_session(sock, reader, server_nonce)
+
+        if resumed is not None:
+            cipher, cipher_name = resumed
+            self.last_resumed = True
+            print(f"♻️ [Client] 会话恢复成功，跳过 RSA 握手（{cipher_name}）。")
+        else:
+            # 服务器公钥直接以 PEM 字节传给 RSA 运算，KeyStore 按指纹缓存解析结果，不再写临时文件
+            server_pub = data["public_key"].encode("utf-8")
+
+            # 2. 发送 {公钥, 证书, 会话密钥, 支持的会话算法}
+            session_secret = self.lib.generate_session_secret()
+            my_pub, my_cert = self._load_credentials()
+
+            if binary:
+                # 新格式：证书签名与加密后的会话密钥都以原始字节发送
+                send_record(sock, REC_HANDSHAKE, {
+                    F_PUBLIC_KEY: my_pub.encode("utf-8"),
+                    F_CERTIFICATE: self._decode_cert(my_cert),
+                    F_ENC_SESSION_KEY: self.lib.rsa_encrypt_bytes(session_secret.encode("utf-8"), server_pub),
+                    F_CIPHERS: ",".join(SUPPORTED_CIPHERS),
+                })
+                record = reader.read_record(sock)
+                if record is None or record.type != REC_HANDSHAKE_RESULT:
+                    raise WireFormatError("未收到握手结果")
+                resp = {"status": record.get_str(F_STATUS), "msg": record.get_str(F_MESSAGE),
+                        "cipher": record.get_str(F_CIPHER)}
+                session_id = record.get_bytes(F_SESSION_ID)
+                session_ttl = record.get_uint(F_SESSION_TTL, 0)
+            else:
+                # 旧版服务器：JSON + Base64
+                enc_des_key = self.lib.rsa_encrypt(session_secret, server_pub)
+                sock.sendall(json.dumps({
+                    "public_key": my_pub,
+                    "certificate": my_cert,
+                    "encrypted_des_key": enc_des_key,
+                    "ciphers": list(SUPPORTED_CIPHERS)
+                }).encode("utf-8"))
+                resp = recv_json_document(sock)
+                session_id = None
 
             # 3. 等待鉴别结果
-            resp_raw = sock.recv(1024).decode("utf-8")
-            resp = json.loads(resp_raw)
-            
             if resp.get("status") == "error":
                 print(f"❌ [{'Hacker' if self.is_hacker else 'Client'}] 被服务器踢出！原因: {resp.get('msg')}")
-                return # 连接结束
+                return None # 连接结束
 
-            print(f"✅ [{'Client'}] 身份验证通过，进入加密通信模式。")
+            # 旧版服务器不返回 cipher 字段，此时按 DES 通信
+            cipher_name = resp.get("cipher") or CIPHER_DES
+            cipher = self.lib.new_session_cipher(cipher_name, session_secret, ROLE_CLIENT)
+            if session_id and session_ttl:
+                SESSION_CACHE.put(self._session_key(), (session_id, session_secret, cipher_name), ttl=session_ttl)
+            print(f"✅ [{'Client'}] 身份验证通过，进入加密通信模式（{cipher_name}，{'二进制' if binary else 'JSON'} 格式）。")
+        return cipher, reader, binary
+
+    def connect_and_send(self, message):
+        """完成握手并发送一条加密消息；返回解密后的回显（失败或被拒绝时返回 None）"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.last_resumed = False
+        try:
+            print(f"\n🚀 [{'Hacker' if self.is_hacker else 'Client'}] 开始连接服务器...")
+            sock.connect((self.server_host, self.server_port))
+            
+            session = self._open_session(sock)
+            if session is None:
+                return None
+            cipher, reader, binary = session
             
             # 4. 发送加密消息
             # ============ 关键修改：可视化密文 ============
-            enc_msg = self.lib.des_encrypt(message, des_key)
-            print(f"🔒 [Client] 明文: '{message}' -> 加密为: {enc_msg[:30]}...")
-            print(f"📤 [Client] 发送密文...")
-            sock.sendall(enc_msg.encode("utf-8"))
+            if binary:
+                enc_msg = cipher.encrypt(message.encode("utf-8"))
+                print(f"🔒 [Client] 明文: '{message}' -> 加密为: {enc_msg[:15].hex()}...")
+                print("📤 [Client] 发送密文...")
+                send_record(sock, REC_DATA, {F_PAYLOAD: enc_msg})
+
+                # 5. 接收回显
+                record = reader.read_record(sock)
+                if record is None:
+                    raise ConnectionError("服务器已关闭连接")
+                reply = cipher.decrypt(record.get_view(F_PAYLOAD)).decode('utf-8')
+            else:
+                enc_msg = self.lib.session_encrypt(message, cipher)
+                print(f"🔒 [Client] 明文: '{message}' -> 加密为: {enc_msg[:30]}...")
+                print("📤 [Client] 发送密文...")
+                sock.sendall(enc_msg.encode("utf-8"))
 
-            # 5. 接收回显
-            reply = sock.recv(4096).decode("utf-8")
-            print(f"📩 [Client] 收到回显: {self.lib.des_decrypt(reply, des_key)}")
+                # 5. 接收回显
+                reply = self.lib.session_decrypt(sock.recv(4096).decode("utf-8"), cipher)
+            print(f"📩 [Client] 收到回显: {reply}")
+            return reply
 
         except Exception as e:
             print(f"⚠️ 发生错误: {e}")
+            return None
         finally:
             sock.close()
 
+    def send_file(self, path, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        通过安全通道上传文件：按块流式加密发送，内存占用与文件大小无关
+        返回服务器确认的结果 {"size", "digest"}（失败时返回 None）
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.last_resumed = False
+        try:
+            print("\n🚀 [Client] 开始连接服务器（文件传输）...")
+            sock.connect((self.server_host, self.server_port))
+            session = self._open_session(sock)
+            if session is None:
+                return None
+            cipher, reader, binary = session
+            if not binary or not cipher.is_aead:
+                print("❌ [Client] 文件传输需要二进制线路格式与 AEAD 会话算法，当前服务器不支持。")
+                return None
+
+            size = os.path.getsize(path)
+            enc = StreamEncryptor(cipher, chunk_size)
+            # 文件名与大小同样加密传输
+            meta = json.dumps({"name": os.path.basename(path), "size": size}).encode("utf-8")
+            send_record(sock, REC_FILE_BEGIN, {F_STREAM_ID: enc.stream_id, F_PAYLOAD: cipher.encrypt(meta)})
+
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                src = _DigestReader(f)
+                for sealed, final in enc.iter_sealed(src):
+                    send_record(sock, REC_FILE_CHUNK, {F_FINAL: int(final), F_PAYLOAD: sealed})
+            print(f"📤 [Client] 已发送 {size} 字节（{enc.index} 块），等待服务器确认...")
+
+            record = reader.read_record(sock)
+            if record is None or record.type != REC_FILE_RESULT:
+                raise WireFormatError("未收到文件传输结果")
+            if record.get_str(F_STATUS) != "ok":
+                print(f"❌ [Client] 文件传输失败: {record.get_str(F_MESSAGE)}")
+                return None
+            result = {"size": record.get_uint(F_FILE_SIZE), "digest": record.get_str(F_DIGEST)}
+            if result["size"] != size or result["digest"] != src.hexdigest():
+                print("❌ [Client] 服务器确认的大小或摘要与本地不一致！")
+                return None
+            elapsed = time.perf_counter() - start
+            print(f"✅ [Client] 文件传输完成：{size} 字节，{size / elapsed / 1e6:.1f} MB/s，SHA-256 {result['digest'][:16]}...")
+            return result
+
+        except Exception as e:
+            print(f"⚠️ 发生错误: {e}")
+            return None
+        finally:
+            sock.close()
+
+
+class _DigestReader:
+    """包装文件对象，读取的同时计算明文 SHA-256"""
+
+    def __init__(self, f):
+        self._f = f
+        self._hash = hashlib.sha256()
+
+    def readinto(self, buf):
+        n = self._f.readinto(buf)
+        if n:
+            self._hash.update(memoryview(buf)[:n])
+        return n
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class _PooledConnection:
+    """连接池中的一条已认证连接：握手完成后可连续收发多条消息"""
+
+    __slots__ = ("sock", "cipher", "reader", "binary", "lib", "last_used", "uses")
+
+    def __init__(self, sock, cipher, reader, binary, lib):
+        self.sock = sock
+        self.cipher = cipher
+        self.reader = reader
+        self.binary = binary
+        self.lib = lib
+        self.last_used = time.monotonic()
+        self.uses = 0
+
+    def request(self, message: str) -> str:
+        """发送一条消息并等待回显"""
+        if self.binary:
+            send_record(self.sock, REC_DATA, {F_PAYLOAD: self.cipher.encrypt(message.encode("utf-8"))})
+            record = self.reader.read_record(self.sock)
+            if record is None or record.type != REC_DATA:
+                raise ConnectionError("服务器已关闭连接")
+            reply = self.cipher.decrypt(record.get_view(F_PAYLOAD)).decode("utf-8")
+        else:
+            self.sock.sendall(self.lib.session_encrypt(message, self.cipher).encode("utf-8"))
+            data = self.sock.recv(4096)
+            if not data:
+                raise ConnectionError("服务器已关闭连接")
+            reply = self.lib.session_decrypt(data.decode("utf-8"), self.cipher)
+        self.uses += 1
+        self.last_used = time.monotonic()
+        return reply
+
+    def is_healthy(self) -> bool:
+        """空闲连接的健康检查：对端已关闭或有未读数据（协议错位）都视为不可用"""
+        if self.binary and self.reader.buffered:
+            return False
+        try:
+            self.sock.setblocking(False)
+            try:
+                self.sock.recv(1, socket.MSG_PEEK)   # 读到 b"" 表示对端已关闭，读到数据表示协议错位
+                return False
+            finally:
+                self.sock.setblocking(True)
+        except (BlockingIOError, InterruptedError):
+            return True   # 没有数据可读：连接正常空闲
+        except OSError:
+            return False
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class PooledSecureTcpClient:
+    """
+    保持已认证会话的连接池：同一服务器的后续消息复用现有连接，省去 TCP 建连与握手
+    - 最多 max_size 条连接；全部在用时 send() 等待归还（可设超时）
+    - 空闲超过 idle_timeout 的连接在取用时关闭；复用前做健康检查，失效的连接被丢弃
+    - 复用的连接在发送中途失败时（例如服务器重启）自动换一条新连接重试一次
+    - 可在多个线程中共享同一个实例
+    """
+
+    def __init__(self, user_id, server_host=SERVER_HOST, server_port=SERVER_PORT, max_size=POOL_MAX_SIZE,
+                 idle_timeout=POOL_IDLE_TIMEOUT, resume=True, key_pool=None):
+        self.client = SecureTcpClient(user_id, server_host=server_host, server_port=server_port, resume=resume,
+                                      key_pool=key_pool)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle = deque()        # 空闲连接，右端为最近归还的
+        self._total = 0             # 空闲 + 使用中
+        self._cond = threading.Condition()
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0          # 健康检查失败或发送出错而丢弃的连接
+        self.expired = 0            # 因空闲超时关闭的连接
+        self.waits = 0              # 连接数已满、需要等待归还的次数
+
+    def send(self, message: str, timeout: float = None) -> str:
+        """通过池中的连接发送一条消息，返回解密后的回显；失败时抛出异常"""
+        conn, reused = self._acquire(timeout)
+        try:
+            reply = conn.request(message)
+        except (OSError, ValueError):
+            self._discard(conn)
+            if not reused:
+                raise
+            # 复用的连接可能已被服务器关闭：换一条新建的连接重试一次
+            conn, _ = self._acquire(timeout, fresh=True)
+            try:
+                reply = conn.request(message)
+            except BaseException:
+                self._discard(conn)
+                raise
+        except BaseException:
+            # 其他异常（如 KeyboardInterrupt）打断时连接停在请求中途，同样丢弃，否则占用的名额永远不会归还
+            self._discard(conn)
+            raise
+        self._release(conn)
+        return reply
+
+    def _acquire(self, timeout=None, fresh=False):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("连接池已关闭")
+                while self._idle and not fresh:
+                    conn = self._idle.pop()
+                    if time.monotonic() - conn.last_used > self.idle_timeout:
+                        self.expired += 1
+                    elif conn.is_healthy():
+                        self.reused += 1
+                        return conn, True
+                    else:
+                        self.discarded += 1
+                    self._total -= 1
+                    conn.close()
+                self._expire_idle()
+                if self._total < self.max_size:
+                    self._total += 1
+                    break
+                if fresh and self._idle:
+                    # 重试时池已满：关闭一条空闲连接腾出位置
+                    self.discarded += 1
+                    self._total -= 1
+                    self._idle.popleft().close()
+                    continue
+                self.waits += 1
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("等待可用连接超时")
+                self._cond.wait(remaining)
+
+        # 握手在锁外进行，不阻塞其他线程取用空闲连接
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.created += 1
+        return conn, False
+
+    def _connect(self) -> _PooledConnection:
+        sock = socket.create_connection((self.client.server_host, self.client.server_port))
+        try:
+            session = self.client._open_session(sock)
+        except BaseException:
+            sock.close()
+            raise
+        if session is None:
+            sock.close()
+            raise ConnectionError("服务器拒绝了握手")
+        cipher, reader, binary = session
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return _PooledConnection(sock, cipher, reader, binary, self.client.lib)
+
+    def _release(self, conn):
+        with self._cond:
+            if self._closed:
+                self._total -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def _discard(self, conn):
+        conn.close()
+        with self._cond:
+            self.discarded += 1
+            self._total -= 1
+            self._cond.notify()
+
+    def _expire_idle(self):
+        """关闭空闲过久的连接（调用方需持有锁）；最久未用的在左端"""
+        now = time.monotonic()
+        while self._idle and now - self._idle[0].last_used > self.idle_timeout:
+            self._idle.popleft().close()
+            self._total -= 1
+            self.expired += 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"open": self._total, "idle": len(self._idle), "created": self.created, "reused": self.reused,
+                    "discarded": self.discarded, "expired": self.expired, "waits": self.waits}
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._total -= 1
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="安全 TCP 客户端")
+    parser.add_argument("--user", default="user_test", help="用户 ID")
+    parser.add_argument("--message", default="Hello World", help="发送的消息")
+    parser.add_argument("--send-file", metavar="PATH", help="改为通过安全通道上传文件")
+    parser.add_argument("--host", default=SERVER_HOST, help="服务器地址")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="服务器端口")
+    args = parser.parse_args()
+
     # 默认为合法用户
-    client = SecureTcpClient("user_test")
-    client.connect_and_send("Hello World")
\ No newline at end of file
+    client = SecureTcpClient(args.user, server_host=args.host, server_port=args.port)
+    if args.send_file:
+        client.send_file(args.send_file)
+    else:
+        client.connect_and_send(args.message)
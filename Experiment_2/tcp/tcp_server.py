@@ -1,97 +1,603 @@
 #!/usr/bin/env python3
+import argparse
+import base64
+import contextlib
+import hashlib
+import hmac
 import socket
 import threading
+import time
 import json
 import os
+import signal
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from secure_comm_lib import SecureCommLib
+import instrumentation
+from secure_comm_lib import SecureCommLib, StreamDecryptor, RESUME_NONCE_SIZE, ROLE_SERVER
+from ttl_cache import TTLCache
+from wire_format import (
+    MAGIC, WIRE_VERSION, REC_HANDSHAKE, REC_HANDSHAKE_RESULT, REC_DATA, REC_RESUME,
+    REC_FILE_BEGIN, REC_FILE_CHUNK, REC_FILE_RESULT,
+    F_PUBLIC_KEY, F_CERTIFICATE, F_ENC_SESSION_KEY, F_CIPHERS, F_STATUS, F_MESSAGE,
+    F_CHALLENGE, F_MD5, F_CIPHER, F_PAYLOAD, F_SESSION_ID, F_SESSION_TTL, F_NONCE, F_PROOF, F_RESUMED,
+    F_FINAL, F_STREAM_ID, F_FILE_SIZE, F_DIGEST,
+    RecordReader, WireFormatError, encode_record, recv_json_document, send_record,
+)
 
 HOST = "0.0.0.0"
 PORT = 50000
 SERVER_DIR = "server_data"
+UPLOAD_DIR = os.path.join(SERVER_DIR, "uploads")
 CA_PUB_KEY = "ca_keys/ca_public_key.pem"
+SESSION_CACHE_SIZE = 10000  # 最多缓存的会话数，超出后淘汰最久未使用的
+SESSION_TTL = 300           # 会话有效期（秒），过期后客户端需重新完整握手
+SESSION_ID_SIZE = 16
+CERT_CACHE_SIZE = 4096      # 证书验证结果缓存的最大条目数
+CERT_CACHE_TTL = 600        # 验证通过的结果缓存时间（秒）
+CERT_NEGATIVE_TTL = 5       # 验证失败的结果只短暂缓存，挡住重复的伪造证书
+CONN_WORKERS = 64           # 处理连接的线程数（网络 IO 与对称加解密，后者在 C 扩展中释放 GIL）
+MAX_CONNECTIONS = 256       # 已接受但未处理完的连接上限（含排队等待线程的），超出时回复繁忙
+LISTEN_BACKLOG = 128
+MAX_UPLOAD_SIZE = 1 << 30   # 单个上传文件的大小上限（字节），防止客户端写满磁盘
+LATENCY_WINDOW = 4096       # 每个阶段保留的最近延迟样本数
+STAGES = ("queue_wait", "handshake", "verify", "decrypt", "echo")
+
+# ---------- RSA 工作进程 ----------
+# 每个工作进程启动时加载一次服务器私钥，握手中的 RSA 私钥解密在这里完成，不占用连接线程的 GIL
+_worker_lib = None
+_worker_key = None
+
+
+def _init_rsa_worker(private_key_path):
+    global _worker_lib, _worker_key
+    _worker_lib = SecureCommLib()
+    _worker_key = _worker_lib.load_key(private_key_path)
+
+
+def _decrypt_session_key(encrypted_key):
+    return _worker_lib.rsa_decrypt_bytes(encrypted_key, _worker_key)
+
+
+class FileUpload:
+    """
+    一次流式文件上传的接收状态（与 IO 方式无关，阻塞与 asyncio 服务器共用）
+    逐块校验解密并写入临时文件，commit() 时才原子替换为正式文件；abort() 丢弃临时文件
+    max_size 为大小上限（0 表示不限制）：声明的大小超限时在创建临时文件前拒绝，
+    实际收到的数据超限时在写入该块前拒绝
+    """
+
+    def __init__(self, cipher, begin, max_size=MAX_UPLOAD_SIZE):
+        meta = json.loads(cipher.decrypt(begin.get_view(F_PAYLOAD)))
+        self._dec = StreamDecryptor(cipher, begin.get_bytes(F_STREAM_ID))
+        # 只取文件名部分，防止路径穿越
+        self.name = os.path.basename(str(meta.get("name", ""))) or "upload.bin"
+        self.expected_size = meta.get("size")
+        self.max_size = max_size
+        if self.expected_size is not None and (not isinstance(self.expected_size, int) or self.expected_size < 0):
+            raise ValueError(f"文件大小无效: {self.expected_size!r}")
+        if max_size and self.expected_size is not None and self.expected_size > max_size:
+            raise ValueError(f"文件大小 {self.expected_size} 字节超过上限 {max_size} 字节")
+        Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
+        self.path = os.path.join(UPLOAD_DIR, self.name)
+        self._tmp = f"{self.path}.{self._dec.stream_id.hex()}.part"
+        self._digest = hashlib.sha256()
+        self.size = 0
+        self._file = open(self._tmp, "wb")
+
+    @property
+    def finished(self) -> bool:
+        return self._dec.finished
+
+    def add(self, record):
+        """处理一条 FILE_CHUNK 记录；认证失败或记录类型不符时抛出 ValueError"""
+        if record.type != REC_FILE_CHUNK:
+            raise ValueError(f"文件传输中收到意外的记录类型 {record.type}")
+        chunk = self._dec.open(record.get_view(F_PAYLOAD), bool(record.get_uint(F_FINAL, 0)))
+        if self.max_size and self.size + len(chunk) > self.max_size:
+            raise ValueError(f"已接收的数据超过上限 {self.max_size} 字节")
+        self._digest.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> bytes:
+        """全部数据块通过校验后落盘，返回成功的 FILE_RESULT 记录"""
+        self._file.close()
+        os.replace(self._tmp, self.path)
+        return encode_record(REC_FILE_RESULT, {F_STATUS: "ok", F_FILE_SIZE: self.size,
+                                               F_DIGEST: self._digest.hexdigest()})
+
+    def abort(self, error) -> bytes:
+        """丢弃临时文件，返回失败的 FILE_RESULT 记录"""
+        self._file.close()
+        with contextlib.suppress(OSError):
+            os.remove(self._tmp)
+        return encode_record(REC_FILE_RESULT, {F_STATUS: "error", F_MESSAGE: str(error)})
+
 
 class SecureTcpServer:
-    def __init__(self):
+    def __init__(self, conn_workers=CONN_WORKERS, rsa_workers=None, max_connections=MAX_CONNECTIONS, ca_key_path=None,
+                 max_upload_size=MAX_UPLOAD_SIZE):
         self.lib = SecureCommLib()
+        self.max_upload_size = max_upload_size
         Path(SERVER_DIR).mkdir(exist_ok=True)
         self.priv_path = os.path.join(SERVER_DIR, "server_private.pem")
         self.pub_path = os.path.join(SERVER_DIR, "server_public.pem")
         
         if not os.path.exists(self.priv_path):
-            self.lib.generate_rsa_keypair(key_dir=SERVER_DIR)
-            os.rename(os.path.join(SERVER_DIR, "private_key.pem"), self.priv_path)
-            os.rename(os.path.join(SERVER_DIR, "public_key.pem"), self.pub_path)
+            self.lib.create_rsa_keypair_files(self.priv_path, self.pub_path)
+
+        # 握手中反复用到的数据在启动时准备好；私钥首次使用后由 KeyStore 缓存
+        with open(self.pub_path, "r") as f:
+            self.server_pub_pem = f.read()
+        # 问候的 JSON 前半部分固定不变，每个连接只需拼接本次的随机 nonce（会话恢复用）
+        hello = json.dumps({"public_key": self.server_pub_pem, "wire": [WIRE_VERSION]})
+        self._hello_head = hello[:-1].encode("utf-8") + b', "nonce": "'
+        self.ca_key_path = os.path.abspath(ca_key_path or os.path.join(os.path.dirname(__file__), "..", CA_PUB_KEY))
+        # 会话缓存：会话 ID -> (算法名, 会话密钥材料)，有界且会过期
+        self.sessions = TTLCache(max_entries=SESSION_CACHE_SIZE, ttl=SESSION_TTL)
+        # 证书验证结果缓存：摘要(公钥, 证书, CA 公钥) -> 是否有效；CA 公钥变化时整体清空
+        self.cert_cache = TTLCache(max_entries=CERT_CACHE_SIZE, ttl=CERT_CACHE_TTL)
+        self._ca_key = None
+        self._ca_fingerprint = b""
+        self._ca_lock = threading.Lock()
+
+        # 并发控制：固定大小的连接线程池 + RSA 进程池，超过 max_connections 的新连接直接拒绝
+        self.conn_workers = conn_workers
+        self.rsa_workers = rsa_workers or os.cpu_count() or 1
+        self.max_connections = max(max_connections, conn_workers)
+        self.conn_pool = None
+        self.rsa_pool = None
+        self._stats_lock = threading.Lock()
+        self.pending = 0    # 已接受、尚未处理完的连接（排队 + 处理中）
+        self.active = 0     # 正在由工作线程处理的连接
+        self.accepted = 0
+        self.rejected = 0
+        self._latencies = {stage: deque(maxlen=LATENCY_WINDOW) for stage in STAGES}
+
+    def _server_hello(self, nonce: bytes) -> bytes:
+        return self._hello_head + base64.b64encode(nonce) + b'"}'
+
+    def start(self, host=HOST, port=PORT, stats_interval=0):
+        # 先创建并预热进程池再绑定端口，避免工作进程继承监听套接字
+        self.rsa_pool = ProcessPoolExecutor(max_workers=self.rsa_workers, initializer=_init_rsa_worker,
+                                            initargs=(os.path.abspath(self.priv_path),))
+        list(self.rsa_pool.map(abs, range(self.rsa_workers)))
+        self.conn_pool = ThreadPoolExecutor(max_workers=self.conn_workers, thread_name_prefix="conn")
+        if threading.current_thread() is threading.main_thread():
+            # 被 terminate() 时也要走 finally 关闭进程池，避免遗留工作进程
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
-    def start(self):
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        sock.bind((HOST, PORT))
-        sock.listen(5)
-        print(f"✅ [Server] 安全文件服务器启动 (TCP {HOST}:{PORT})")
+        sock.bind((host, port))
+        sock.listen(LISTEN_BACKLOG)
+        print(f"✅ [Server] 安全文件服务器启动 (TCP {host}:{port}，{self.conn_workers} 个连接线程，"
+              f"{self.rsa_workers} 个 RSA 进程)")
         print("ℹ️  [Server] 等待安全连接...")
-        
+        if stats_interval > 0:
+            threading.Thread(target=self._report_stats, args=(stats_interval,), daemon=True).start()
+
+        try:
+            while True:
+                conn, addr = sock.accept()
+                # 接收线程只负责准入判断和分发，握手与加解密都在工作线程 / 进程中完成
+                with self._stats_lock:
+                    admitted = self.pending < self.max_connections
+                    if admitted:
+                        self.pending += 1
+                        self.accepted += 1
+                    else:
+                        self.rejected += 1
+                if admitted:
+                    self.conn_pool.submit(self._run_client, conn, addr, time.perf_counter())
+                else:
+                    self._reject(conn, addr)
+        except KeyboardInterrupt:
+            print("[Server] 服务已停止")
+        finally:
+            sock.close()
+            self.conn_pool.shutdown(wait=False, cancel_futures=True)
+            self.rsa_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _reject(self, conn, addr):
+        """连接数已满：用 JSON 问候告知客户端繁忙后关闭，不占用工作线程"""
+        print(f"🚦 [Server] 连接数已达上限 {self.max_connections}，拒绝 {addr}")
+        try:
+            conn.sendall(b'{"status": "busy", "msg": "Server busy"}')
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def _run_client(self, conn, addr, accepted_at):
+        self._record("queue_wait", time.perf_counter() - accepted_at)
+        with self._stats_lock:
+            self.active += 1
+        try:
+            self.handle_client(conn, addr)
+        finally:
+            with self._stats_lock:
+                self.active -= 1
+                self.pending -= 1
+
+    def _record(self, stage, seconds):
+        with self._stats_lock:
+            self._latencies[stage].append(seconds)
+
+    def _report_stats(self, interval):
+        """定期打印连接、各阶段延迟与缓存命中统计"""
         while True:
-            conn, addr = sock.accept()
-            threading.Thread(target=self.handle_client, args=(conn, addr), daemon=True).start()
+            time.sleep(interval)
+            print(f"📊 [Server] 运行统计: {json.dumps(self.stats(), ensure_ascii=False)}", flush=True)
 
     def handle_client(self, conn, addr):
         print(f"\n🔗 [Server] 客户端 {addr} 尝试连接...")
+        reader = RecordReader()
+        started = time.perf_counter()
         try:
-            # 1. 发送服务器公钥
-            with open(self.pub_path, "r") as f: server_pub = f.read()
-            conn.sendall(json.dumps({"public_key": server_pub}).encode("utf-8"))
-
-            # 2. 接收客户端握手包
-            data = json.loads(conn.recv(8192).decode("utf-8"))
-            client_pub = data["public_key"]
-            client_cert = data["certificate"]
-            enc_des_key = data["encrypted_des_key"]
-
-            # ============ 关键修改：CA 验证展示 ============
-            print(f"🔍 [Server] 正在向 CA 验证客户端证书...")
-            ca_key_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", CA_PUB_KEY))
-            
-            # 验证签名：证明该公钥确实是由 CA 签发的
-            if not self.lib.verify_signature(client_pub, client_cert, ca_key_path):
-                print(f"❌ [Server] 警告：证书验证失败！客户端可能是黑客伪装。")
-                print(f"🚫 [Server] 拒绝连接。")
-                conn.sendall(json.dumps({"status": "error", "msg": "Certificate Verification Failed"}).encode("utf-8"))
-                conn.close()
-                return
-            else:
-                print(f"✅ [Server] 证书验证通过，客户端身份合法。")
-            # ============================================
-
-            # 4. 解密 DES 密钥
-            des_key = self.lib.rsa_decrypt(enc_des_key, self.priv_path)
-            print(f"🔑 [Server] 成功解密 DES 会话密钥")
+            # 1. 发送服务器公钥（保持 JSON 以兼容旧客户端，并声明支持二进制线路格式）
+            server_nonce = os.urandom(RESUME_NONCE_SIZE)
+            conn.sendall(self._server_hello(server_nonce))
 
-            # 5. 端点鉴别 (MD5)
-            auth_challenge = "ServerAuthRequest"
-            md5_val = self.lib.md5_digest(auth_challenge)
-            conn.sendall(json.dumps({"status": "ok", "challenge": auth_challenge, "md5": md5_val}).encode("utf-8"))
+            # 2. 接收客户端握手包（二进制记录或旧版 JSON）；二进制客户端可先尝试恢复会话
+            handshake = self._read_client_handshake(conn, reader)
+            if handshake is None:
+                return
+            binary = handshake["binary"]
+            cipher = None
+            if handshake.get("resume"):
+                cipher = self._resume_session(conn, handshake, server_nonce)
+                if cipher is None:
+                    # 会话不存在或已过期：客户端会在同一连接上改发完整握手
+                    handshake = self._read_client_handshake(conn, reader)
+                    if handshake is None or handshake.get("resume"):
+                        return
+            if cipher is None:
+                cipher = self._full_handshake(conn, handshake)
+                if cipher is None:
+                    return
+            self._record("handshake", time.perf_counter() - started)
 
-            while True:
-                encrypted_msg = conn.recv(4096).decode("utf-8")
-                if not encrypted_msg: break
-                
-                # ============ 关键修改：可视化密文 ============
-                print(f"👀 [网络嗅探] Server 收到密文: {encrypted_msg[:30]}...")
-                
-                msg = self.lib.des_decrypt(encrypted_msg, des_key)
-                print(f"🔓 [Server] 解密后明文: {msg}")
-                
-                reply = f"Server收到: {msg}"
-                conn.sendall(self.lib.des_encrypt(reply, des_key).encode("utf-8"))
+            if binary:
+                self._serve_binary(conn, reader, cipher)
+            else:
+                self._serve_json(conn, cipher)
 
         except Exception as e:
             print(f"⚠️ [Server] 连接异常: {e}")
         finally:
             conn.close()
 
+    def _full_handshake(self, conn, handshake):
+        """完整握手：CA 验证证书 + RSA 解密会话密钥；成功返回会话加密器，失败返回 None"""
+        binary = handshake["binary"]
+        # 新版客户端会附带支持的会话算法列表；旧客户端没有该字段，回退 DES
+        cipher_name = self.lib.negotiate_cipher(handshake["ciphers"])
+
+        # ============ 关键修改：CA 验证展示 ============
+        print("🔍 [Server] 正在向 CA 验证客户端证书...")
+
+        # 验证签名：证明该公钥确实是由 CA 签发的（同一证书的验证结果会被缓存）
+        t0 = time.perf_counter()
+        valid, cached = self._verify_certificate(handshake["public_key"], handshake["certificate"])
+        self._record("verify", time.perf_counter() - t0)
+        if not valid:
+            print(f"❌ [Server] 警告：证书验证失败！客户端可能是黑客伪装。{'（命中缓存）' if cached else ''}")
+            print("🚫 [Server] 拒绝连接。")
+            self._send_result(conn, binary, status="error", msg="Certificate Verification Failed")
+            return None
+        else:
+            print(f"✅ [Server] 证书验证通过，客户端身份合法。{'（命中缓存）' if cached else ''}")
+        # ============================================
+
+        # 4. 解密会话密钥，创建会话加密器
+        session_secret = self._decrypt_session_key(handshake["encrypted_key"]).decode("utf-8")
+        cipher, result = self._establish_session(binary, cipher_name, session_secret)
+        print(f"🔑 [Server] 成功解密会话密钥，协商算法: {cipher_name}（{'二进制' if binary else 'JSON'} 格式）")
+
+        # 5. 端点鉴别 (MD5)
+        conn.sendall(result)
+        return cipher
+
+    def _establish_session(self, binary, cipher_name, session_secret):
+        """完整握手的收尾：创建会话加密器，二进制客户端另获得会话 ID；返回 (会话加密器, 握手结果字节)"""
+        cipher = self.lib.new_session_cipher(cipher_name, session_secret, ROLE_SERVER)
+        # 二进制客户端获得会话 ID，下次连接可凭它跳过 RSA
+        session_id = None
+        if binary:
+            session_id = os.urandom(SESSION_ID_SIZE)
+            self.sessions.put(session_id, (cipher_name, session_secret))
+        auth_challenge = "ServerAuthRequest"
+        md5_val = self.lib.md5_digest(auth_challenge)
+        result = self._result_bytes(binary, status="ok", challenge=auth_challenge, md5=md5_val, cipher=cipher_name,
+                                    extra={F_SESSION_ID: session_id,
+                                           F_SESSION_TTL: SESSION_TTL if session_id else None})
+        return cipher, result
+
+    def _decrypt_session_key(self, encrypted_key) -> bytes:
+        """RSA 私钥解密会话密钥：交给进程池；未通过 start() 启动（没有进程池）时在当前线程完成"""
+        t0 = time.perf_counter()
+        try:
+            if self.rsa_pool is None:
+                return self.lib.rsa_decrypt_bytes(encrypted_key, self.priv_path)
+            return self.rsa_pool.submit(_decrypt_session_key, bytes(encrypted_key)).result()
+        finally:
+            self._record("decrypt", time.perf_counter() - t0)
+
+    def _verify_certificate(self, public_key: bytes, certificate: bytes):
+        """
+        带缓存的证书验证，返回 (是否有效, 是否命中缓存)
+        - 缓存键为 (客户端公钥, 证书, CA 公钥指纹) 的 SHA-256 摘要
+        - CA 公钥经 KeyStore 缓存，文件更新后得到新的密钥对象，此时清空全部旧结果
+        - 验证失败的结果只保留 CERT_NEGATIVE_TTL 秒
+        """
+        ca_key = self.lib.load_key(self.ca_key_path)
+        if ca_key is not self._ca_key:
+            with self._ca_lock:
+                if ca_key is not self._ca_key:
+                    self._ca_fingerprint = hashlib.sha256(f"{ca_key.n}:{ca_key.e}".encode("ascii")).digest()
+                    self._ca_key = ca_key
+                    self.cert_cache.clear()
+
+        h = hashlib.sha256(self._ca_fingerprint)
+        for part in (public_key, certificate):
+            h.update(len(part).to_bytes(4, "big"))
+            h.update(part)
+        digest = h.digest()
+
+        valid = self.cert_cache.get(digest)
+        if valid is not None:
+            return valid, True
+        valid = self.lib.verify_signature_bytes(public_key, certificate, ca_key)
+        self.cert_cache.put(digest, valid, ttl=None if valid else CERT_NEGATIVE_TTL)
+        return valid, False
+
+    def stats(self) -> dict:
+        """连接计数、各阶段最近延迟（毫秒）与缓存统计"""
+        with self._stats_lock:
+            result = {
+                "connections": {
+                    "active": self.active,
+                    "queued": self.pending - self.active,
+                    "accepted": self.accepted,
+                    "rejected": self.rejected,
+                },
+            }
+            samples = {stage: sorted(v * 1e3 for v in values) for stage, values in self._latencies.items()}
+        result["stages_ms"] = {}
+        for stage, values in samples.items():
+            if not values:
+                result["stages_ms"][stage] = None
+                continue
+            result["stages_ms"][stage] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": values[(len(values) - 1) // 2],
+                "p99": values[min(len(values) - 1, int(len(values) * 0.99))],
+                "max": values[-1],
+            }
+        result["caches"] = self.cache_stats()
+        return result
+
+    def cache_stats(self) -> dict:
+        """各级缓存的命中 / 未命中统计"""
+        return {
+            "cert_cache": self.cert_cache.stats(),
+            "sessions": self.sessions.stats(),
+            "key_store": self.lib.key_store.stats(),
+        }
+
+    def _resume_session(self, conn, handshake, server_nonce):
+        """
+        会话恢复：只做 HMAC 校验与密钥派生，不涉及任何 RSA 运算
+        客户端需证明持有原会话密钥材料；本次连接的密钥由原材料和双方新鲜 nonce 派生
+        """
+        cipher, cipher_name, result = self._check_resume(handshake, server_nonce)
+        conn.sendall(result)
+        if cipher is None:
+            print("🔁 [Server] 会话恢复失败（会话不存在、已过期或证明无效），改为完整握手。")
+        else:
+            print(f"♻️ [Server] 会话恢复成功，跳过证书验证与 RSA 解密，算法: {cipher_name}")
+        return cipher
+
+    def _check_resume(self, handshake, server_nonce):
+        """校验会话恢复请求，返回 (会话加密器或 None, 算法名, 应回复的握手结果字节)"""
+        session_id = handshake["session_id"]
+        client_nonce = handshake["client_nonce"]
+        entry = self.sessions.get(session_id)
+        if entry is not None:
+            cipher_name, master_secret = entry
+            expected = self.lib.resume_mac(master_secret, b"client resume", session_id, server_nonce, client_nonce)
+            if not hmac.compare_digest(expected, handshake["proof"]):
+                entry = None
+        if entry is None:
+            return None, None, encode_record(REC_HANDSHAKE_RESULT, {F_STATUS: "resume_failed"})
+
+        secret = self.lib.derive_resumed_secret(master_secret, server_nonce, client_nonce)
+        cipher = self.lib.new_session_cipher(cipher_name, secret, ROLE_SERVER)
+        auth_challenge = "ServerAuthRequest"
+        result = self._result_bytes(True, status="ok", challenge=auth_challenge,
+                                    md5=self.lib.md5_digest(auth_challenge), cipher=cipher_name, extra={
+                                        F_RESUMED: 1,
+                                        # 服务器同样证明自己持有原会话密钥
+                                        F_PROOF: self.lib.resume_mac(master_secret, b"server resume", session_id,
+                                                                     server_nonce, client_nonce),
+                                    })
+        return cipher, cipher_name, result
+
+    def _read_client_handshake(self, conn, reader):
+        """读取客户端握手，统一转换为原始字节字段；根据首字节区分二进制记录与旧版 JSON"""
+        if not reader.recv_from(conn):
+            return None
+        if reader.peek_byte() == MAGIC:
+            record = reader.read_record(conn)
+            if record is None:
+                return None
+            return self._handshake_from_record(record)
+
+        data = recv_json_document(conn, reader.take_pending())
+        if data is None:
+            return None
+        return self._handshake_from_json(data)
+
+    @staticmethod
+    def _handshake_from_record(record):
+        """二进制握手记录 -> 统一的握手字典"""
+        if record.type == REC_RESUME:
+            return {
+                "binary": True,
+                "resume": True,
+                "session_id": record.get_bytes(F_SESSION_ID, b""),
+                "client_nonce": record.get_bytes(F_NONCE, b""),
+                "proof": record.get_bytes(F_PROOF, b""),
+            }
+        if record.type != REC_HANDSHAKE:
+            raise WireFormatError("期望握手记录")
+        return {
+            "binary": True,
+            "public_key": record.get_bytes(F_PUBLIC_KEY, b""),
+            "certificate": record.get_bytes(F_CERTIFICATE, b""),
+            "encrypted_key": record.get_bytes(F_ENC_SESSION_KEY, b""),
+            "ciphers": [c for c in record.get_str(F_CIPHERS, "").split(",") if c],
+        }
+
+    @staticmethod
+    def _handshake_from_json(data):
+        """旧版 JSON 握手 -> 统一的握手字典（证书与会话密钥从 Base64 还原为字节）"""
+        with instrumentation.span("base64.decode"):
+            try:
+                certificate = base64.b64decode(data["certificate"])
+            except (ValueError, TypeError):
+                certificate = b""  # 非法 Base64 证书，交给验签环节拒绝
+            encrypted_key = base64.b64decode(data["encrypted_des_key"])
+        return {
+            "binary": False,
+            "public_key": data["public_key"].encode("utf-8"),
+            "certificate": certificate,
+            "encrypted_key": encrypted_key,
+            "ciphers": data.get("ciphers"),
+        }
+
+    def _send_result(self, conn, binary, status, msg=None, challenge=None, md5=None, cipher=None, extra=None):
+        """发送握手结果：二进制记录或旧版 JSON（extra 为仅二进制格式携带的附加字段）"""
+        conn.sendall(self._result_bytes(binary, status, msg, challenge, md5, cipher, extra))
+
+    @staticmethod
+    def _result_bytes(binary, status, msg=None, challenge=None, md5=None, cipher=None, extra=None) -> bytes:
+        if binary:
+            fields = {F_STATUS: status, F_MESSAGE: msg, F_CHALLENGE: challenge, F_MD5: md5, F_CIPHER: cipher}
+            if extra:
+                fields.update(extra)
+            return encode_record(REC_HANDSHAKE_RESULT, fields)
+        resp = {"status": status}
+        if msg is not None:
+            resp["msg"] = msg
+        if challenge is not None:
+            resp.update({"challenge": challenge, "md5": md5, "cipher": cipher})
+        with instrumentation.span("json.encode"):
+            return json.dumps(resp).encode("utf-8")
+
+    def _serve_binary(self, conn, reader, cipher):
+        """二进制数据阶段：每条 DATA 记录携带原始密文，按记录边界读取"""
+        while True:
+            record = reader.read_record(conn)
+            if record is None:
+                break
+            if record.type == REC_FILE_BEGIN:
+                self._receive_file(conn, reader, cipher, record)
+                continue
+            if record.type != REC_DATA:
+                continue
+            t0 = time.perf_counter()
+            encrypted_msg = record.get_view(F_PAYLOAD)
+
+            # ============ 关键修改：可视化密文 ============
+            print(f"👀 [网络嗅探] Server 收到密文: {bytes(encrypted_msg[:15]).hex()}...")
+
+            msg = cipher.decrypt(encrypted_msg).decode("utf-8")
+            print(f"🔓 [Server] 解密后明文: {msg}")
+
+            reply = f"Server收到: {msg}"
+            send_record(conn, REC_DATA, {F_PAYLOAD: cipher.encrypt(reply.encode("utf-8"))})
+            self._record("echo", time.perf_counter() - t0)
+
+    def _receive_file(self, conn, reader, cipher, begin):
+        """
+        接收一次流式文件上传：逐块校验解密并写入临时文件，全部通过后才原子替换为正式文件
+        任一块认证失败或连接中途断开都会丢弃临时文件，不会留下半个文件
+        """
+        try:
+            upload = FileUpload(cipher, begin, self.max_upload_size)
+        except (ValueError, KeyError, OSError) as e:
+            print(f"❌ [Server] 拒绝文件上传: {e}")
+            send_record(conn, REC_FILE_RESULT, {F_STATUS: "error", F_MESSAGE: f"文件头无效: {e}"})
+            return
+        print(f"📥 [Server] 开始接收文件 {upload.name}（{upload.expected_size} 字节）")
+
+        try:
+            while not upload.finished:
+                record = reader.read_record(conn)
+                if record is None:
+                    raise ValueError("连接在文件传输中途断开")
+                upload.add(record)
+            result = upload.commit()
+        except (ValueError, OSError) as e:
+            print(f"❌ [Server] 文件 {upload.name} 接收失败: {e}")
+            result = upload.abort(e)
+            with contextlib.suppress(OSError):
+                conn.sendall(result)
+            return
+        except BaseException:
+            # 取消、EOFError 等其它异常：同样关闭并删除临时文件，再照常向上传递
+            upload.abort("接收中断")
+            raise
+
+        print(f"✅ [Server] 文件已保存: {upload.path}（{upload.size} 字节）")
+        conn.sendall(result)
+
+    def _serve_json(self, conn, cipher):
+        """旧版数据阶段：Base64 文本密文，每次 recv 视为一条消息"""
+        while True:
+            encrypted_msg = conn.recv(4096).decode("utf-8")
+            if not encrypted_msg: break
+            t0 = time.perf_counter()
+
+            # ============ 关键修改：可视化密文 ============
+            print(f"👀 [网络嗅探] Server 收到密文: {encrypted_msg[:30]}...")
+
+            msg = self.lib.session_decrypt(encrypted_msg, cipher)
+            print(f"🔓 [Server] 解密后明文: {msg}")
+
+            reply = f"Server收到: {msg}"
+            conn.sendall(self.lib.session_encrypt(reply, cipher).encode("utf-8"))
+            self._record("echo", time.perf_counter() - t0)
+
 if __name__ == "__main__":
-    SecureTcpServer().start()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="安全 TCP 服务器")
+    parser.add_argument("--host", default=HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=PORT, help="监听端口")
+    parser.add_argument("--stats-interval", type=float, default=0, help="每隔多少秒打印运行统计（0 表示不打印）")
+    parser.add_argument("--conn-workers", type=int, default=CONN_WORKERS, help="处理连接的线程数")
+    parser.add_argument("--rsa-workers", type=int, default=0, help="RSA 解密进程数（0 表示 CPU 核数）")
+    parser.add_argument("--max-connections", type=int, default=MAX_CONNECTIONS, help="同时接受的连接上限（含排队）")
+    parser.add_argument("--ca-key", help="CA 公钥文件（默认为 Experiment_2/ca_keys/ca_public_key.pem）")
+    parser.add_argument("--max-upload-size", type=int, default=MAX_UPLOAD_SIZE,
+                        help="单个上传文件的大小上限（字节，0 表示不限制）")
+    parser.add_argument("--instrument", action="store_true", help="开启插桩，收到 SIGUSR1 时打印统计快照")
+    parser.add_argument("--stats-port", type=int, default=0, help="在本机该端口提供插桩统计 HTTP 端点（0 表示关闭）")
+    args = parser.parse_args()
+    server = SecureTcpServer(conn_workers=args.conn_workers, rsa_workers=args.rsa_workers,
+                             max_connections=args.max_connections, ca_key_path=args.ca_key,
+                             max_upload_size=args.max_upload_size)
+    if args.instrument or args.stats_port:
+        instrumentation.enable()
+        instrumentation.add_provider("server", server.stats)
+        instrumentation.install_signal_handler()
+    if args.stats_port:
+        instrumentation.start_stats_server(args.stats_port)
+        print(f"📊 [Server] 插桩统计端点: http://127.0.0.1:{args.stats_port}/stats")
+    server.start(args.host, args.port, args.stats_interval)
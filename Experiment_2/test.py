@@ -1,8 +1,10 @@
 import subprocess
-import time
 import os
 import sys
 
+sys.path.append("bench")
+from harness import wait_ca, wait_tcp
+
 # 辅助函数：打印分割线
 def print_banner(text):
     print("\n" + "="*60)
@@ -13,19 +15,20 @@ def run_test():
     print_banner("启动基础设施 (CA中心 & 应用服务器)")
     
     # 1. 启动 CA
+    # 主动探测端口就绪，而不是固定 sleep（首次运行生成密钥时启动较慢）
     ca_process = subprocess.Popen([sys.executable, "udp/udp_server.py"])
-    time.sleep(1) 
+    wait_ca(50001, ca_process)
 
     # 2. 启动 Server
     tcp_server_process = subprocess.Popen([sys.executable, "tcp/tcp_server.py"])
-    time.sleep(1)
+    wait_tcp(50000, tcp_server_process)
 
     # 3. 场景一：合法用户
     print_banner("场景一：合法用户 Alice (展示加密效果)")
     print("说明：Alice 向 CA 申请证书，并与 Server 进行 DES 加密通信。\n")
     
     # 我们直接调用 Client 代码中的类，而不是 subprocess，以便更好控制参数
-    # 但为了模拟真实进程环境，这里创建一个临时脚本来运行合法 Client
+    # 但为了模拟真实进程环境，这里在独立的子进程中运行合法 Client
     alice_script = """
 import sys
 import os
@@ -34,9 +37,7 @@ from tcp_client import SecureTcpClient
 alice = SecureTcpClient("Alice", is_hacker=False)
 alice.connect_and_send("My Secret Password is 123456")
 """
-    with open("temp_alice.py", "w", encoding='utf-8') as f: f.write(alice_script)
-    subprocess.call([sys.executable, "temp_alice.py"])
-    time.sleep(1)
+    subprocess.call([sys.executable, "-c", alice_script])
 
     # 4. 场景二：黑客攻击
     print_banner("场景二：黑客 Mallory (展示 CA 防御作用)")
@@ -51,15 +52,14 @@ from tcp_client import SecureTcpClient
 mallory = SecureTcpClient("Mallory", is_hacker=True)
 mallory.connect_and_send("I want to hack you")
 """
-    with open("temp_mallory.py", "w", encoding='utf-8') as f: f.write(mallory_script)
-    subprocess.call([sys.executable, "temp_mallory.py"])
+    subprocess.call([sys.executable, "-c", mallory_script])
 
     # 清理
     print_banner("测试结束，正在清理环境...")
     ca_process.terminate()
     tcp_server_process.terminate()
-    if os.path.exists("temp_alice.py"): os.remove("temp_alice.py")
-    if os.path.exists("temp_mallory.py"): os.remove("temp_mallory.py")
+    ca_process.wait()
+    tcp_server_process.wait()
     print("✅ 演示完成")
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+# 文件路径: Experiment_2/udp/async_udp_client.py
+#!/usr/bin/env python3
+"""
+CA 中心的 asyncio 客户端：与阻塞的 CertificateClient 使用相同的 JSON 数据报协议
+- 每个请求使用独立的数据报端点（独立的本地端口），回复天然与请求对应，
+  大量协程可同时向 CA 申请证书而不会收到彼此的回复
+- 超时或 CA 繁忙（"CA busy"）时按指数退避（带随机抖动）重发；
+  register 对同一公钥是幂等的（CA 直接返回登记的证书），重发是安全的
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+import udp_client
+from secure_comm_lib import SecureCommLib
+
+REQUEST_TIMEOUT = 2.0       # 首次等待回复的时间（秒），之后指数退避
+MAX_TIMEOUT = 8.0
+REQUEST_RETRIES = 4
+BUSY_MESSAGE = "CA busy, retry later"
+
+
+class _RequestProtocol(asyncio.DatagramProtocol):
+    """一次请求的数据报端点：收到第一个可解析的回复即完成"""
+
+    def __init__(self):
+        self.reply = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        if self.reply.done():
+            return
+        try:
+            self.reply.set_result(json.loads(data.decode("utf-8")))
+        except ValueError:
+            pass  # 损坏的数据报当作丢失，等待重发
+
+    def error_received(self, exc):
+        # ICMP 端口不可达等错误（CA 尚未启动）：同样等待超时后重发
+        pass
+
+
+class AsyncCertificateClient:
+    def __init__(self, host=None, port=None, timeout=REQUEST_TIMEOUT, retries=REQUEST_RETRIES):
+        # 未指定时在调用时读取 udp_client 的模块配置，与阻塞客户端保持一致
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+
+    async def request(self, payload: dict) -> dict:
+        """发送一个请求并等待回复；超时或 CA 繁忙时重发，全部失败抛出 TimeoutError"""
+        loop = asyncio.get_running_loop()
+        addr = (self.host or udp_client.CA_HOST, self.port or udp_client.CA_PORT)
+        data = json.dumps(payload).encode("utf-8")
+        timeout = self.timeout
+        last = None
+        for attempt in range(self.retries + 1):
+            transport, protocol = await loop.create_datagram_endpoint(_RequestProtocol, remote_addr=addr)
+            try:
+                transport.sendto(data)
+                try:
+                    last = await asyncio.wait_for(protocol.reply, timeout)
+                except asyncio.TimeoutError:
+                    last = None
+            finally:
+                transport.close()
+            if last is not None and last.get("message") != BUSY_MESSAGE:
+                return last
+            if attempt < self.retries:
+                # 超时已经等待过一个周期；CA 繁忙则先退避再重发
+                if last is not None:
+                    await asyncio.sleep(timeout * random.uniform(0.8, 1.2))
+                timeout = min(timeout * 2, MAX_TIMEOUT)
+        if last is not None:
+            return last
+        raise TimeoutError(f"CA {addr[0]}:{addr[1]} 无响应")
+
+    async def register(self, user_id: str, public_key: str) -> str:
+        """申请证书，返回证书文本；CA 拒绝时抛出 RuntimeError"""
+        resp = await self.request({"action": "register", "user_id": user_id, "public_key": public_key})
+        if resp.get("status") != "ok":
+            raise RuntimeError(f"证书申请失败: {resp.get('message')}")
+        return resp["certificate"]
+
+    async def fetch_ca_public_key(self) -> str:
+        resp = await self.request({"action": "get_ca_key"})
+        if resp.get("status") != "ok":
+            raise RuntimeError(f"获取 CA 公钥失败: {resp.get('message')}")
+        return resp["public_key"]
+
+    async def lookup_certificate(self, **query) -> dict:
+        """按 user_id / public_key / fingerprint 查询 CA 登记表"""
+        return await self.request({"action": "lookup", **query})
+
+    async def fetch_stats(self) -> dict:
+        return await self.request({"action": "stats"})
+
+
+async def obtain_certificate(user_id, key_pool=None, ca_client=None):
+    """
+    确保用户持有密钥对与证书（KEYS_DIR 下与阻塞客户端相同的文件），返回 (公钥 PEM, 证书文本)
+    生成密钥与读写文件放在线程池中执行，不阻塞事件循环
+    """
+    loop = asyncio.get_running_loop()
+    lib = SecureCommLib()
+    _, pub_path = await loop.run_in_executor(None, udp_client.ensure_keypair, lib, user_id, key_pool)
+    cert_path = os.path.join(udp_client.KEYS_DIR, f"{user_id}_cert.sig")
+    pub_key = await loop.run_in_executor(None, _read_text, pub_path)
+    if os.path.exists(cert_path):
+        certificate = await loop.run_in_executor(None, _read_text, cert_path)
+    else:
+        certificate = await (ca_client or AsyncCertificateClient()).register(user_id, pub_key)
+        await loop.run_in_executor(None, udp_client.save_certificate, user_id, certificate)
+        print(f"[Client] 证书获取成功，已保存至 {cert_path}")
+    return pub_key, certificate
+
+
+def _read_text(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+if __name__ == "__main__":
+    async def _demo():
+        client = AsyncCertificateClient()
+        await obtain_certificate("test_user", ca_client=client)
+        print(await client.lookup_certificate(user_id="test_user"))
+
+    asyncio.run(_demo())
@@ -0,0 +1,197 @@
+# 文件路径: Experiment_2/udp/cert_registry.py
+"""
+CA 已签发证书的持久化登记表
+- 磁盘上是只追加的日志（每行一条 JSON：签发 issue / 吊销 revoke），写入后立即 flush
+- 内存中维护哈希索引：公钥指纹 -> 证书记录，user_id -> 最新指纹，吊销指纹集合（O(1) 查询）
+- 定期把索引写成紧凑快照（记录对应的日志偏移量），启动时加载快照后只回放其后的日志；
+  快照在锁内只做浅拷贝，序列化与 fsync 在后台线程完成，不阻塞签发回调
+- 快照损坏时忽略快照、回放整个日志；日志中无法解析的行跳过，末尾的坏行直接截掉
+- 公钥指纹为 PEM 文本的 SHA-256：证书签名的对象就是这段文本，文本相同才能复用同一证书
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+LOG_NAME = "registry.log"
+SNAPSHOT_NAME = "registry.snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_EVERY = 1000   # 每追加多少条日志写一次快照
+
+
+def fingerprint(public_key: str) -> str:
+    return hashlib.sha256(public_key.encode("utf-8")).hexdigest()
+
+
+class CertRegistry:
+    def __init__(self, directory: str, snapshot_every: int = SNAPSHOT_EVERY, fsync: bool = False):
+        self.directory = directory
+        self.log_path = os.path.join(directory, LOG_NAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self.by_fingerprint = {}   # 指纹 -> {"user_id", "certificate", "issued_at"}
+        self.by_user = {}          # user_id -> 指纹（最近一次签发）
+        self.revoked = set()       # 已吊销的指纹
+        self._since_snapshot = 0
+        self._snapshot_thread = None
+
+        os.makedirs(directory, exist_ok=True)
+        replayed = self._load()
+        self._log = open(self.log_path, "ab")
+        if replayed >= self.snapshot_every:
+            self.snapshot()
+
+    # ---------- 启动：快照 + 日志尾部 ----------
+    def _load(self) -> int:
+        offset = self._load_snapshot()
+
+        if not os.path.exists(self.log_path):
+            return 0
+        replayed = 0
+        with open(self.log_path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if offset > size:
+                # 快照比日志新（日志被替换或截断），以快照为准
+                offset = size
+            f.seek(offset)
+            good_end = position = offset
+            skipped = 0
+            for line in f:
+                position += len(line)
+                if not line.endswith(b"\n"):
+                    break  # 上次写入中途崩溃留下的半行
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+                    continue
+                good_end = position
+                replayed += 1
+            if good_end < size:
+                # 末尾的半行或坏行截掉，之后的追加从干净的行边界开始
+                f.truncate(good_end)
+            if skipped:
+                print(f"⚠️ [登记表] 跳过 {skipped} 行无法解析的日志")
+        self._since_snapshot = replayed
+        return replayed
+
+    def _load_snapshot(self) -> int:
+        """加载快照，返回其对应的日志偏移量；快照缺失、版本不符或损坏时返回 0（回放整个日志）"""
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            if snap.get("version") != SNAPSHOT_VERSION:
+                return 0
+            by_fingerprint = {fp: {"user_id": user_id, "certificate": certificate, "issued_at": issued_at}
+                              for fp, user_id, certificate, issued_at in snap["certificates"]}
+            by_user, revoked, offset = dict(snap["users"]), set(snap["revoked"]), int(snap["log_offset"])
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ [登记表] 快照无法读取（{e}），改为回放整个日志")
+            return 0
+        self.by_fingerprint, self.by_user, self.revoked = by_fingerprint, by_user, revoked
+        return offset
+
+    def _apply(self, entry: dict):
+        fp = entry["fingerprint"]
+        if entry["op"] == "issue":
+            self.by_fingerprint[fp] = {
+                "user_id": entry["user_id"], "certificate": entry["certificate"], "issued_at": entry["issued_at"],
+            }
+            self.by_user[entry["user_id"]] = fp
+        elif entry["op"] == "revoke":
+            self.revoked.add(fp)
+
+    def _append(self, entry: dict):
+        """调用方需持有锁"""
+        self._log.write(json.dumps(entry, separators=(",", ":")).encode("utf-8") + b"\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._apply(entry)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every and not self._snapshot_running():
+            # 锁内只取浅拷贝，序列化和 fsync 交给后台线程；上一份还没写完时等下一条日志再试
+            snap = self._snapshot_state()
+            self._snapshot_thread = threading.Thread(target=self._save_snapshot, args=(snap,),
+                                                     name="registry-snapshot")
+            self._snapshot_thread.start()
+
+    def _snapshot_running(self) -> bool:
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def _snapshot_state(self) -> dict:
+        """调用方需持有锁；记录的值不会被原地修改，浅拷贝即可得到一致的快照"""
+        self._since_snapshot = 0
+        return {
+            "version": SNAPSHOT_VERSION,
+            "log_offset": self._log.tell(),
+            "certificates": [[fp, r["user_id"], r["certificate"], r["issued_at"]]
+                             for fp, r in self.by_fingerprint.items()],
+            "users": dict(self.by_user),
+            "revoked": list(self.revoked),
+        }
+
+    def _save_snapshot(self, snap: dict):
+        """先写临时文件再原子替换，避免留下半个快照；同一时刻只有一个写入者"""
+        tmp = self.snapshot_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snap, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+        except OSError as e:
+            # 快照只是加速启动，写失败时日志仍完整
+            print(f"⚠️ [登记表] 写快照失败: {e}")
+
+    def _write_snapshot(self):
+        """调用方需持有锁；等待后台快照结束后同步写一份"""
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        self._save_snapshot(self._snapshot_state())
+
+    # ---------- 对外接口 ----------
+    def lookup(self, public_key: str):
+        """按公钥查找已签发的证书记录（未签发返回 None）"""
+        return self.by_fingerprint.get(fingerprint(public_key))
+
+    def lookup_user(self, user_id: str):
+        fp = self.by_user.get(user_id)
+        return None if fp is None else (fp, self.by_fingerprint[fp])
+
+    def is_revoked(self, fp: str) -> bool:
+        return fp in self.revoked
+
+    def record_issue(self, user_id: str, public_key: str, certificate: str):
+        with self._lock:
+            self._append({
+                "op": "issue", "user_id": user_id, "fingerprint": fingerprint(public_key),
+                "certificate": certificate, "issued_at": time.time(),
+            })
+
+    def revoke(self, fp: str, reason: str = "") -> bool:
+        """吊销指定指纹的证书；未知指纹返回 False"""
+        with self._lock:
+            if fp not in self.by_fingerprint:
+                return False
+            if fp not in self.revoked:
+                self._append({"op": "revoke", "fingerprint": fp, "reason": reason, "at": time.time()})
+            return True
+
+    def snapshot(self):
+        with self._lock:
+            self._write_snapshot()
+
+    def close(self):
+        with self._lock:
+            if self._since_snapshot:
+                self._write_snapshot()
+            self._log.close()
+
+    def stats(self) -> dict:
+        return {"certificates": len(self.by_fingerprint), "users": len(self.by_user), "revoked": len(self.revoked)}
@@ -1,34 +1,41 @@
 # 文件路径: Experiment_2/udp/udp_client.py
 #!/usr/bin/env python3
+import random
 import socket
 import json
 import os
 import sys
+import time
+from collections import deque
 from pathlib import Path
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from secure_comm_lib import SecureCommLib
+from wire_format import recv_json_frame, send_json_frame
 
 CA_HOST = "127.0.0.1"
 CA_PORT = 50001
+CA_TCP_PORT = 50001         # CA 中心的批量申请 TCP 通道
 KEYS_DIR = "client_keys"
 
+BATCH_DATAGRAM_LIMIT = 8000 # 单个批量申请数据报的大小上限（字节），超出则拆成多个分片
+BATCH_WINDOW = 8            # 同时在途的分片数
+BATCH_RETRIES = 5           # 每个分片的最大重试次数
+BATCH_INITIAL_RTO = 1.0     # 首次重传超时（秒），之后指数退避
+BATCH_MAX_RTO = 8.0
+BATCH_TCP_TIMEOUT = 120.0
+
 class CertificateClient:
-    def __init__(self, user_id):
+    def __init__(self, user_id, key_pool=None):
         self.user_id = user_id
+        self.key_pool = key_pool  # 可选的 KeyPairPool，新身份从池中取预生成的密钥
         self.lib = SecureCommLib()
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.settimeout(5)
         self._init_keys()
 
     def _init_keys(self):
-        Path(KEYS_DIR).mkdir(exist_ok=True)
-        self.priv_path = os.path.join(KEYS_DIR, f"{self.user_id}_private.pem")
-        self.pub_path = os.path.join(KEYS_DIR, f"{self.user_id}_public.pem")
-        if not os.path.exists(self.priv_path):
-            self.lib.generate_rsa_keypair(key_dir=KEYS_DIR)
-            os.rename(os.path.join(KEYS_DIR, "private_key.pem"), self.priv_path)
-            os.rename(os.path.join(KEYS_DIR, "public_key.pem"), self.pub_path)
+        self.priv_path, self.pub_path = ensure_keypair(self.lib, self.user_id, self.key_pool)
 
     def get_certificate(self):
         """向 CA 申请证书并保存"""
@@ -42,9 +49,7 @@ class CertificateClient:
             data, _ = self.socket.recvfrom(8192)
             resp = json.loads(data.decode("utf-8"))
             if resp["status"] == "ok":
-                cert_path = os.path.join(KEYS_DIR, f"{self.user_id}_cert.sig")
-                with open(cert_path, "w") as f:
-                    f.write(resp["certificate"])
+                cert_path = save_certificate(self.user_id, resp["certificate"])
                 print(f"[Client] 证书获取成功，已保存至 {cert_path}")
                 return True
         except socket.timeout:
@@ -61,6 +66,172 @@ class CertificateClient:
             with open(save_path, "w") as f:
                 f.write(resp["public_key"])
 
+    def lookup_certificate(self, **query):
+        """按 user_id / public_key / fingerprint 查询 CA 登记表：是否签发过、是否已吊销"""
+        req = {"action": "lookup", **query}
+        self.socket.sendto(json.dumps(req).encode("utf-8"), (CA_HOST, CA_PORT))
+        data, _ = self.socket.recvfrom(8192)
+        return json.loads(data.decode("utf-8"))
+
+    def fetch_stats(self):
+        """查询 CA 的队列深度与签名延迟统计"""
+        req = {"action": "stats"}
+        self.socket.sendto(json.dumps(req).encode("utf-8"), (CA_HOST, CA_PORT))
+        data, _ = self.socket.recvfrom(8192)
+        return json.loads(data.decode("utf-8"))
+
+
+def ensure_keypair(lib, user_id, key_pool=None):
+    """
+    确保用户的 RSA 密钥对存在，返回 (私钥路径, 公钥路径)；私钥最后落盘，已存在即表示密钥对完整，
+    不存在时由 create_rsa_keypair_files 按身份加锁创建，并发创建同一身份只会生成一对
+    """
+    Path(KEYS_DIR).mkdir(exist_ok=True)
+    priv_path = os.path.join(KEYS_DIR, f"{user_id}_private.pem")
+    pub_path = os.path.join(KEYS_DIR, f"{user_id}_public.pem")
+    if not os.path.exists(priv_path):
+        lib.create_rsa_keypair_files(priv_path, pub_path, pool=key_pool)
+    return priv_path, pub_path
+
+
+def save_certificate(user_id, certificate):
+    cert_path = os.path.join(KEYS_DIR, f"{user_id}_cert.sig")
+    with open(cert_path, "w") as f:
+        f.write(certificate)
+    return cert_path
+
+
+# ---------- 批量申请 ----------
+def _split_batch(entries, limit=BATCH_DATAGRAM_LIMIT):
+    """按序列化后的大小把条目装进若干分片；单条就超限的条目单独返回（改走 TCP）"""
+    parts, oversized = [], []
+    current, size = [], 0
+    overhead = 160  # action / batch_id / part 等固定字段
+    for entry in entries:
+        n = len(json.dumps(entry)) + 2
+        if n + overhead > limit:
+            oversized.append(entry)
+            continue
+        if current and size + n + overhead > limit:
+            parts.append(current)
+            current, size = [], 0
+        current.append(entry)
+        size += n
+    if current:
+        parts.append(current)
+    return parts, oversized
+
+
+def _register_batch_udp(parts, batch_id, window, retries, certificates, errors):
+    """
+    以滑动窗口发送各分片：最多 window 个分片在途，按分片号匹配回复；
+    超时或 CA 繁忙时按指数退避（带随机抖动）重传，超过 retries 次的分片记为失败
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    payloads = [json.dumps({"action": "register_batch", "batch_id": batch_id, "part": i, "parts": len(parts),
+                            "entries": part}).encode("utf-8") for i, part in enumerate(parts)]
+    queue = deque(range(len(parts)))
+    inflight = {}  # 分片号 -> [下次重传时刻, 已发送次数, 当前 RTO]
+    try:
+        while queue or inflight:
+            now = time.monotonic()
+            while queue and len(inflight) < window:
+                i = queue.popleft()
+                sock.sendto(payloads[i], (CA_HOST, CA_PORT))
+                inflight[i] = [now + BATCH_INITIAL_RTO, 1, BATCH_INITIAL_RTO]
+
+            sock.settimeout(max(0.001, min(state[0] for state in inflight.values()) - now))
+            try:
+                data, _ = sock.recvfrom(65535)
+                resp = json.loads(data.decode("utf-8"))
+            except socket.timeout:
+                resp = None
+            except ValueError:
+                resp = None
+            if resp is not None and resp.get("batch_id") == batch_id and resp.get("part") in inflight:
+                i = resp["part"]
+                if resp.get("status") == "ok":
+                    certificates.update(resp.get("certificates", {}))
+                    errors.update(resp.get("errors", {}))
+                    del inflight[i]
+                else:
+                    # CA 繁忙：不立即重发，等退避时间到了再发
+                    inflight[i][0] = time.monotonic() + inflight[i][2] * random.uniform(0.8, 1.2)
+
+            now = time.monotonic()
+            for i, state in list(inflight.items()):
+                if state[0] > now:
+                    continue
+                if state[1] > retries:
+                    for entry in parts[i]:
+                        errors[entry["user_id"]] = "Timeout"
+                    del inflight[i]
+                    continue
+                sock.sendto(payloads[i], (CA_HOST, CA_PORT))
+                state[1] += 1
+                state[2] = min(state[2] * 2, BATCH_MAX_RTO)
+                state[0] = now + state[2] * random.uniform(0.8, 1.2)
+    finally:
+        sock.close()
+
+
+def _register_batch_tcp(entries, batch_id, retries, certificates, errors):
+    """通过 TCP 通道一次性提交整批条目；连接失败或 CA 繁忙时指数退避重试"""
+    rto = BATCH_INITIAL_RTO
+    for attempt in range(retries + 1):
+        try:
+            with socket.create_connection((CA_HOST, CA_TCP_PORT), timeout=BATCH_TCP_TIMEOUT) as sock:
+                send_json_frame(sock, {"action": "register_batch", "batch_id": batch_id, "entries": entries})
+                resp = recv_json_frame(sock)
+            if resp is not None and resp.get("status") == "ok":
+                certificates.update(resp.get("certificates", {}))
+                errors.update(resp.get("errors", {}))
+                return
+        except (OSError, ValueError) as e:
+            print(f"[Client] 批量申请 TCP 通道出错（第 {attempt + 1} 次）: {e}")
+        if attempt < retries:
+            time.sleep(rto * random.uniform(0.8, 1.2))
+            rto = min(rto * 2, BATCH_MAX_RTO)
+    for entry in entries:
+        errors.setdefault(entry["user_id"], "Timeout")
+
+
+def register_batch(entries, window=BATCH_WINDOW, retries=BATCH_RETRIES, transport="udp"):
+    """
+    批量申请证书。entries 为 [(user_id, 公钥 PEM), ...]
+    - transport="udp"：按数据报大小拆成多个分片，以滑动窗口并发发送；放不进单个数据报的条目改走 TCP
+    - transport="tcp"：整批通过 CA 的 TCP 通道一次提交
+    返回 (certificates, errors)：{user_id: 证书}，{user_id: 失败原因}
+    """
+    items = [{"user_id": uid, "public_key": pub} for uid, pub in entries]
+    batch_id = os.urandom(8).hex()
+    certificates, errors = {}, {}
+    if transport == "tcp":
+        _register_batch_tcp(items, batch_id, retries, certificates, errors)
+    else:
+        parts, oversized = _split_batch(items)
+        if parts:
+            _register_batch_udp(parts, batch_id, window, retries, certificates, errors)
+        if oversized:
+            _register_batch_tcp(oversized, batch_id, retries, certificates, errors)
+    return certificates, errors
+
+
+def enroll_users(user_ids, key_pool=None, **kwargs):
+    """批量入网：为每个用户准备密钥对，批量申请证书并保存到 KEYS_DIR，返回失败的 {user_id: 原因}"""
+    lib = SecureCommLib()
+    entries = []
+    for user_id in user_ids:
+        _, pub_path = ensure_keypair(lib, user_id, key_pool)
+        with open(pub_path, "r") as f:
+            entries.append((user_id, f.read()))
+    certificates, errors = register_batch(entries, **kwargs)
+    for user_id, certificate in certificates.items():
+        save_certificate(user_id, certificate)
+    print(f"[Client] 批量申请完成：成功 {len(certificates)}，失败 {len(errors)}")
+    return errors
+
+
 if __name__ == "__main__":
     client = CertificateClient("test_user")
     client.get_certificate()
\ No newline at end of file
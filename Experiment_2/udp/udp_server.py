@@ -1,61 +1,439 @@
 #!/usr/bin/env python3
+import argparse
 import socket
 import json
 import os
+import signal
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # 路径修正
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import instrumentation
 from secure_comm_lib import SecureCommLib
+from wire_format import recv_json_frame, send_json_frame
+from cert_registry import CertRegistry, fingerprint
 
 HOST = "0.0.0.0"
 CA_PORT = 50001
 KEYS_DIR = "ca_keys"
+REGISTRY_DIR = "ca_registry"   # 已签发证书登记表（日志 + 快照）
+ADMIN_HOSTS = ("127.0.0.1", "::1")  # 只接受本机发起的吊销请求
+MAX_PENDING = 1024          # 排队中的签名请求上限，超出时直接回复繁忙
+LATENCY_WINDOW = 4096       # 统计签名延迟时保留的最近样本数
+RCVBUF_SIZE = 4 * 1024 * 1024
+MAX_DATAGRAM = 65535        # 批量申请的数据报可能较大，按 UDP 上限接收
+
+# ---------- 签名工作进程 ----------
+# 每个工作进程启动时加载一次 CA 私钥，之后的签名请求不再读盘和解析 PEM
+_worker_lib = None
+_worker_key = None
+
+
+def _init_signer(ca_private_key_path):
+    global _worker_lib, _worker_key
+    _worker_lib = SecureCommLib()
+    _worker_key = _worker_lib.load_key(ca_private_key_path)
+
+
+def _sign_public_key(public_key):
+    """在工作进程中签发证书，返回 (签名, 纯签名耗时秒)"""
+    start = time.perf_counter()
+    signature = _worker_lib.issue_certificate(public_key, _worker_key)
+    return signature, time.perf_counter() - start
+
 
 class CAServer:
-    def __init__(self):
+    def __init__(self, workers=None, max_pending=MAX_PENDING):
         self.socket = None
         self.lib = SecureCommLib()
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.pool = None
         self._init_ca_keys()
+        self.registry = CertRegistry(REGISTRY_DIR)
+
+        # CA 公钥不会变化，get_ca_key 的响应在启动时序列化一次
+        with open(self.ca_public_key_path, 'r') as f:
+            self.ca_key_response = json.dumps({"status": "ok", "public_key": f.read()}).encode("utf-8")
+
+        # 运行统计（在接收线程和结果回调线程之间共享）
+        self._stats_lock = threading.Lock()
+        self._capacity = threading.Condition(self._stats_lock)  # 排队请求减少时通知等待方
+        self.pending = 0
+        self.issued = 0
+        self.rejected = 0
+        self.failed = 0
+        self.coalesced = 0    # 附加到在途签名上的重复申请（重传等）
+        self._inflight = {}   # 正在签名的公钥指纹 -> Future，同一公钥只签一次
+        self._latencies = deque(maxlen=LATENCY_WINDOW)   # (排队+签名 总耗时, 纯签名耗时)
 
     def _init_ca_keys(self):
         Path(KEYS_DIR).mkdir(exist_ok=True)
         self.ca_private_key_path = os.path.join(KEYS_DIR, "ca_private_key.pem")
         self.ca_public_key_path = os.path.join(KEYS_DIR, "ca_public_key.pem")
-        
+
         if not os.path.exists(self.ca_private_key_path):
             print("[CA中心] 正在初始化根密钥...")
-            self.lib.generate_rsa_keypair(key_dir=KEYS_DIR)
-            os.rename(os.path.join(KEYS_DIR, "private_key.pem"), self.ca_private_key_path)
-            os.rename(os.path.join(KEYS_DIR, "public_key.pem"), self.ca_public_key_path)
+            self.lib.create_rsa_keypair_files(self.ca_private_key_path, self.ca_public_key_path)
+
+    def start(self, host=HOST, port=CA_PORT, rcvbuf=RCVBUF_SIZE, tcp_port=CA_PORT):
+        # 先启动并预热签名进程，再创建套接字：工作进程不会继承监听套接字，首个请求也无需等待进程启动
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_signer,
+                                        initargs=(os.path.abspath(self.ca_private_key_path),))
+        list(self.pool.map(abs, range(self.workers)))
+        # 被 terminate() 时也要走 finally 关闭进程池，避免遗留工作进程；
+        # 信号处理器只能在主线程注册，在其他线程中启动（例如嵌入测试）时由调用方负责清理
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
-    def start(self):
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.bind((HOST, CA_PORT))
-        print(f"✅ [CA中心] 服务启动成功 (UDP {HOST}:{CA_PORT})")
+        if rcvbuf:
+            # 申请风暴时签名跟不上接收，调大接收缓冲区以减少内核丢包
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        self.socket.bind((host, port))
+        if tcp_port:
+            self._start_tcp_channel(host, tcp_port)
+        print(f"✅ [CA中心] 服务启动成功 (UDP {host}:{port}，{self.workers} 个签名进程)")
         print(f"ℹ️  [CA中心] 等待证书申请...")
-        
-        while True:
-            try:
-                data, addr = self.socket.recvfrom(8192)
-                request = json.loads(data.decode("utf-8"))
-                response = self._handle_request(request)
-                self.socket.sendto(json.dumps(response).encode("utf-8"), addr)
-            except Exception as e:
-                print(f"❌ [CA中心] 错误: {e}")
-
-    def _handle_request(self, request):
+
+        try:
+            while True:
+                try:
+                    data, addr = self.socket.recvfrom(MAX_DATAGRAM)
+                    with instrumentation.span("json.decode"):
+                        request = json.loads(data.decode("utf-8"))
+                    response = self._handle_request(request, addr)
+                    if response is not None:
+                        self._reply(addr, response)
+                except Exception as e:
+                    print(f"❌ [CA中心] 错误: {e}")
+        except KeyboardInterrupt:
+            print("[CA中心] 服务已停止")
+        finally:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.socket.close()
+            self.registry.close()
+
+    def _reply(self, addr, response):
+        """发送响应；bytes 为预先序列化好的响应"""
+        if not isinstance(response, bytes):
+            with instrumentation.span("json.encode"):
+                response = json.dumps(response).encode("utf-8")
+        self.socket.sendto(response, addr)
+
+    def _handle_request(self, request, addr):
+        """处理一个请求；签名请求交给进程池异步完成，此时返回 None，由回调负责回复"""
         action = request.get("action")
         if action == "register":
             user_id = request.get("user_id")
+            public_key = request.get("public_key")
+            received = time.perf_counter()
+            with self._stats_lock:
+                kind, value = self._classify_locked(public_key)
+                if kind == "sign":
+                    if self.pending >= self.max_pending:
+                        self.rejected += 1
+                        return {"status": "error", "message": "CA busy, retry later"}
+                    self.pending += 1
+                    future = self._submit_locked(public_key, value)
+                elif kind == "attach":
+                    self.coalesced += 1
+                    future = self._inflight[value]
+            if kind == "known":
+                # 同一公钥已签发过：直接返回登记的证书，不再做 RSA 签名
+                print(f"📄 [CA中心] 用户 '{user_id}' 的公钥已签发过证书，直接返回登记结果")
+                return {**value, "user_id": user_id}
+            if kind == "attach":
+                # 同一公钥正在签名（通常是客户端超时重传）：等同一个签名结果，不重复签名和登记
+                print(f"🔁 [CA中心] 用户 '{user_id}' 的公钥正在签名中，等待同一结果")
+                future.add_done_callback(lambda f: self._reply_signed(addr, user_id, self._signature_of(f)))
+                return None
             print(f"📩 [CA中心] 收到用户 '{user_id}' 的公钥，正在签署证书...")
-            signature = self.lib.issue_certificate(request.get("public_key"), self.ca_private_key_path)
-            return {"status": "ok", "user_id": user_id, "certificate": signature}
+            future.add_done_callback(lambda f: self._on_signed(f, addr, user_id, public_key, received))
+            return None
+        elif action == "register_batch":
+            # 批量申请可能被客户端拆成多个数据报，每个分片独立签名、独立回复
+            entries = request.get("entries") or []
+            part = {"batch_id": request.get("batch_id"), "part": request.get("part"), "parts": request.get("parts")}
+            print(f"📦 [CA中心] 收到批量申请分片 {part['part']}/{part['parts']}（{len(entries)} 个用户），正在签署证书...")
+            if not self._sign_batch(entries, lambda resp: self._reply(addr, {**part, **resp})):
+                return {"status": "error", "message": "CA busy, retry later", **part}
+            return None
         elif action == "get_ca_key":
-            with open(self.ca_public_key_path, 'r') as f:
-                return {"status": "ok", "public_key": f.read()}
+            return self.ca_key_response
+        elif action == "lookup":
+            return self._lookup(request)
+        elif action == "revoke":
+            if addr[0] not in ADMIN_HOSTS:
+                return {"status": "error", "message": "Permission denied"}
+            fp = request.get("fingerprint")
+            if fp is None and request.get("user_id") is not None:
+                found = self.registry.lookup_user(request["user_id"])
+                fp = found[0] if found else None
+            if fp is None or not self.registry.revoke(fp, request.get("reason", "")):
+                return {"status": "error", "message": "Unknown certificate"}
+            print(f"🚫 [CA中心] 已吊销证书 {fp[:16]}...")
+            return {"status": "ok", "fingerprint": fp}
+        elif action == "stats":
+            return {"status": "ok", **self.stats()}
         return {"status": "error", "message": "Unknown action"}
 
+    def _registered_result(self, public_key):
+        """查询登记表：已签发返回响应字段（已吊销则返回错误），未签发返回 None"""
+        if not isinstance(public_key, str):
+            return None
+        fp = fingerprint(public_key)
+        record = self.registry.by_fingerprint.get(fp)
+        if record is None:
+            return None
+        if self.registry.is_revoked(fp):
+            return {"status": "error", "message": "Certificate revoked"}
+        return {"status": "ok", "certificate": record["certificate"]}
+
+    def _classify_locked(self, public_key, claimed=()):
+        """
+        调用方需持有 _stats_lock。已登记 -> ("known", 响应字段)；正在签名或已由本批其他条目提交
+        -> ("attach", 指纹)；否则 -> ("sign", 指纹)。签名完成时先写登记表、再移出 _inflight，
+        所以持锁判断不会漏掉刚刚签完的公钥
+        """
+        known = self._registered_result(public_key)
+        if known is not None:
+            return "known", known
+        fp = fingerprint(public_key) if isinstance(public_key, str) else None
+        if fp is not None and (fp in self._inflight or fp in claimed):
+            return "attach", fp
+        return "sign", fp
+
+    def _submit_locked(self, public_key, fp):
+        """调用方需持有 _stats_lock 并已占用排队名额；提交签名并登记为在途"""
+        future = self.pool.submit(_sign_public_key, public_key)
+        if fp is not None:
+            self._inflight[fp] = future
+        return future
+
+    @staticmethod
+    def _signature_of(future):
+        """附加到在途签名上的请求取结果用：成功返回签名，失败返回 None"""
+        try:
+            return future.result()[0]
+        except Exception:
+            return None
+
+    def _lookup(self, request):
+        """按 user_id / 公钥 / 指纹查询证书是否登记、是否已吊销（纯内存哈希查询）"""
+        if request.get("fingerprint"):
+            fp = request["fingerprint"]
+        elif isinstance(request.get("public_key"), str):
+            fp = fingerprint(request["public_key"])
+        else:
+            found = self.registry.lookup_user(request.get("user_id"))
+            fp = found[0] if found else None
+        record = self.registry.by_fingerprint.get(fp) if fp else None
+        if record is None:
+            return {"status": "ok", "known": False, "revoked": False}
+        return {"status": "ok", "known": True, "revoked": self.registry.is_revoked(fp), "fingerprint": fp,
+                "user_id": record["user_id"], "certificate": record["certificate"], "issued_at": record["issued_at"]}
+
+    def _collect(self, future, user_id, public_key, received):
+        """取出签名结果、写入登记表并更新统计；失败返回 None"""
+        try:
+            signature, sign_time = future.result()
+            self.registry.record_issue(user_id, public_key, signature)
+            with self._stats_lock:
+                self.issued += 1
+                self._latencies.append((time.perf_counter() - received, sign_time))
+            return signature
+        except Exception as e:
+            print(f"❌ [CA中心] 为用户 '{user_id}' 签名失败: {e}")
+            with self._stats_lock:
+                self.failed += 1
+            return None
+        finally:
+            fp = fingerprint(public_key) if isinstance(public_key, str) else None
+            with self._stats_lock:
+                self.pending -= 1
+                if self._inflight.get(fp) is future:
+                    del self._inflight[fp]
+                self._capacity.notify_all()
+
+    def _on_signed(self, future, addr, user_id, public_key, received):
+        """签名完成回调（在进程池的结果线程中执行），立即把证书发回申请者"""
+        self._reply_signed(addr, user_id, self._collect(future, user_id, public_key, received))
+
+    def _reply_signed(self, addr, user_id, signature):
+        if signature is not None:
+            response = {"status": "ok", "user_id": user_id, "certificate": signature}
+        else:
+            response = {"status": "error", "message": "Signing failed"}
+        try:
+            self._reply(addr, response)
+        except OSError as e:
+            print(f"❌ [CA中心] 回复 {addr} 失败: {e}")
+
+    def _sign_batch(self, entries, done, block=False):
+        """
+        把一批 {user_id, public_key} 分发到进程池并行签名，全部完成后调用 done(响应)
+        排队请求不足以容纳整批时：block=False 返回 False（整批拒绝，由客户端退避重试），
+        block=True 则等待队列腾出空间（批大小不能超过 max_pending）
+        已登记过的公钥直接使用登记表中的结果，正在签名的公钥等待在途的同一签名，二者都不占用签名队列
+        """
+        certificates, errors = {}, {}
+        jobs = []   # (user_id, public_key, future, 是否由本批提交)
+        received = time.perf_counter()
+        with self._stats_lock:
+            while True:
+                plan, claimed = [], set()
+                for entry in entries:
+                    kind, value = self._classify_locked(entry.get("public_key"), claimed)
+                    if kind == "sign" and value is not None:
+                        claimed.add(value)
+                    plan.append((entry, kind, value))
+                n = sum(kind == "sign" for _, kind, _ in plan)
+                if self.pending + n <= self.max_pending:
+                    break
+                if not block:
+                    self.rejected += n
+                    return False
+                # 等待期间其他请求可能签完或提交了同样的公钥，醒来后重新分类
+                self._capacity.wait()
+            self.pending += n
+            for entry, kind, value in plan:
+                user_id, public_key = entry.get("user_id"), entry.get("public_key")
+                if kind == "sign":
+                    jobs.append((user_id, public_key, self._submit_locked(public_key, value), True))
+                elif kind == "attach":
+                    self.coalesced += 1
+                    jobs.append((user_id, public_key, self._inflight[value], False))
+                elif value["status"] == "ok":
+                    certificates[user_id] = value["certificate"]
+                else:
+                    errors[user_id] = value["message"]
+        if not jobs:
+            done({"status": "ok", "certificates": certificates, "errors": errors})
+            return True
+
+        remaining = [len(jobs)]
+        batch_lock = threading.Lock()
+
+        def on_one(future, user_id, public_key, owner):
+            if owner:
+                signature = self._collect(future, user_id, public_key, received)
+            else:
+                signature = self._signature_of(future)
+            with batch_lock:
+                if signature is not None:
+                    certificates[user_id] = signature
+                else:
+                    errors[user_id] = "Signing failed"
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                try:
+                    done({"status": "ok", "certificates": certificates, "errors": errors})
+                except OSError as e:
+                    print(f"❌ [CA中心] 回复批量申请失败: {e}")
+
+        for user_id, public_key, future, owner in jobs:
+            future.add_done_callback(lambda f, uid=user_id, pk=public_key, own=owner: on_one(f, uid, pk, own))
+        return True
+
+    # ---------- TCP 旁路通道：单个数据报放不下的大批量申请 ----------
+    def _start_tcp_channel(self, host, port):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((host, port))
+        listener.listen(128)
+        threading.Thread(target=self._accept_tcp, args=(listener,), daemon=True).start()
+        print(f"ℹ️  [CA中心] 批量申请 TCP 通道已开启 (TCP {host}:{port})")
+
+    def _accept_tcp(self, listener):
+        while True:
+            conn, addr = listener.accept()
+            threading.Thread(target=self._serve_tcp, args=(conn, addr), daemon=True).start()
+
+    def _serve_tcp(self, conn, addr):
+        """TCP 通道：每个请求为“长度 + JSON”帧，批量申请在整批签完后一次性返回"""
+        try:
+            with conn:
+                while True:
+                    request = recv_json_frame(conn)
+                    if request is None:
+                        break
+                    action = request.get("action")
+                    if action == "register_batch":
+                        entries = request.get("entries") or []
+                        print(f"📦 [CA中心] 收到 TCP 批量申请（{len(entries)} 个用户），正在签署证书...")
+                        response = {"batch_id": request.get("batch_id"), "status": "ok",
+                                    "certificates": {}, "errors": {}}
+                        # 按队列容量分块提交，连接另一端在等待，因此这里阻塞等待空位而不是拒绝
+                        for i in range(0, len(entries), self.max_pending):
+                            finished = threading.Event()
+                            chunk_result = {}
+
+                            def done(resp, chunk_result=chunk_result, finished=finished):
+                                chunk_result.update(resp)
+                                finished.set()
+
+                            self._sign_batch(entries[i:i + self.max_pending], done, block=True)
+                            finished.wait()
+                            response["certificates"].update(chunk_result["certificates"])
+                            response["errors"].update(chunk_result["errors"])
+                    elif action in ("get_ca_key", "stats", "lookup"):
+                        response = self._handle_request(request, addr)
+                    else:
+                        response = {"status": "error", "message": "Unsupported action on TCP channel"}
+                    send_json_frame(conn, response)
+        except (OSError, ValueError) as e:
+            print(f"❌ [CA中心] TCP 通道 {addr} 错误: {e}")
+
+    def stats(self) -> dict:
+        """队列深度、签发计数与最近的签名延迟（毫秒）"""
+        with self._stats_lock:
+            samples = list(self._latencies)
+            result = {
+                "workers": self.workers,
+                "queue_depth": self.pending,
+                "issued": self.issued,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "coalesced": self.coalesced,
+                "registry": self.registry.stats(),
+            }
+        for name, idx in (("latency_ms", 0), ("sign_ms", 1)):
+            values = sorted(s[idx] * 1e3 for s in samples)
+            if not values:
+                result[name] = None
+                continue
+            result[name] = {
+                "mean": sum(values) / len(values),
+                "p50": values[(len(values) - 1) // 2],
+                "p99": values[min(len(values) - 1, int(len(values) * 0.99))],
+                "max": values[-1],
+            }
+        return result
+
 if __name__ == "__main__":
-    CAServer().start()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="CA 证书中心 (UDP)")
+    parser.add_argument("--host", default=HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=CA_PORT, help="监听端口")
+    parser.add_argument("--workers", type=int, default=0, help="签名进程数（0 表示 CPU 核数）")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING, help="排队签名请求上限")
+    parser.add_argument("--rcvbuf", type=int, default=RCVBUF_SIZE, help="SO_RCVBUF 字节数（0 表示系统默认）")
+    parser.add_argument("--tcp-port", type=int, default=CA_PORT, help="批量申请 TCP 通道端口（0 表示关闭）")
+    parser.add_argument("--instrument", action="store_true", help="开启插桩，收到 SIGUSR1 时打印统计快照")
+    parser.add_argument("--stats-port", type=int, default=0, help="在本机该端口提供插桩统计 HTTP 端点（0 表示关闭）")
+    args = parser.parse_args()
+    ca = CAServer(workers=args.workers, max_pending=args.max_pending)
+    if args.instrument or args.stats_port:
+        instrumentation.enable()
+        instrumentation.add_provider("ca", ca.stats)
+        instrumentation.install_signal_handler()
+    if args.stats_port:
+        instrumentation.start_stats_server(args.stats_port)
+        print(f"📊 [CA中心] 插桩统计端点: http://127.0.0.1:{args.stats_port}/stats")
+    ca.start(args.host, args.port, args.rcvbuf, args.tcp_port)
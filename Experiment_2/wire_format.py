@@ -0,0 +1,337 @@
+# 文件路径: Experiment_2/wire_format.py
+"""
+安全 TCP 协议的二进制线路格式（版本 1）
+
+记录 (Record) = 8 字节记录头 + 若干字段
+    记录头: magic(1)=0xB7 | version(1) | type(1) | 保留(1) | 记录体长度(4, 网络字节序)
+    字段:   tag(1) | 长度(4) | 值(长度 字节)
+
+- 所有密钥、证书签名、密文均以原始字节传输，不再经过 JSON 和 Base64
+- 字段类型由 tag 决定（bytes / str / uint），未知 tag 会被跳过，便于后续扩展
+- RecordReader 可在半包、粘包情况下增量解析；解析出的字段值是指向接收缓冲区的
+  memoryview，不复制数据，在下一次 recv_from()/feed() 之前有效
+- 旧版 JSON 客户端的首字节为 '{'，与 magic 不同，服务器据此区分两种格式
+- read_record_async / recv_json_document_async 为 asyncio 服务器与客户端提供相同的解析
+- 另提供“4 字节长度 + JSON”帧，供 CA 中心的 TCP 旁路通道传输超出单个数据报的批量请求
+"""
+import json
+import struct
+
+MAGIC = 0xB7
+WIRE_VERSION = 1
+RECORD_HEADER = struct.Struct("!BBBxI")
+FIELD_HEADER = struct.Struct("!BI")
+MAX_RECORD = 16 * 1024 * 1024
+
+# ---------- 记录类型 ----------
+REC_HANDSHAKE = 1          # 客户端 -> 服务器：公钥、证书、加密的会话密钥、支持的算法
+REC_HANDSHAKE_RESULT = 2   # 服务器 -> 客户端：鉴别结果、挑战与协商出的算法
+REC_DATA = 3               # 双向：会话加密后的应用数据
+REC_RESUME = 4             # 客户端 -> 服务器：会话 ID、客户端 nonce 与恢复证明（跳过 RSA）
+REC_FILE_BEGIN = 5         # 客户端 -> 服务器：文件传输开始（流 ID + 加密的文件元数据）
+REC_FILE_CHUNK = 6         # 客户端 -> 服务器：一个流式加密块
+REC_FILE_RESULT = 7        # 服务器 -> 客户端：文件接收结果（大小与摘要）
+
+# ---------- 字段 tag 及其类型 ----------
+F_PUBLIC_KEY = 1
+F_CERTIFICATE = 2
+F_ENC_SESSION_KEY = 3
+F_CIPHERS = 4
+F_STATUS = 5
+F_MESSAGE = 6
+F_CHALLENGE = 7
+F_MD5 = 8
+F_CIPHER = 9
+F_PAYLOAD = 10
+F_SESSION_ID = 11
+F_SESSION_TTL = 12
+F_NONCE = 13
+F_PROOF = 14
+F_RESUMED = 15
+F_FINAL = 16
+F_STREAM_ID = 17
+F_FILE_SIZE = 18
+F_DIGEST = 19
+
+T_BYTES, T_STR, T_UINT = "bytes", "str", "uint"
+FIELD_TYPES = {
+    F_PUBLIC_KEY: T_BYTES,
+    F_CERTIFICATE: T_BYTES,
+    F_ENC_SESSION_KEY: T_BYTES,
+    F_CIPHERS: T_STR,       # 逗号分隔的算法名
+    F_STATUS: T_STR,
+    F_MESSAGE: T_STR,
+    F_CHALLENGE: T_STR,
+    F_MD5: T_STR,
+    F_CIPHER: T_STR,
+    F_PAYLOAD: T_BYTES,
+    F_SESSION_ID: T_BYTES,
+    F_SESSION_TTL: T_UINT,  # 会话有效期（秒）
+    F_NONCE: T_BYTES,
+    F_PROOF: T_BYTES,       # HMAC-SHA256 恢复证明
+    F_RESUMED: T_UINT,      # 1 表示本次为会话恢复
+    F_FINAL: T_UINT,        # 1 表示流的最后一块
+    F_STREAM_ID: T_BYTES,
+    F_FILE_SIZE: T_UINT,
+    F_DIGEST: T_STR,        # 明文 SHA-256（十六进制）
+}
+
+
+class WireFormatError(ValueError):
+    """线路格式错误（magic/版本不符、记录过大、字段越界等）"""
+
+
+def _encode_value(tag: int, value) -> bytes:
+    kind = FIELD_TYPES.get(tag, T_BYTES)
+    if kind == T_STR:
+        return value.encode("utf-8")
+    if kind == T_UINT:
+        return int(value).to_bytes(8, "big")
+    return value
+
+
+def encode_record(rtype: int, fields: dict) -> bytes:
+    """把 {tag: 值} 编码为一条完整记录；值为 None 的字段会被省略"""
+    parts = []
+    body_len = 0
+    for tag, value in fields.items():
+        if value is None:
+            continue
+        raw = _encode_value(tag, value)
+        parts.append(FIELD_HEADER.pack(tag, len(raw)))
+        parts.append(raw)
+        body_len += FIELD_HEADER.size + len(raw)
+    if body_len > MAX_RECORD:
+        raise WireFormatError(f"记录长度 {body_len} 超过上限 {MAX_RECORD}")
+    return RECORD_HEADER.pack(MAGIC, WIRE_VERSION, rtype, body_len) + b"".join(parts)
+
+
+def send_record(sock, rtype: int, fields: dict) -> None:
+    sock.sendall(encode_record(rtype, fields))
+
+
+class Record:
+    """解析后的记录；字段值为 memoryview（零拷贝）"""
+    __slots__ = ("type", "fields")
+
+    def __init__(self, rtype: int, fields: dict):
+        self.type = rtype
+        self.fields = fields
+
+    def __contains__(self, tag):
+        return tag in self.fields
+
+    def get_bytes(self, tag: int, default=None):
+        view = self.fields.get(tag)
+        return default if view is None else bytes(view)
+
+    def get_view(self, tag: int):
+        return self.fields.get(tag)
+
+    def get_str(self, tag: int, default=None):
+        view = self.fields.get(tag)
+        return default if view is None else str(view, "utf-8")
+
+    def get_uint(self, tag: int, default=None):
+        view = self.fields.get(tag)
+        return default if view is None else int.from_bytes(view, "big")
+
+
+def _parse_body(rtype: int, body: memoryview) -> Record:
+    fields = {}
+    pos = 0
+    end = len(body)
+    while pos < end:
+        if end - pos < FIELD_HEADER.size:
+            raise WireFormatError("字段头被截断")
+        tag, length = FIELD_HEADER.unpack_from(body, pos)
+        pos += FIELD_HEADER.size
+        if length > end - pos:
+            raise WireFormatError(f"字段 {tag} 长度越界")
+        fields[tag] = body[pos:pos + length]
+        pos += length
+    return Record(rtype, fields)
+
+
+class RecordReader:
+    """增量记录解析器：适配任意大小的分段到达"""
+
+    def __init__(self, max_record: int = MAX_RECORD, initial_size: int = 16 * 1024):
+        self.max_record = max_record
+        self._buf = bytearray(initial_size)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+
+    @property
+    def buffered(self) -> int:
+        return self._end - self._start
+
+    def peek_byte(self):
+        """查看下一个未消费的字节（没有数据时返回 None），用于判断是否为二进制记录"""
+        return self._buf[self._start] if self._end > self._start else None
+
+    def take_pending(self) -> bytes:
+        """取出全部未消费的数据（切换到旧版 JSON 解析时使用）"""
+        data = bytes(self._view[self._start:self._end])
+        self._start = self._end = 0
+        return data
+
+    def _reserve(self, need: int):
+        if len(self._buf) - self._end >= need:
+            return
+        pending = self._end - self._start
+        if pending + need <= len(self._buf):
+            self._view[:pending] = self._view[self._start:self._end]
+        else:
+            size = len(self._buf)
+            while size < pending + need:
+                size *= 2
+            new_buf = bytearray(size)
+            new_buf[:pending] = self._view[self._start:self._end]
+            self._buf = new_buf
+            self._view = memoryview(new_buf)
+        self._start = 0
+        self._end = pending
+
+    def _wanted(self) -> int:
+        pending = self._end - self._start
+        if pending < RECORD_HEADER.size:
+            return RECORD_HEADER.size - pending
+        _, _, _, length = RECORD_HEADER.unpack_from(self._buf, self._start)
+        return max(RECORD_HEADER.size + length - pending, 1)
+
+    def recv_from(self, sock, min_read: int = 4096) -> int:
+        """从套接字读取数据，返回读取的字节数（0 表示对端关闭）"""
+        self._reserve(max(min(self._wanted(), self.max_record + RECORD_HEADER.size), min_read))
+        n = sock.recv_into(self._view[self._end:])
+        self._end += n
+        return n
+
+    def feed(self, data) -> None:
+        n = len(data)
+        self._reserve(n)
+        self._view[self._end:self._end + n] = data
+        self._end += n
+
+    def next_record(self):
+        """返回下一条完整记录；数据不足时返回 None"""
+        if self._end - self._start < RECORD_HEADER.size:
+            return None
+        magic, version, rtype, length = RECORD_HEADER.unpack_from(self._buf, self._start)
+        if magic != MAGIC:
+            raise WireFormatError(f"无效的 magic: {magic:#x}")
+        if version != WIRE_VERSION:
+            raise WireFormatError(f"不支持的协议版本: {version}")
+        if length > self.max_record:
+            raise WireFormatError(f"记录长度 {length} 超过上限 {self.max_record}")
+        body_start = self._start + RECORD_HEADER.size
+        body_end = body_start + length
+        if body_end > self._end:
+            return None
+        self._start = body_end
+        record = _parse_body(rtype, self._view[body_start:body_end])
+        if self._start == self._end:
+            self._start = self._end = 0
+        return record
+
+    def read_record(self, sock):
+        """阻塞读取一条完整记录；连接关闭时返回 None"""
+        while True:
+            record = self.next_record()
+            if record is not None:
+                return record
+            if not self.recv_from(sock):
+                return None
+
+
+def recv_json_document(sock, initial: bytes = b"", max_size: int = 64 * 1024):
+    """
+    读取一个完整的 JSON 文档（兼容旧版协议）：不再假设一次 recv() 就能收全，
+    而是持续读取直到能成功解析；超过 max_size 仍未完整则视为格式错误
+    """
+    buf = bytearray(initial)
+    while True:
+        if buf:
+            try:
+                return json.loads(buf.decode("utf-8"))
+            except (ValueError, UnicodeDecodeError):
+                if len(buf) > max_size:
+                    raise WireFormatError("JSON 文档过大或格式错误")
+        chunk = sock.recv(8192)
+        if not chunk:
+            if buf:
+                raise WireFormatError("连接在 JSON 文档中途关闭")
+            return None
+        buf += chunk
+
+
+# ---------- asyncio 版本（stream 为 asyncio.StreamReader） ----------
+async def read_record_async(stream, reader: RecordReader, chunk_size: int = 64 * 1024):
+    """异步读取一条完整记录；连接关闭时返回 None（记录视图在下一次读取前有效）"""
+    while True:
+        record = reader.next_record()
+        if record is not None:
+            return record
+        data = await stream.read(chunk_size)
+        if not data:
+            return None
+        reader.feed(data)
+
+
+async def recv_json_document_async(stream, initial: bytes = b"", max_size: int = 64 * 1024):
+    """recv_json_document 的异步版本"""
+    buf = bytearray(initial)
+    while True:
+        if buf:
+            try:
+                return json.loads(buf.decode("utf-8"))
+            except (ValueError, UnicodeDecodeError):
+                if len(buf) > max_size:
+                    raise WireFormatError("JSON 文档过大或格式错误")
+        chunk = await stream.read(8192)
+        if not chunk:
+            if buf:
+                raise WireFormatError("连接在 JSON 文档中途关闭")
+            return None
+        buf += chunk
+
+
+# ---------- 长度前缀 JSON（CA 中心的 TCP 旁路通道使用） ----------
+JSON_FRAME_HEADER = struct.Struct("!I")
+
+
+def send_json_frame(sock, obj) -> None:
+    """发送 4 字节长度 + JSON 文本；obj 为 bytes 时视为已序列化的 JSON"""
+    data = obj if isinstance(obj, bytes) else json.dumps(obj).encode("utf-8")
+    if len(data) > MAX_RECORD:
+        raise WireFormatError(f"JSON 帧长度 {len(data)} 超过上限 {MAX_RECORD}")
+    sock.sendall(JSON_FRAME_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock, n: int):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if not k:
+            if got:
+                raise WireFormatError("连接在帧中途关闭")
+            return None
+        got += k
+    return buf
+
+
+def recv_json_frame(sock, max_size: int = MAX_RECORD):
+    """读取一个长度前缀 JSON 帧；连接关闭时返回 None"""
+    header = _recv_exact(sock, JSON_FRAME_HEADER.size)
+    if header is None:
+        return None
+    (length,) = JSON_FRAME_HEADER.unpack(header)
+    if length > max_size:
+        raise WireFormatError(f"JSON 帧长度 {length} 超过上限 {max_size}")
+    body = _recv_exact(sock, length) if length else bytearray()
+    if body is None:
+        raise WireFormatError("连接在帧中途关闭")
+    return json.loads(body.decode("utf-8"))
@@ -0,0 +1,1208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+IOS 控制台抄录解析器：从 Experiment_final/*.txt 还原每台设备的有效运行配置
+
+抄录中混有提示符、设备输出、日志（%LINK-...）、`//` 注释，以及按 Tab / ? 之前敲了一半的命令
+（如 `access-list 1 pe`、`switchport m`）。解析规则与设备行为保持一致：
+1. 单遍流式处理：逐行识别提示符 `主机名(模式)#命令`，命令按空白切分为 token，不回看、不二次扫描
+2. 关键字支持 IOS 式缩写（`int`、`no shut`、`f0/1`），缩写不唯一或参数不全的命令视为未生效
+3. 命令之后紧跟 `% Incomplete command.` / `% Invalid input` 等错误提示时撤销该命令（延迟一行提交）
+4. 提示符中的模式是权威状态：`(config)#` 表示已回到全局模式；提示符与跟踪的子模式不一致
+   （抄录缺行）时，其后依赖子模式的命令不再套用到错误的对象上
+5. 子模式下输入全局命令（如在 config-if 中输入 `int f0/4`），与 IOS 一样自动退出子模式后执行
+
+还原内容：主机名、接口（地址、二层模式/VLAN、NAT 方向、ACL、HSRP、OSPF 开销）、VLAN、
+OSPF 进程（network / default-information originate）、静态路由、NAT、ACL 与 DHCP 地址池。
+未显式 shutdown 的接口视为开启（抄录里常省略 `no shutdown`）。
+
+解析结果按文件内容哈希缓存在磁盘（默认 Experiment_final/.parse_cache），
+数千个设备文件再次加载时只需读文件、算哈希与反序列化；解析器版本变化时缓存自动失效。
+
+用法（在 Experiment_final 目录下）：
+    python analysis/config_parser.py                       # 解析本目录全部抄录并打印摘要
+    python analysis/config_parser.py --show Core-Router    # 打印某台设备还原后的运行配置
+    python analysis/config_parser.py some/dir --workers 4 --no-cache
+"""
+
+import argparse
+import functools
+import hashlib
+import ipaddress
+import json
+import os
+import re
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PARSER_VERSION = 1
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, ".parse_cache")
+
+# 提示符：主机名 + 可选的 (模式) + # 或 >；syslog 行以 % 开头，不会匹配
+PROMPT_RE = re.compile(r"^([A-Za-z0-9][\w.-]*)(?:\(([\w-]+)\))?([#>])(.*)$")
+# 设备对上一条命令的报错：该命令未生效
+ERROR_RE = re.compile(r"^%\s*(Invalid|Incomplete|Ambiguous|Unknown)", re.IGNORECASE)
+FILE_PREFIX_RE = re.compile(r"^\d+\.\s*")
+IFNAME_RE = re.compile(r"^([a-z][a-z-]*?)\s*(\d+(?:/\d+)*(?:\.\d+)?)$")
+IFRANGE_RE = re.compile(r"^([a-z][a-z-]*?)\s*((?:\d+/)*)(\d+)\s*(?:-\s*(\d+))?$")
+
+INTERFACE_TYPES = {
+    "fastethernet": "FastEthernet",
+    "gigabitethernet": "GigabitEthernet",
+    "ethernet": "Ethernet",
+    "serial": "Serial",
+    "vlan": "Vlan",
+    "port-channel": "Port-channel",
+    "loopback": "Loopback",
+    "tunnel": "Tunnel",
+}
+
+# 提示符中的模式名 -> 解析器内部的上下文类型
+PROMPT_MODES = {
+    "config": "global",
+    "config-if": "interface",
+    "config-if-range": "interface",
+    "config-subif": "interface",
+    "config-vlan": "vlan",
+    "config-router": "ospf",
+    "dhcp-config": "dhcp",
+}
+
+
+class IncompleteCommand(ValueError):
+    """参数不全、缩写不唯一或取值非法：命令在设备上不会生效"""
+
+
+# ---------- 地址 ----------
+# ipaddress 解析点分字符串较慢（每个地址十几微秒），数千个文件时占解析时间的大头；
+# 这里用 inet_pton 严格解析为整数，再以 (整数, 前缀长度) 构造 ipaddress 对象
+def ip_to_int(text: str) -> int:
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, text), "big")
+    except (OSError, TypeError):
+        raise ValueError(f"非法的 IPv4 地址: {text}")
+
+
+def mask_to_prefixlen(mask: int, wildcard: bool = False) -> int:
+    """子网掩码（255.255.255.224）或通配符（0.0.0.31，wildcard=True）-> 前缀长度；不连续时抛出 ValueError"""
+    inverse = mask if wildcard else mask ^ 0xFFFFFFFF
+    if inverse & (inverse + 1):
+        raise ValueError(f"不连续的{'通配符' if wildcard else '掩码'}: {ipaddress.IPv4Address(mask)}")
+    return 32 - inverse.bit_length()
+
+
+def parse_interface_address(text: str) -> ipaddress.IPv4Interface:
+    """`172.16.13.1/27` -> IPv4Interface"""
+    address, _, plen = text.partition("/")
+    return ipaddress.IPv4Interface((ip_to_int(address), int(plen)))
+
+
+def parse_network(text: str) -> ipaddress.IPv4Network:
+    """`172.16.13.0/27` -> IPv4Network"""
+    address, _, plen = text.partition("/")
+    return ipaddress.IPv4Network((ip_to_int(address), int(plen)))
+
+
+def canonical_interface_name(text: str) -> str:
+    """把 `f0/1`、`fa 0/1`、`Serial0/0/0`、`vlan 10` 等写法规范为 IOS 全名；无法识别时抛出 ValueError"""
+    m = IFNAME_RE.match(text.strip().lower())
+    if not m:
+        raise ValueError(f"无法识别的接口名: {text}")
+    return _interface_type(m.group(1)) + m.group(2)
+
+
+def _interface_type(prefix: str) -> str:
+    matches = [full for key, full in INTERFACE_TYPES.items() if key.startswith(prefix)]
+    if len(matches) != 1:
+        raise ValueError(f"无法识别的接口类型: {prefix}")
+    return matches[0]
+
+
+def _expand_range(text: str):
+    """`f 0/3-4`、`f0/2-3, f0/7` -> 接口全名列表"""
+    names = []
+    for part in text.lower().split(","):
+        m = IFRANGE_RE.match(part.strip())
+        if not m:
+            raise IncompleteCommand(text)
+        kind, slot, first, last = m.groups()
+        try:
+            kind = _interface_type(kind)
+        except ValueError:
+            raise IncompleteCommand(text)
+        last = int(last) if last is not None else int(first)
+        if last < int(first):
+            raise IncompleteCommand(text)
+        names += [f"{kind}{slot}{n}" for n in range(int(first), last + 1)]
+    return names
+
+
+class Interface:
+    __slots__ = ("name", "address", "shutdown", "switchport", "mode", "access_vlan", "voice_vlan",
+                 "trunk_encapsulation", "channel_group", "nat", "acl_in", "acl_out", "standby",
+                 "ospf_cost", "bandwidth")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.address = None          # ipaddress.IPv4Interface
+        self.shutdown = False
+        self.switchport = None       # None: 设备默认；False: no switchport（三层口）
+        self.mode = None             # access / trunk
+        self.access_vlan = None
+        self.voice_vlan = None
+        self.trunk_encapsulation = None
+        self.channel_group = None    # (组号, 模式)
+        self.nat = None              # inside / outside
+        self.acl_in = None
+        self.acl_out = None
+        self.standby = {}            # HSRP 组号 -> {"ip", "priority", "preempt", "track"}
+        self.ospf_cost = None
+        self.bandwidth = None        # kbit/s
+
+    @property
+    def network(self):
+        return self.address.network if self.address is not None else None
+
+    @property
+    def is_up(self) -> bool:
+        return not self.shutdown
+
+    def to_dict(self) -> dict:
+        data = {"name": self.name}
+        for key in self.__slots__[1:]:
+            value = getattr(self, key)
+            if value is None or value is False and key != "switchport" or value == {}:
+                continue
+            data[key] = str(value) if key == "address" else value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Interface":
+        iface = cls(data["name"])
+        for key, value in data.items():
+            if key == "address":
+                value = parse_interface_address(value)
+            elif key == "standby":
+                value = {int(group): entry for group, entry in value.items()}
+            elif key == "channel_group":
+                value = tuple(value)
+            setattr(iface, key, value)
+        return iface
+
+
+class OspfProcess:
+    __slots__ = ("pid", "networks", "default_originate", "router_id", "passive", "reference_bandwidth")
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.networks = []               # [(IPv4Network, 区域)]
+        self.default_originate = None    # None / "originate" / "always"
+        self.router_id = None
+        self.passive = []                # 接口全名
+        self.reference_bandwidth = None  # Mbit/s
+
+    def covers(self, address) -> int:
+        """接口地址落在哪条 network 语句里，返回区域号；不在任何语句中返回 None"""
+        for network, area in self.networks:
+            if address in network:
+                return area
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "pid": self.pid,
+            "networks": [[str(n), area] for n, area in self.networks],
+            "default_originate": self.default_originate,
+            "router_id": self.router_id,
+            "passive": self.passive,
+            "reference_bandwidth": self.reference_bandwidth,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OspfProcess":
+        proc = cls(data["pid"])
+        proc.networks = [(parse_network(n), area) for n, area in data["networks"]]
+        proc.default_originate = data["default_originate"]
+        proc.router_id = data["router_id"]
+        proc.passive = data["passive"]
+        proc.reference_bandwidth = data["reference_bandwidth"]
+        return proc
+
+
+class Device:
+    """一台设备还原后的有效配置"""
+    __slots__ = ("name", "hostname", "kind", "interfaces", "vlans", "ip_routing", "ospf", "static_routes",
+                 "nat_pools", "nat_rules", "acls", "dhcp_pools", "dhcp_excluded", "applied", "ignored")
+
+    def __init__(self, name: str, kind: str = "router"):
+        self.name = name                 # 来自文件名，全网唯一
+        self.hostname = None             # 未配置 hostname 时为默认提示符（Router / Switch）
+        self.kind = kind                 # router / switch（由抄录开头的默认提示符判断）
+        self.interfaces = {}             # 全名 -> Interface，按首次出现顺序
+        self.vlans = {}                  # VLAN 号 -> 名称
+        self.ip_routing = None
+        self.ospf = {}                   # 进程号 -> OspfProcess
+        self.static_routes = []          # {"prefix", "next_hop", "interface", "distance"}
+        self.nat_pools = {}              # 名称 -> {"start", "end", "netmask"}
+        self.nat_rules = []              # {"kind": "list"/"static", ...}
+        self.acls = {}                   # 编号 -> [{"action", "protocol", "source", "destination", "options"}]
+        self.dhcp_pools = {}             # 名称 -> {"network", "default_router", "dns_server", "options"}
+        self.dhcp_excluded = []          # [(起始, 结束)]
+        self.applied = 0                 # 生效的命令数
+        self.ignored = 0                 # 不完整 / 被设备拒绝 / 上下文缺失而忽略的命令数
+
+    @property
+    def routes_ip(self) -> bool:
+        """是否做三层转发：路由器默认开启，交换机需要 ip routing"""
+        if self.ip_routing is not None:
+            return self.ip_routing
+        return self.kind == "router"
+
+    def interface(self, name: str) -> Interface:
+        iface = self.interfaces.get(name)
+        if iface is None:
+            iface = self.interfaces[name] = Interface(name)
+        return iface
+
+    def find_interface(self, text: str) -> Interface:
+        """按缩写查找接口（`f0/1` -> FastEthernet0/1），不存在时抛出 KeyError"""
+        try:
+            return self.interfaces[canonical_interface_name(text)]
+        except (ValueError, KeyError):
+            raise KeyError(f"{self.name} 上没有接口 {text}")
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "hostname": self.hostname,
+            "kind": self.kind,
+            "interfaces": [i.to_dict() for i in self.interfaces.values()],
+            "vlans": {str(k): v for k, v in self.vlans.items()},
+            "ip_routing": self.ip_routing,
+            "ospf": [p.to_dict() for p in self.ospf.values()],
+            "static_routes": self.static_routes,
+            "nat_pools": self.nat_pools,
+            "nat_rules": self.nat_rules,
+            "acls": {str(k): v for k, v in self.acls.items()},
+            "dhcp_pools": self.dhcp_pools,
+            "dhcp_excluded": self.dhcp_excluded,
+            "applied": self.applied,
+            "ignored": self.ignored,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Device":
+        dev = cls(data["name"], data["kind"])
+        dev.hostname = data["hostname"]
+        dev.interfaces = {d["name"]: Interface.from_dict(d) for d in data["interfaces"]}
+        dev.vlans = {int(k): v for k, v in data["vlans"].items()}
+        dev.ip_routing = data["ip_routing"]
+        dev.ospf = {d["pid"]: OspfProcess.from_dict(d) for d in data["ospf"]}
+        dev.static_routes = data["static_routes"]
+        dev.nat_pools = data["nat_pools"]
+        dev.nat_rules = data["nat_rules"]
+        dev.acls = {int(k): v for k, v in data["acls"].items()}
+        dev.dhcp_pools = data["dhcp_pools"]
+        dev.dhcp_excluded = [tuple(r) for r in data["dhcp_excluded"]]
+        dev.applied = data["applied"]
+        dev.ignored = data["ignored"]
+        return dev
+
+
+# ---------- 命令 token 流 ----------
+class _Tokens:
+    """一条命令的 token 游标；缺参数或取值非法时抛出 IncompleteCommand"""
+    __slots__ = ("items", "pos")
+
+    def __init__(self, items, pos=0):
+        self.items = items
+        self.pos = pos
+
+    def __bool__(self):
+        return self.pos < len(self.items)
+
+    def peek(self):
+        return self.items[self.pos].lower() if self.pos < len(self.items) else None
+
+    def next(self) -> str:
+        if self.pos >= len(self.items):
+            raise IncompleteCommand("参数不全")
+        self.pos += 1
+        return self.items[self.pos - 1]
+
+    def rest(self) -> str:
+        text = " ".join(self.items[self.pos:])
+        self.pos = len(self.items)
+        return text
+
+    def keyword(self, choices) -> str:
+        """按缩写匹配下一个关键字（唯一前缀），返回全称"""
+        return _match_keyword(self.next().lower(), choices)
+
+    def maybe(self, *choices):
+        """下一个 token 是给定关键字之一（可缩写）时消费并返回全称，否则返回 None"""
+        word = self.peek()
+        full = _prefix_table(choices).get(word) if word is not None else None
+        if full is not None:
+            self.pos += 1
+        return full
+
+    def int(self, low=0, high=2 ** 32 - 1) -> int:
+        text = self.next()
+        if not text.isdigit() or not low <= int(text) <= high:
+            raise IncompleteCommand(text)
+        return int(text)
+
+    def ip(self) -> ipaddress.IPv4Address:
+        try:
+            return ipaddress.IPv4Address(ip_to_int(self.next()))
+        except ValueError as e:
+            raise IncompleteCommand(str(e))
+
+    def end(self):
+        if self:
+            raise IncompleteCommand(f"多余的参数: {self.rest()}")
+
+
+@functools.lru_cache(maxsize=None)
+def _prefix_table(choices) -> dict:
+    """关键字表的全部前缀 -> 全称；不唯一的前缀映射为 None，与全称完全相同时优先"""
+    table = {}
+    for keyword in choices:
+        for i in range(1, len(keyword) + 1):
+            prefix = keyword[:i]
+            table[prefix] = None if prefix in table and table[prefix] != keyword else keyword
+    for keyword in choices:
+        table[keyword] = keyword
+    return table
+
+
+def _match_keyword(word: str, choices) -> str:
+    full = _prefix_table(choices).get(word)
+    if full is None:
+        raise IncompleteCommand(f"无法识别或不唯一的关键字: {word}")
+    return full
+
+
+def _prefixlen(mask, wildcard=False) -> int:
+    """mask 为子网掩码 / 通配符（IPv4Address）或前缀长度（int）"""
+    if isinstance(mask, int):
+        if not 0 <= mask <= 32:
+            raise IncompleteCommand(f"非法的前缀长度: {mask}")
+        return mask
+    try:
+        return mask_to_prefixlen(int(mask), wildcard)
+    except ValueError as e:
+        raise IncompleteCommand(str(e))
+
+
+def _network(address, mask, wildcard=False) -> ipaddress.IPv4Network:
+    plen = _prefixlen(mask, wildcard)
+    return ipaddress.IPv4Network((int(address) & (0xFFFFFFFF << (32 - plen)) & 0xFFFFFFFF, plen))
+
+
+def _address_spec(tokens: _Tokens, wildcard_optional: bool) -> str:
+    """ACL 中的地址写法：any / host A / A W，规范为文本"""
+    word = tokens.maybe("any", "host")
+    if word == "any":
+        return "any"
+    if word == "host":
+        return f"host {tokens.ip()}"
+    address = tokens.ip()
+    if wildcard_optional and (tokens.peek() is None or not tokens.peek()[:1].isdigit()):
+        return f"host {address}"
+    wildcard = tokens.ip()
+    _network(address, wildcard, wildcard=True)   # 校验通配符
+    return f"{address} {wildcard}"
+
+
+# ---------- 解析器 ----------
+class _Parser:
+    """单台设备的流式解析状态"""
+
+    # 各模式下已知的关键字（包括解析后丢弃的），用来判断缩写是否唯一
+    GLOBAL_WORDS = ("hostname", "interface", "vlan", "ip", "router", "access-list", "no", "exit", "end",
+                    "spanning-tree", "crypto", "telephony-service", "ephone-dn", "ephone", "enable",
+                    "service", "line", "banner", "username", "do", "dial-peer", "cdp", "logging", "clock")
+    INTERFACE_WORDS = ("ip", "no", "shutdown", "switchport", "channel-group", "standby", "duplex", "speed",
+                       "description", "bandwidth", "clock", "crypto", "exit", "end", "encapsulation",
+                       "spanning-tree", "delay", "mtu")
+    OSPF_WORDS = ("network", "default-information", "router-id", "passive-interface", "auto-cost", "no",
+                  "exit", "end", "area", "redistribute", "log-adjacency-changes")
+    DHCP_WORDS = ("network", "default-router", "dns-server", "option", "domain-name", "lease", "exit",
+                  "end", "no")
+    VLAN_WORDS = ("name", "exit", "end", "no")
+
+    def __init__(self, name: str):
+        self.device = None
+        self.name = name
+        self.context = None        # 当前上下文: ("global",) / ("interface", [Interface]) / ("ospf", proc) / ...
+        self.pending = None        # 尚未提交的 (上下文, tokens)
+
+    # ---- 行处理 ----
+    def feed(self, line: str):
+        line = line.strip()
+        if not line:
+            return
+        m = PROMPT_RE.match(line)
+        if m is None:
+            if ERROR_RE.match(line):
+                self._discard()
+            return
+        host, mode, _, command = m.groups()
+        self._commit()
+        if self.device is None:
+            self.device = Device(self.name, "switch" if host.lower().startswith("switch") else "router")
+            self.device.hostname = host
+        self._sync_mode(mode)
+        command = command.strip()
+        # 特权 / 用户模式下的 en、conf t、show 等不改变配置，不计入统计
+        if command and self.context is not None and not command.startswith(("%", "!")):
+            self.pending = (self.context, command.split())
+
+    def finish(self) -> Device:
+        self._commit()
+        if self.device is None:
+            self.device = Device(self.name)
+        return self.device
+
+    def _discard(self):
+        if self.pending is not None:
+            self.pending = None
+            self.device.ignored += 1
+
+    def _commit(self):
+        if self.pending is None:
+            return
+        context, items = self.pending
+        self.pending = None
+        try:
+            self._execute(context, _Tokens(items))
+            self.device.applied += 1
+        except IncompleteCommand:
+            self.device.ignored += 1
+
+    def _sync_mode(self, mode):
+        """以提示符为准校正当前模式"""
+        if mode is None:
+            self.context = None                      # 特权 / 用户模式
+        elif mode == "config":
+            self.context = ("global",)
+        elif self.context is None or self.context[0] != PROMPT_MODES.get(mode, mode):
+            # 抄录缺行：在不知道具体对象的子模式里，只有全局命令可以执行
+            self.context = ("unknown", mode)
+
+    # ---- 命令分派 ----
+    def _execute(self, context, tokens: _Tokens):
+        if context is None:
+            raise IncompleteCommand("不在配置模式")
+        kind = context[0]
+        word = tokens.peek()
+        if kind != "global" and word in ("exit", "end"):
+            tokens.next()
+            tokens.end()
+            self.context = ("global",) if word == "exit" else None
+            return
+        sub = self.SUBMODES.get(kind)
+        if sub is not None:
+            handler, words = sub
+            if _prefix_table(words).get(word) is not None:
+                return handler(self, context, tokens)
+        # 全局命令（在子模式中输入时 IOS 会先退出子模式；未知子模式下只有全局命令能确定含义）
+        self._global_command(tokens)
+
+    def _global_command(self, tokens: _Tokens):
+        dev = self.device
+        word = tokens.keyword(self.GLOBAL_WORDS)
+        if word == "hostname":
+            dev.hostname = tokens.next()
+            tokens.end()
+        elif word == "interface":
+            if tokens.maybe("range"):
+                names = _expand_range(tokens.rest())
+            else:
+                try:
+                    names = [canonical_interface_name(tokens.rest())]
+                except ValueError as e:
+                    raise IncompleteCommand(str(e))
+            self.context = ("interface", [dev.interface(n) for n in names])
+        elif word == "vlan":
+            ids = _vlan_list(tokens.next())
+            tokens.end()
+            for vid in ids:
+                dev.vlans.setdefault(vid, None)
+            self.context = ("vlan", ids)
+        elif word == "ip":
+            self._global_ip(tokens, negate=False)
+        elif word == "router":
+            if tokens.keyword(("ospf", "rip", "eigrp", "bgp")) != "ospf":
+                _unsupported()
+            pid = tokens.int(1, 65535)
+            tokens.end()
+            proc = dev.ospf.get(pid) or dev.ospf.setdefault(pid, OspfProcess(pid))
+            self.context = ("ospf", proc)
+        elif word == "access-list":
+            self._access_list(tokens)
+        elif word == "no":
+            self._global_no(tokens)
+        elif word in ("exit", "end"):
+            tokens.end()
+            self.context = None
+        elif word != "telephony-service" and not tokens:
+            raise IncompleteCommand("参数不全")
+        # 其余关键字（spanning-tree、crypto、telephony 等）与拓扑和路由无关：接受但不记录
+
+    def _global_ip(self, tokens: _Tokens, negate: bool):
+        dev = self.device
+        word = tokens.keyword(("routing", "route", "nat", "dhcp", "domain-name", "name-server",
+                               "default-gateway", "access-list", "cef", "http", "ssh"))
+        if word == "routing":
+            tokens.end()
+            dev.ip_routing = not negate
+        elif word == "route":
+            route = _static_route(tokens)
+            key = (route["prefix"], route["next_hop"], route["interface"])
+            # 同一前缀 + 下一跳重复配置时以最后一次（管理距离）为准
+            dev.static_routes = [r for r in dev.static_routes if (r["prefix"], r["next_hop"], r["interface"]) != key]
+            if not negate:
+                dev.static_routes.append(route)
+        elif word == "nat":
+            self._nat(tokens, negate)
+        elif word == "dhcp":
+            sub = tokens.keyword(("pool", "excluded-address"))
+            if sub == "pool":
+                name = tokens.next()
+                tokens.end()
+                if negate:
+                    dev.dhcp_pools.pop(name, None)
+                    return
+                pool = dev.dhcp_pools.setdefault(
+                    name, {"network": None, "default_router": [], "dns_server": [], "options": []})
+                self.context = ("dhcp", pool)
+            else:
+                first = tokens.ip()
+                last = tokens.ip() if tokens else first
+                tokens.end()
+                entry = (str(first), str(last))
+                if negate:
+                    dev.dhcp_excluded = [r for r in dev.dhcp_excluded if r != entry]
+                elif entry not in dev.dhcp_excluded:
+                    dev.dhcp_excluded.append(entry)
+
+    def _global_no(self, tokens: _Tokens):
+        dev = self.device
+        word = tokens.keyword(("ip", "interface", "vlan", "router", "access-list", "hostname", "spanning-tree",
+                               "crypto", "cdp", "logging", "service"))
+        if word == "ip":
+            self._global_ip(tokens, negate=True)
+        elif word == "vlan":
+            for vid in _vlan_list(tokens.next()):
+                dev.vlans.pop(vid, None)
+        elif word == "router":
+            if tokens.keyword(("ospf", "rip", "eigrp", "bgp")) != "ospf":
+                _unsupported()
+            dev.ospf.pop(tokens.int(1, 65535), None)
+        elif word == "access-list":
+            dev.acls.pop(tokens.int(1, 2699), None)
+        elif word == "hostname":
+            dev.hostname = "Switch" if dev.kind == "switch" else "Router"
+
+    def _nat(self, tokens: _Tokens, negate: bool):
+        dev = self.device
+        word = tokens.keyword(("pool", "inside", "outside"))
+        if word == "pool":
+            name = tokens.next()
+            if negate:
+                dev.nat_pools.pop(name, None)
+                return
+            start, end = tokens.ip(), tokens.ip()
+            how = tokens.keyword(("netmask", "prefix-length"))
+            if how == "netmask":
+                netmask = str(_network(start, tokens.ip()).netmask)
+            else:
+                netmask = str(_network(start, tokens.int(1, 32)).netmask)
+            tokens.end()
+            dev.nat_pools[name] = {"start": str(start), "end": str(end), "netmask": netmask}
+            return
+        direction = word
+        tokens.keyword(("source", "destination"))
+        kind = tokens.keyword(("list", "static", "route-map"))
+        if kind == "list":
+            acl = tokens.next()
+            target = tokens.keyword(("pool", "interface"))
+            if target == "pool":
+                value = tokens.next()
+            else:
+                try:
+                    value = canonical_interface_name(tokens.next())
+                except ValueError as e:
+                    raise IncompleteCommand(str(e))
+            overload = tokens.maybe("overload") is not None
+            tokens.end()
+            rule = {"kind": "list", "direction": direction, "list": acl, target: value, "overload": overload}
+            dev.nat_rules = [r for r in dev.nat_rules if not (r["kind"] == "list" and r["list"] == acl
+                                                              and r["direction"] == direction)]
+            if not negate:
+                dev.nat_rules.append(rule)
+        elif kind == "static":
+            local, global_ = tokens.ip(), tokens.ip()
+            tokens.end()
+            rule = {"kind": "static", "direction": direction, "local": str(local), "global": str(global_)}
+            dev.nat_rules = [r for r in dev.nat_rules if r != rule]
+            if not negate:
+                dev.nat_rules.append(rule)
+        else:
+            _unsupported()
+
+    def _access_list(self, tokens: _Tokens):
+        number = tokens.int(1, 2699)
+        action = tokens.keyword(("permit", "deny", "remark"))
+        if action == "remark":
+            tokens.rest()
+            return
+        if number < 100 or 1300 <= number < 2000:
+            entry = {"action": action, "protocol": None, "source": _address_spec(tokens, True),
+                     "destination": None, "options": ""}
+        else:
+            protocol = tokens.next().lower()
+            source = _address_spec(tokens, False)
+            entry = {"action": action, "protocol": protocol, "source": source, "options": ""}
+            if tokens.peek() in ("eq", "gt", "lt", "neq", "range"):
+                entry["options"] = _port_spec(tokens)
+            entry["destination"] = _address_spec(tokens, False)
+            rest = tokens.rest()
+            entry["options"] = " ".join(x for x in (entry["options"], rest) if x)
+        tokens.end()
+        self.device.acls.setdefault(number, []).append(entry)
+
+    # ---- 子模式 ----
+    def _interface_command(self, context, tokens: _Tokens):
+        ifaces = context[1]
+        negate = tokens.maybe("no") is not None
+        word = tokens.keyword(self.INTERFACE_WORDS)
+        if word == "ip":
+            sub = tokens.keyword(("address", "nat", "access-group", "ospf", "helper-address", "route-cache"))
+            if sub == "address":
+                if negate:
+                    tokens.rest()
+                    value = None
+                else:
+                    address, mask = tokens.ip(), tokens.ip()
+                    if tokens.maybe("secondary"):
+                        return   # 辅助地址不参与拓扑
+                    tokens.end()
+                    value = ipaddress.IPv4Interface((int(address), _prefixlen(mask)))
+                for iface in ifaces:
+                    iface.address = value
+            elif sub == "nat":
+                direction = tokens.keyword(("inside", "outside"))
+                tokens.end()
+                for iface in ifaces:
+                    iface.nat = None if negate else direction
+            elif sub == "access-group":
+                acl = tokens.next()
+                direction = tokens.keyword(("in", "out"))
+                tokens.end()
+                for iface in ifaces:
+                    setattr(iface, "acl_" + direction, None if negate else acl)
+            elif sub == "ospf":
+                if tokens.keyword(("cost", "priority", "hello-interval", "dead-interval", "network")) != "cost":
+                    _unsupported()
+                cost = None if negate else tokens.int(1, 65535)
+                for iface in ifaces:
+                    iface.ospf_cost = cost
+            else:
+                tokens.rest()
+        elif word == "shutdown":
+            tokens.end()
+            for iface in ifaces:
+                iface.shutdown = not negate
+        elif word == "switchport":
+            if negate and not tokens:
+                for iface in ifaces:
+                    iface.switchport = False
+                return
+            sub = tokens.keyword(("mode", "access", "trunk", "voice", "nonegotiate", "port-security"))
+            if sub == "mode":
+                mode = tokens.keyword(("access", "trunk", "dynamic"))
+                if mode == "dynamic":
+                    mode = "dynamic " + tokens.keyword(("auto", "desirable"))
+                tokens.end()
+                for iface in ifaces:
+                    iface.mode = None if negate else mode
+                    iface.switchport = True
+            elif sub in ("access", "voice"):
+                tokens.keyword(("vlan",))
+                vlan = None if negate else tokens.int(1, 4094)
+                tokens.end()
+                for iface in ifaces:
+                    setattr(iface, sub + "_vlan", vlan)
+            elif sub == "trunk":
+                opt = tokens.keyword(("encapsulation", "allowed", "native"))
+                if opt == "encapsulation":
+                    encap = None if negate else tokens.keyword(("dot1q", "isl", "negotiate"))
+                    tokens.end()
+                    for iface in ifaces:
+                        iface.trunk_encapsulation = encap
+                else:
+                    tokens.next()
+                    tokens.rest()
+            else:
+                tokens.rest()
+        elif word == "channel-group":
+            group = tokens.int(1, 64)
+            if negate:
+                value = None
+            else:
+                tokens.keyword(("mode",))
+                value = (group, tokens.keyword(("on", "active", "passive", "auto", "desirable")))
+            tokens.end()
+            for iface in ifaces:
+                iface.channel_group = value
+        elif word == "standby":
+            self._standby(ifaces, tokens, negate)
+        elif word == "bandwidth":
+            value = None if negate else tokens.int(1, 10 ** 8)
+            tokens.end()
+            for iface in ifaces:
+                iface.bandwidth = value
+        elif word in ("duplex", "speed", "encapsulation", "clock", "mtu", "delay"):
+            if not negate:
+                tokens.next()
+            tokens.rest()
+        else:
+            tokens.rest()
+
+    def _standby(self, ifaces, tokens: _Tokens, negate: bool):
+        group = 0
+        if tokens.peek() is not None and tokens.peek().isdigit():
+            group = tokens.int(0, 4095)
+        opt = tokens.keyword(("ip", "priority", "preempt", "track", "timers", "authentication", "version"))
+        if opt == "ip":
+            value = None if negate else str(tokens.ip())
+        elif opt == "priority":
+            value = None if negate else tokens.int(0, 255)
+        elif opt == "preempt":
+            value = not negate
+        elif opt == "track":
+            try:
+                value = canonical_interface_name(tokens.next())
+            except ValueError as e:
+                raise IncompleteCommand(str(e))
+            if tokens.peek() is not None and tokens.peek().isdigit():
+                tokens.next()   # 递减值
+        else:
+            tokens.rest()
+            return
+        tokens.end()
+        for iface in ifaces:
+            entry = iface.standby.setdefault(group, {"ip": None, "priority": 100, "preempt": False, "track": []})
+            if opt == "track":
+                if negate:
+                    entry["track"] = [t for t in entry["track"] if t != value]
+                elif value not in entry["track"]:
+                    entry["track"].append(value)
+            elif opt == "priority" and value is None:
+                entry["priority"] = 100
+            else:
+                entry[opt] = value
+
+    def _ospf_command(self, context, tokens: _Tokens):
+        proc = context[1]
+        negate = tokens.maybe("no") is not None
+        word = tokens.keyword(self.OSPF_WORDS)
+        if word == "network":
+            network = _network(tokens.ip(), tokens.ip(), wildcard=True)
+            tokens.keyword(("area",))
+            area = tokens.int()
+            tokens.end()
+            entry = (network, area)
+            proc.networks = [e for e in proc.networks if e[0] != network]
+            if not negate:
+                proc.networks.append(entry)
+        elif word == "default-information":
+            tokens.keyword(("originate",))
+            always = tokens.maybe("always") is not None
+            tokens.rest()
+            proc.default_originate = None if negate else ("always" if always else "originate")
+        elif word == "router-id":
+            proc.router_id = None if negate else str(tokens.ip())
+            tokens.end()
+        elif word == "passive-interface":
+            try:
+                name = canonical_interface_name(tokens.rest())
+            except ValueError as e:
+                raise IncompleteCommand(str(e))
+            proc.passive = [p for p in proc.passive if p != name] + ([] if negate else [name])
+        elif word == "auto-cost":
+            tokens.keyword(("reference-bandwidth",))
+            proc.reference_bandwidth = None if negate else tokens.int(1, 4294967)
+            tokens.end()
+        else:
+            tokens.rest()
+
+    def _dhcp_command(self, context, tokens: _Tokens):
+        pool = context[1]
+        negate = tokens.maybe("no") is not None
+        word = tokens.keyword(self.DHCP_WORDS)
+        if word == "network":
+            if negate:
+                pool["network"] = None
+                tokens.rest()
+                return
+            address = tokens.ip()
+            if tokens.peek() is not None and tokens.peek().startswith("/"):
+                text = tokens.next()[1:]
+                if not text.isdigit():
+                    raise IncompleteCommand(text)
+                mask = int(text)
+            else:
+                mask = tokens.ip()
+            tokens.end()
+            pool["network"] = str(_network(address, mask))
+        elif word in ("default-router", "dns-server"):
+            key = word.replace("-", "_")
+            if negate:
+                pool[key] = []
+                tokens.rest()
+                return
+            servers = [str(tokens.ip())]
+            while tokens:
+                servers.append(str(tokens.ip()))
+            pool[key] = servers
+        elif word == "option":
+            code = tokens.int(0, 255)
+            value = tokens.rest()
+            if not value and not negate:
+                raise IncompleteCommand("option 缺少取值")
+            pool["options"] = [o for o in pool["options"] if o[0] != code] + ([] if negate else [[code, value]])
+        else:
+            tokens.rest()
+
+    def _vlan_command(self, context, tokens: _Tokens):
+        negate = tokens.maybe("no") is not None
+        word = tokens.keyword(self.VLAN_WORDS)
+        if word == "name":
+            name = None if negate else tokens.next()
+            tokens.end()
+            for vid in context[1]:
+                self.device.vlans[vid] = name
+
+
+_Parser.SUBMODES = {
+    "interface": (_Parser._interface_command, _Parser.INTERFACE_WORDS),
+    "ospf": (_Parser._ospf_command, _Parser.OSPF_WORDS),
+    "dhcp": (_Parser._dhcp_command, _Parser.DHCP_WORDS),
+    "vlan": (_Parser._vlan_command, _Parser.VLAN_WORDS),
+}
+
+
+def _unsupported():
+    raise IncompleteCommand("不支持的子命令")
+
+
+def _vlan_list(text: str):
+    ids = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        if not first.isdigit() or last and not last.isdigit():
+            raise IncompleteCommand(text)
+        ids += range(int(first), int(last or first) + 1)
+    if not ids or not all(1 <= v <= 4094 for v in ids):
+        raise IncompleteCommand(text)
+    return ids
+
+
+def _port_spec(tokens: _Tokens) -> str:
+    op = tokens.next().lower()
+    ports = [tokens.next()]
+    if op == "range":
+        ports.append(tokens.next())
+    return " ".join([op] + ports)
+
+
+def _static_route(tokens: _Tokens) -> dict:
+    prefix = _network(tokens.ip(), tokens.ip())
+    target = tokens.next()
+    next_hop = interface = None
+    try:
+        next_hop = str(ipaddress.IPv4Address(ip_to_int(target)))
+    except ValueError:
+        try:
+            interface = canonical_interface_name(target)
+        except ValueError as e:
+            raise IncompleteCommand(str(e))
+        if tokens.peek() is not None and tokens.peek()[:1].isdigit() and "." in tokens.peek():
+            next_hop = str(tokens.ip())
+    distance = tokens.int(1, 255) if tokens else 1
+    tokens.end()
+    return {"prefix": str(prefix), "next_hop": next_hop, "interface": interface, "distance": distance}
+
+
+# ---------- 对外接口 ----------
+def device_name_from_path(path: str) -> str:
+    """`1. 核心路由器1.txt` -> `核心路由器1`"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return FILE_PREFIX_RE.sub("", stem) or stem
+
+
+def parse_transcript(lines, name: str = "device") -> Device:
+    """解析一份抄录；lines 可以是任意可迭代的文本行（例如打开的文件对象），只遍历一次"""
+    parser = _Parser(name)
+    for line in lines:
+        parser.feed(line)
+    return parser.finish()
+
+
+def parse_file(path: str) -> Device:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_transcript(f, device_name_from_path(path))
+
+
+class ParseCache:
+    """按文件内容哈希缓存解析结果：<目录>/<blake2b>.json，写入时先写临时文件再原子替换"""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + ".json")
+
+    def get(self, digest: str):
+        try:
+            with open(self._path(digest), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if data.get("version") != PARSER_VERSION:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return Device.from_dict(data["device"])
+
+    def put(self, digest: str, device: Device):
+        path = self._path(digest)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": PARSER_VERSION, "device": device.to_dict()}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            # 缓存只是加速手段，写失败（只读目录、磁盘满）不影响解析结果
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def _parse_bytes(args):
+    name, data = args
+    return parse_transcript(data.decode("utf-8", errors="replace").splitlines(), name)
+
+
+def find_transcripts(paths) -> list:
+    """展开目录（取其中的 *.txt），保持稳定的排序"""
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            result += sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".txt"))
+        else:
+            result.append(path)
+    return result
+
+
+def load_devices(paths=(BASE_DIR,), cache_dir=DEFAULT_CACHE_DIR, workers: int = 0) -> list:
+    """
+    解析若干抄录文件（或目录），返回 Device 列表，顺序与文件顺序一致
+    - cache_dir 为 None 时不使用磁盘缓存
+    - workers > 1 时未命中缓存的文件交给进程池解析（文件数很多时有效）
+    """
+    files = find_transcripts(paths)
+    try:
+        cache = ParseCache(cache_dir) if cache_dir else None
+    except OSError:
+        # 缓存目录无法创建（只读文件系统、权限不足）时不使用缓存，照常解析
+        cache = None
+    devices = [None] * len(files)
+    misses = []
+    for i, path in enumerate(files):
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = ParseCache.digest(data)
+        device = cache.get(digest) if cache else None
+        if device is None:
+            misses.append((i, digest, data))
+        else:
+            device.name = device_name_from_path(path)   # 内容相同的文件共享缓存条目，名称以路径为准
+            devices[i] = device
+    jobs = [(device_name_from_path(files[i]), data) for i, _, data in misses]
+    if workers > 1 and len(jobs) > workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse_bytes, jobs, chunksize=max(1, len(jobs) // (workers * 8))))
+    else:
+        parsed = [_parse_bytes(job) for job in jobs]
+    for (i, digest, _), device in zip(misses, parsed):
+        devices[i] = device
+        if cache:
+            cache.put(digest, device)
+    return devices
+
+
+# ---------- 运行配置渲染 ----------
+def render_running_config(dev: Device) -> str:
+    """把还原出的配置按 show running-config 的顺序输出为文本"""
+    out = [f"hostname {dev.hostname}", "!"]
+    for start, end in dev.dhcp_excluded:
+        out.append(f"ip dhcp excluded-address {start}" + (f" {end}" if end != start else ""))
+    for name, pool in dev.dhcp_pools.items():
+        out.append(f"ip dhcp pool {name}")
+        if pool["network"]:
+            net = parse_network(pool["network"])
+            out.append(f" network {net.network_address} {net.netmask}")
+        if pool["default_router"]:
+            out.append(f" default-router {' '.join(pool['default_router'])}")
+        if pool["dns_server"]:
+            out.append(f" dns-server {' '.join(pool['dns_server'])}")
+        out += [f" option {code} {value}" for code, value in pool["options"]]
+        out.append("!")
+    if dev.kind == "switch" and dev.ip_routing:
+        out += ["ip routing", "!"]
+    for vid, name in sorted(dev.vlans.items()):
+        out.append(f"vlan {vid}")
+        if name:
+            out.append(f" name {name}")
+    if dev.vlans:
+        out.append("!")
+    for iface in dev.interfaces.values():
+        out.append(f"interface {iface.name}")
+        if iface.switchport is False:
+            out.append(" no switchport")
+        if iface.access_vlan is not None:
+            out.append(f" switchport access vlan {iface.access_vlan}")
+        if iface.trunk_encapsulation:
+            out.append(f" switchport trunk encapsulation {iface.trunk_encapsulation}")
+        if iface.mode:
+            out.append(f" switchport mode {iface.mode}")
+        if iface.voice_vlan is not None:
+            out.append(f" switchport voice vlan {iface.voice_vlan}")
+        if iface.channel_group:
+            out.append(f" channel-group {iface.channel_group[0]} mode {iface.channel_group[1]}")
+        if iface.bandwidth:
+            out.append(f" bandwidth {iface.bandwidth}")
+        if iface.address is not None:
+            out.append(f" ip address {iface.address.ip} {iface.address.netmask}")
+        elif iface.switchport is False or dev.kind == "router" or iface.name.startswith("Vlan"):
+            out.append(" no ip address")
+        if iface.acl_in:
+            out.append(f" ip access-group {iface.acl_in} in")
+        if iface.acl_out:
+            out.append(f" ip access-group {iface.acl_out} out")
+        if iface.nat:
+            out.append(f" ip nat {iface.nat}")
+        if iface.ospf_cost:
+            out.append(f" ip ospf cost {iface.ospf_cost}")
+        for group, hsrp in sorted(iface.standby.items()):
+            if hsrp["ip"]:
+                out.append(f" standby {group} ip {hsrp['ip']}")
+            if hsrp["priority"] != 100:
+                out.append(f" standby {group} priority {hsrp['priority']}")
+            if hsrp["preempt"]:
+                out.append(f" standby {group} preempt")
+            out += [f" standby {group} track {t}" for t in hsrp["track"]]
+        if iface.shutdown:
+            out.append(" shutdown")
+        out.append("!")
+    for proc in dev.ospf.values():
+        out.append(f"router ospf {proc.pid}")
+        if proc.router_id:
+            out.append(f" router-id {proc.router_id}")
+        if proc.reference_bandwidth:
+            out.append(f" auto-cost reference-bandwidth {proc.reference_bandwidth}")
+        out += [f" passive-interface {p}" for p in proc.passive]
+        out += [f" network {n.network_address} {n.hostmask} area {area}" for n, area in proc.networks]
+        if proc.default_originate:
+            out.append(" default-information originate" + (" always" if proc.default_originate == "always" else ""))
+        out.append("!")
+    for name, pool in dev.nat_pools.items():
+        out.append(f"ip nat pool {name} {pool['start']} {pool['end']} netmask {pool['netmask']}")
+    for rule in dev.nat_rules:
+        if rule["kind"] == "static":
+            out.append(f"ip nat {rule['direction']} source static {rule['local']} {rule['global']}")
+        else:
+            target = f"pool {rule['pool']}" if "pool" in rule else f"interface {rule['interface']}"
+            out.append(f"ip nat {rule['direction']} source list {rule['list']} {target}"
+                       + (" overload" if rule["overload"] else ""))
+    for route in dev.static_routes:
+        net = parse_network(route["prefix"])
+        target = " ".join(x for x in (route["interface"], route["next_hop"]) if x)
+        out.append(f"ip route {net.network_address} {net.netmask} {target}"
+                   + (f" {route['distance']}" if route["distance"] != 1 else ""))
+    if dev.nat_pools or dev.nat_rules or dev.static_routes:
+        out.append("!")
+    for number, entries in sorted(dev.acls.items()):
+        for e in entries:
+            parts = [f"access-list {number}", e["action"], e["protocol"], e["source"], e["destination"], e["options"]]
+            out.append(" ".join(p for p in parts if p))
+    if dev.acls:
+        out.append("!")
+    out.append("end")
+    return "\n".join(out)
+
+
+def summarize(dev: Device) -> str:
+    l3 = [i for i in dev.interfaces.values() if i.address is not None]
+    parts = [f"{dev.name} ({dev.hostname}, {dev.kind})",
+             f"接口 {len(dev.interfaces)}（三层 {len(l3)}）",
+             f"VLAN {len(dev.vlans)}",
+             f"OSPF {','.join(str(p) for p in dev.ospf) or '-'}",
+             f"静态路由 {len(dev.static_routes)}",
+             f"NAT 规则 {len(dev.nat_rules)}",
+             f"ACL {len(dev.acls)}",
+             f"DHCP 池 {len(dev.dhcp_pools)}",
+             f"命令 生效 {dev.applied} / 忽略 {dev.ignored}"]
+    return "  ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解析 IOS 控制台抄录，还原设备运行配置")
+    parser.add_argument("paths", nargs="*", default=[BASE_DIR], help="抄录文件或目录（默认 Experiment_final）")
+    parser.add_argument("--show", metavar="DEVICE", help="打印指定设备（文件名或主机名）还原后的运行配置")
+    parser.add_argument("--json", metavar="FILE", help="把全部解析结果写为 JSON")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="解析缓存目录")
+    parser.add_argument("--no-cache", action="store_true", help="不读写解析缓存")
+    parser.add_argument("--workers", type=int, default=0, help="解析进程数（文件很多时使用）")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    devices = load_devices(args.paths, None if args.no_cache else args.cache_dir, args.workers)
+    elapsed = time.perf_counter() - start
+    if args.show:
+        matches = [d for d in devices if args.show in (d.name, d.hostname)]
+        if not matches:
+            sys.exit(f"找不到设备: {args.show}")
+        for dev in matches:
+            print(f"! ---- {dev.name} ----")
+            print(render_running_config(dev))
+        return
+    for dev in devices:
+        print(summarize(dev))
+    print(f"[解析] {len(devices)} 台设备，用时 {elapsed * 1e3:.1f} ms")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([d.to_dict() for d in devices], f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
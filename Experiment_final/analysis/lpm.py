@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+最长前缀匹配（LPM）转发索引：回答“设备 X 去往 Y 用哪条路由”，支持 NumPy 批量查表
+
+- 结构为 DIR-16-8-8：第一级 65536 项按地址高 16 位直接索引；更长的前缀在对应项下挂 256 项的二级块
+  （按第 17-24 位索引），再长的挂三级块（按最后 8 位索引）。每项是一个 uint32：最高位为 0 时是结果编号
+  （0 表示没有路由），为 1 时其余位是下一级块号。任意地址最多 3 次数组访问
+- 构建时按前缀长度从短到长写入（受控前缀展开），长前缀覆盖短前缀，新建的块用父项的结果初始化
+- 三张表都是 array('I')，安装了 NumPy 时 bulk_lookup() 直接在这块内存上做向量化查表（不复制）；
+  没有 NumPy 时退回逐个查找，结果相同
+- 第一级 256 KB，每个二级 / 三级块 1 KB，校园网一台设备的索引约 270 KB
+
+用法（在 Experiment_final 目录下）：
+    python analysis/lpm.py Core-Router1 172.16.13.70 8.8.8.8     # 查询单个地址
+    python analysis/lpm.py Core-Router1 --range 172.16.0.0/20    # 统计整个网段的地址各走哪条路由
+"""
+
+import argparse
+import ipaddress
+import os
+import sys
+import time
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:   # 可选依赖：没有 NumPy 时批量查找退回逐个查找
+    np = None
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from config_parser import BASE_DIR, DEFAULT_CACHE_DIR
+
+BLOCK = 0x80000000
+BLOCK_SIZE = 256
+
+
+def address_to_int(address) -> int:
+    return address if isinstance(address, int) else int(ipaddress.IPv4Address(address))
+
+
+class LpmIndex:
+    """由 (前缀, 结果) 构建的只读 LPM 索引；结果编号从 1 开始，values[0] 为 None（无路由）"""
+
+    def __init__(self, routes):
+        self.values = [None]
+        self.level1 = array("I", [0]) * 65536
+        self.level2 = array("I")
+        self.level3 = array("I")
+        entries = []
+        for prefix, value in routes:
+            if not isinstance(prefix, ipaddress.IPv4Network):
+                prefix = ipaddress.IPv4Network(prefix)
+            self.values.append(value)
+            entries.append((prefix.prefixlen, int(prefix.network_address), len(self.values) - 1))
+        entries.sort()
+        for plen, network, result in entries:
+            self._insert(network, plen, result)
+        self._views = None
+
+    def __len__(self):
+        return len(self.values) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self.level1) + len(self.level2) + len(self.level3)) * self.level1.itemsize
+
+    def _block(self, table, entry) -> int:
+        """把一项展开成下一级块（已是块则直接返回块号），新块用原来的结果填满"""
+        if entry & BLOCK:
+            return entry ^ BLOCK
+        number = len(table) // BLOCK_SIZE
+        table.extend(array("I", [entry]) * BLOCK_SIZE)
+        return number
+
+    def _insert(self, network: int, plen: int, result: int):
+        if plen <= 16:
+            start = network >> 16
+            count = 1 << (16 - plen)
+            self.level1[start:start + count] = array("I", [result]) * count
+            return
+        top = network >> 16
+        block2 = self._block(self.level2, self.level1[top])
+        self.level1[top] = block2 | BLOCK
+        if plen <= 24:
+            start = block2 * BLOCK_SIZE + (network >> 8 & 0xFF)
+            count = 1 << (24 - plen)
+            self.level2[start:start + count] = array("I", [result]) * count
+            return
+        slot = block2 * BLOCK_SIZE + (network >> 8 & 0xFF)
+        block3 = self._block(self.level3, self.level2[slot])
+        self.level2[slot] = block3 | BLOCK
+        start = block3 * BLOCK_SIZE + (network & 0xFF)
+        count = 1 << (32 - plen)
+        self.level3[start:start + count] = array("I", [result]) * count
+
+    # ---------- 查找 ----------
+    def lookup_index(self, address) -> int:
+        """地址对应的结果编号，0 表示没有匹配的路由"""
+        address = address_to_int(address)
+        entry = self.level1[address >> 16]
+        if entry & BLOCK:
+            entry = self.level2[(entry ^ BLOCK) << 8 | (address >> 8 & 0xFF)]
+            if entry & BLOCK:
+                entry = self.level3[(entry ^ BLOCK) << 8 | (address & 0xFF)]
+        return entry
+
+    def lookup(self, address):
+        """地址匹配到的结果（构建时传入的 value），没有路由时返回 None"""
+        return self.values[self.lookup_index(address)]
+
+    def bulk_lookup(self, addresses):
+        """
+        批量查找结果编号。addresses 为 uint32 的 NumPy 数组（或整数序列）；
+        有 NumPy 时返回同长度的 uint32 数组，否则返回 array('I')
+        """
+        if np is None:
+            return array("I", (self.lookup_index(a) for a in addresses))
+        level1, level2, level3 = self._numpy_views()
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        result = level1[addresses >> 16]
+        deeper = np.flatnonzero(result & BLOCK)
+        if deeper.size:
+            sub = addresses[deeper]
+            entry = level2[(result[deeper] ^ BLOCK).astype(np.intp) << 8 | (sub >> 8 & 0xFF)]
+            deepest = np.flatnonzero(entry & BLOCK)
+            if deepest.size:
+                entry[deepest] = level3[(entry[deepest] ^ BLOCK).astype(np.intp) << 8 | (sub[deepest] & 0xFF)]
+            result[deeper] = entry
+        return result
+
+    def _numpy_views(self):
+        if self._views is None:
+            self._views = tuple(np.frombuffer(table, dtype=np.uint32) if len(table) else np.zeros(1, np.uint32)
+                                for table in (self.level1, self.level2, self.level3))
+        return self._views
+
+    def stats(self) -> dict:
+        return {"prefixes": len(self), "level2_blocks": len(self.level2) // BLOCK_SIZE,
+                "level3_blocks": len(self.level3) // BLOCK_SIZE, "bytes": self.nbytes}
+
+
+class LinearTable:
+    """朴素实现：按前缀长度从长到短逐条比较，作为基准与结果核对的参照"""
+
+    def __init__(self, routes):
+        self.values = [None]
+        self.entries = []
+        for prefix, value in routes:
+            prefix = ipaddress.IPv4Network(prefix)
+            self.values.append(value)
+            self.entries.append((prefix.prefixlen, int(prefix.network_address), int(prefix.netmask),
+                                 len(self.values) - 1))
+        self.entries.sort(reverse=True)
+
+    def lookup_index(self, address) -> int:
+        address = address_to_int(address)
+        for _, network, mask, result in self.entries:
+            if address & mask == network:
+                return result
+        return 0
+
+
+def network_addresses(network):
+    """网段内全部地址（含网络地址与广播地址）：有 NumPy 时为 uint32 数组，否则为 range"""
+    network = ipaddress.IPv4Network(network)
+    start = int(network.network_address)
+    if np is None:
+        return range(start, start + network.num_addresses)
+    return np.arange(start, start + network.num_addresses, dtype=np.uint64).astype(np.uint32)
+
+
+def main():
+    from ospf import OspfEngine
+    from topology import load_topology
+
+    parser = argparse.ArgumentParser(description="按设备路由表做最长前缀匹配查询")
+    parser.add_argument("device", help="设备（文件名或主机名）")
+    parser.add_argument("addresses", nargs="*", help="要查询的目的地址")
+    parser.add_argument("--range", metavar="网段", help="统计网段内所有地址各匹配到哪条路由")
+    parser.add_argument("--no-cache", action="store_true", help="不读写解析缓存")
+    args = parser.parse_args()
+
+    engine = OspfEngine(load_topology([BASE_DIR], None if args.no_cache else DEFAULT_CACHE_DIR))
+    try:
+        report(engine, args)
+    except (KeyError, ValueError) as e:
+        sys.exit(str(e.args[0]))
+
+
+def report(engine, args):
+    index = engine.forwarding_index(args.device)
+    print(f"[LPM] {args.device}：前缀 {len(index)} 条，索引 {index.nbytes / 1024:.0f} KB")
+    for address in args.addresses:
+        route = index.lookup(address)
+        print(f"  {address:<16} -> {route if route is not None else '无路由（丢弃）'}")
+    if not args.range:
+        return
+    addresses = network_addresses(args.range)
+    start = time.perf_counter()
+    results = index.bulk_lookup(addresses)
+    elapsed = time.perf_counter() - start
+    if np is not None:
+        counts = dict(zip(*(v.tolist() for v in np.unique(results, return_counts=True))))
+    else:
+        counts = Counter(results)
+    print(f"  {args.range}：{len(addresses)} 个地址，批量查找 {elapsed * 1e3:.2f} ms"
+          f"{'' if np is not None else '（未安装 NumPy，逐个查找）'}")
+    for result, count in sorted(counts.items(), key=lambda kv: -kv[1]):
+        route = index.values[result]
+        print(f"  {count:>8}  {route if route is not None else '无路由（丢弃）'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,754 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+OSPF 路由计算：由解析后的配置为每台设备算出路由表（直连 + 静态 + OSPF），支持 ECMP 与增量 SPF
+
+- 参与 OSPF 的接口：设备有 router ospf，接口地址落在某条 network 语句内；passive-interface 只通告网段、不建邻接
+- 开销：ip ospf cost，否则 参考带宽（默认 100 Mbit/s，auto-cost reference-bandwidth 可改）/ 接口带宽，最小为 1
+- 链路状态图：路由器为节点；同一子网上有 3 个及以上 OSPF 接口的网段建一个伪节点（相当于 Network-LSA，
+  路由器 -> 伪节点为接口开销，伪节点 -> 路由器为 0），只有两个接口的网段直接连成点到点边
+- 每台路由器各自运行 Dijkstra，等价路径的下一跳全部保留（ECMP）；同距离时伪节点先出堆，
+  保证经 0 开销边到达的路由器能合并所有等价下一跳
+- default-information originate：路由表里有默认路由（或 always）的路由器通告 0.0.0.0/0 E2 metric 1，
+  其余路由器按 metric、再按到 ASBR 的距离选路
+- 增量 SPF：接口 shutdown / 改开销时只改动该网段的边，已缓存的 SPF 树就地修补而不重算：
+  边删除 / 变大时只有经紧边（dist[u] + 开销 == dist[v]）到达的后代需要重新确定，从它们在集合外的前驱重新定初值后
+  在集合内跑 Dijkstra；边新增 / 变小时从边的终点出发，只沿距离变短或等价下一跳增加的节点传播；
+  与变化无关的树不会被触碰，路由表按需从树推导
+- 只处理单区域：area 号不同的 network 语句按同一个区域计算（本校园网全部为 area 0）
+
+用法（在 Experiment_final 目录下）：
+    python analysis/ospf.py                                   # 所有三层设备的路由表
+    python analysis/ospf.py --device Core-Router1
+    python analysis/ospf.py --shutdown Core-Router1:f0/1      # 假设关闭某接口，比较各设备路由表的变化
+    python analysis/ospf.py --cost Core-Router2:f0/1=50
+"""
+
+import argparse
+import heapq
+import ipaddress
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from config_parser import BASE_DIR, DEFAULT_CACHE_DIR
+from lpm import LpmIndex
+from topology import load_topology
+
+INF = float("inf")
+DEFAULT_REFERENCE_BANDWIDTH = 100          # Mbit/s，与 IOS 默认值相同
+# 未配置 bandwidth 时各类接口的默认带宽（kbit/s）
+DEFAULT_BANDWIDTH = {
+    "Ethernet": 10000,
+    "FastEthernet": 100000,
+    "GigabitEthernet": 1000000,
+    "Serial": 1544,
+    "Vlan": 100000,
+    "Port-channel": 200000,
+    "Loopback": 8000000,
+    "Tunnel": 100,
+}
+DISTANCE = {"C": 0, "S": 1, "O": 110}
+EXTERNAL_DEFAULT = ipaddress.IPv4Network("0.0.0.0/0")
+
+
+def interface_bandwidth(iface) -> int:
+    if iface.bandwidth:
+        return iface.bandwidth
+    kind = iface.name.rstrip("0123456789/.")
+    return DEFAULT_BANDWIDTH.get(kind, 100000)
+
+
+class Route:
+    """路由表中的一条路由；next_hops 为 ((出接口, 下一跳地址或 None), ...)"""
+    __slots__ = ("prefix", "protocol", "distance", "metric", "next_hops")
+
+    def __init__(self, prefix, protocol, distance, metric, next_hops):
+        self.prefix = prefix
+        self.protocol = protocol   # C / S / O / O*E2
+        self.distance = distance
+        self.metric = metric
+        self.next_hops = next_hops
+
+    def __eq__(self, other):
+        return isinstance(other, Route) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self):
+        return self.prefix, self.protocol, self.distance, self.metric, self.next_hops
+
+    def __str__(self):
+        code = self.protocol + ("*" if self.prefix == EXTERNAL_DEFAULT and self.protocol == "S" else "")
+        if self.protocol == "C":
+            return f"{code:<5}{str(self.prefix):<18} is directly connected, {self.next_hops[0][0]}"
+        hops = "; ".join(f"via {nh}, {ifname}" if nh and ifname else f"via {nh or ifname}"
+                         for ifname, nh in self.next_hops)
+        return f"{code:<5}{str(self.prefix):<18} [{self.distance}/{self.metric}] {hops}"
+
+
+class _OspfInterface:
+    __slots__ = ("router", "name", "address", "cost", "up", "passive", "segment")
+
+    def __init__(self, router, name, address, cost, up, passive):
+        self.router = router       # 路由器节点号
+        self.name = name
+        self.address = address     # 地址字符串（下一跳显示用）
+        self.cost = cost
+        self.up = up
+        self.passive = passive
+        self.segment = None
+
+
+class _Segment:
+    """一个 OSPF 子网：members 为配置在该子网上的全部 OSPF 接口（含关闭的），node 为伪节点号（3 个及以上接口时）"""
+    __slots__ = ("network", "members", "node", "edges")
+
+    def __init__(self, network):
+        self.network = network
+        self.members = []
+        self.node = None
+        self.edges = []            # 当前加入图中的有向边 (u, v, 开销, 出接口, 下一跳)
+
+
+class _Tree:
+    __slots__ = ("dist", "hops")
+
+    def __init__(self, dist, hops):
+        self.dist = dist
+        self.hops = hops
+
+
+class OspfEngine:
+    def __init__(self, topology, reference_bandwidth: int = None):
+        self.topology = topology
+        self.reference_bandwidth = reference_bandwidth
+        self.routers = []              # 节点号 -> 设备名（仅路由器部分）
+        self.index = {}                # 设备名 -> 节点号
+        self.interfaces = {}           # (设备名, 接口全名) -> _OspfInterface
+        self.segments = {}             # IPv4Network -> _Segment
+        self.asbr = {}                 # 路由器节点号 -> "originate" / "always"
+        self.adj = []                  # 节点号 -> [(v, 开销, 出接口, 下一跳)]
+        self.radj = []                 # 节点号 -> [(u, 开销, 出接口, 下一跳)]，增量 SPF 找前驱用
+        self.attached = []             # 节点号 -> [_Segment]，路由依赖该节点距离的网段（假设分析只比较这些前缀）
+        self._trees = {}               # 路由器节点号 -> _Tree（按需计算并缓存）
+        self._tables = {}              # 设备名 -> {prefix: Route}
+        self._fibs = {}                # 设备名 -> LpmIndex
+        self.spf_runs = 0
+        self._build()
+
+    # ---------- 构建 ----------
+    def _build(self):
+        for dev in self.topology.devices.values():
+            if dev.ospf and dev.routes_ip:
+                self.index[dev.name] = len(self.routers)
+                self.routers.append(dev.name)
+        for name, node in self.index.items():
+            dev = self.topology.devices[name]
+            passive = {p for proc in dev.ospf.values() for p in proc.passive}
+            ref = self.reference_bandwidth or next(
+                (p.reference_bandwidth for p in dev.ospf.values() if p.reference_bandwidth), DEFAULT_REFERENCE_BANDWIDTH)
+            if any(p.default_originate for p in dev.ospf.values()):
+                self.asbr[node] = "always" if any(p.default_originate == "always" for p in dev.ospf.values()) \
+                    else "originate"
+            for iface in dev.interfaces.values():
+                if iface.address is None or not any(p.covers(iface.address.ip) is not None for p in dev.ospf.values()):
+                    continue
+                cost = iface.ospf_cost or max(1, ref * 1000 // interface_bandwidth(iface))
+                oif = _OspfInterface(node, iface.name, str(iface.address.ip), cost, not iface.shutdown,
+                                     iface.name in passive)
+                seg = self.segments.get(iface.address.network)
+                if seg is None:
+                    seg = self.segments[iface.address.network] = _Segment(iface.address.network)
+                seg.members.append(oif)
+                oif.segment = seg
+                self.interfaces[(name, iface.name)] = oif
+
+        node_count = len(self.routers)
+        for seg in self.segments.values():
+            if len(seg.members) >= 3:
+                seg.node = node_count
+                node_count += 1
+        self.adj = [[] for _ in range(node_count)]
+        self.radj = [[] for _ in range(node_count)]
+        self.attached = [[] for _ in range(node_count)]
+        for seg in self.segments.values():
+            self._link(seg)
+            for node in {m.router for m in seg.members} | ({seg.node} if seg.node is not None else set()):
+                self.attached[node].append(seg)
+
+    def _segment_edges(self, seg):
+        """按接口当前状态生成网段的有向边"""
+        active = [m for m in seg.members if m.up and not m.passive]
+        if len(active) < 2:
+            return []
+        if seg.node is None:
+            a, b = active
+            return [(a.router, b.router, a.cost, a.name, b.address),
+                    (b.router, a.router, b.cost, b.name, a.address)]
+        edges = []
+        for m in active:
+            edges.append((m.router, seg.node, m.cost, m.name, None))
+            edges.append((seg.node, m.router, 0, None, m.address))
+        return edges
+
+    def _link(self, seg):
+        seg.edges = self._segment_edges(seg)
+        for u, v, cost, ifname, nh in seg.edges:
+            self.adj[u].append((v, cost, ifname, nh))
+            self.radj[v].append((u, cost, ifname, nh))
+
+    def _unlink(self, seg):
+        for u, v, cost, ifname, nh in seg.edges:
+            self.adj[u].remove((v, cost, ifname, nh))
+            self.radj[v].remove((u, cost, ifname, nh))
+        seg.edges = []
+
+    # ---------- SPF ----------
+    def _spf(self, root: int) -> _Tree:
+        """单源 Dijkstra，hops[v] 为到 v 的全部等价下一跳"""
+        self.spf_runs += 1
+        routers = len(self.routers)
+        adj = self.adj
+        dist = [INF] * len(adj)
+        hops = [None] * len(adj)
+        done = [False] * len(adj)
+        dist[root] = 0
+        hops[root] = ()
+        heap = [(0, 1, root)]
+        while heap:
+            du, _, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = True
+            hu = hops[u]
+            for v, cost, ifname, nh in adj[u]:
+                d = du + cost
+                dv = dist[v]
+                if d > dv or done[v]:
+                    continue
+                cand = _via(root, routers, u, hu, ifname, nh)
+                if d < dv:
+                    dist[v] = d
+                    hops[v] = cand
+                    heapq.heappush(heap, (d, 1 if v < routers else 0, v))
+                elif cand != hops[v]:
+                    hops[v] = _merge(hops[v], cand)
+        return _Tree(dist, hops)
+
+    def _repair_worse(self, root: int, tree: _Tree, worse) -> set:
+        """
+        边被删除或开销变大：只有最短路径经过这些边的节点（紧边上的后代集合 A）会受影响。
+        先从 A 之外的前驱重新给 A 中节点定初值，再在 A 内部跑 Dijkstra；返回重新确定的节点集合
+        """
+        dist, hops, adj, routers = tree.dist, tree.hops, self.adj, len(self.routers)
+        stack = [v for u, v, c in worse if dist[u] + c == dist[v] < INF]
+        affected = set(stack)
+        while stack:
+            x = stack.pop()
+            dx = dist[x]
+            for z, c, _, _ in adj[x]:
+                if z not in affected and dx + c == dist[z]:
+                    affected.add(z)
+                    stack.append(z)
+        if not affected:
+            return affected
+        for y in affected:
+            dist[y] = INF
+            hops[y] = None
+        heap = []
+        for y in affected:
+            best, best_hops = INF, None
+            for p, c, ifname, nh in self.radj[y]:
+                if p in affected or dist[p] == INF:
+                    continue
+                d = dist[p] + c
+                if d <= best:
+                    cand = _via(root, routers, p, hops[p], ifname, nh)
+                    best_hops = cand if d < best else _merge(best_hops, cand)
+                    best = d
+            if best < INF:
+                dist[y], hops[y] = best, best_hops
+                heap.append((best, 1 if y < routers else 0, y))
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            du, _, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            hu = hops[u]
+            for v, cost, ifname, nh in adj[u]:
+                if v not in affected or v in done:
+                    continue
+                d = du + cost
+                dv = dist[v]
+                if d > dv:
+                    continue
+                cand = _via(root, routers, u, hu, ifname, nh)
+                if d < dv:
+                    dist[v], hops[v] = d, cand
+                    heapq.heappush(heap, (d, 1 if v < routers else 0, v))
+                elif cand != hops[v]:
+                    hops[v] = _merge(hops[v], cand)
+        return affected
+
+    def _repair_better(self, root: int, tree: _Tree, better) -> set:
+        """
+        边新增或开销变小：从边的终点出发，只沿距离变短或等价下一跳增加的节点向外传播；
+        旧路径仍然有效，等距离时合并下一跳即可。返回更新的节点集合
+        """
+        dist, hops, adj, routers = tree.dist, tree.hops, self.adj, len(self.routers)
+        heap = []
+        touched = set()
+        for u, v, c, ifname, nh in better:
+            d = dist[u] + c
+            if d == INF or d > dist[v]:
+                continue
+            cand = _via(root, routers, u, hops[u], ifname, nh)
+            new = cand if d < dist[v] else _merge(hops[v], cand)
+            if d < dist[v] or new != hops[v]:
+                dist[v], hops[v] = d, new
+                touched.add(v)
+                heapq.heappush(heap, (d, 1 if v < routers else 0, v))
+        while heap:
+            du, _, u = heapq.heappop(heap)
+            if du != dist[u]:
+                continue
+            hu = hops[u]
+            for v, cost, ifname, nh in adj[u]:
+                d = du + cost
+                dv = dist[v]
+                if d > dv or v == root:
+                    continue
+                cand = _via(root, routers, u, hu, ifname, nh)
+                new = cand if d < dv else _merge(hops[v], cand)
+                if d < dv or new != hops[v]:
+                    dist[v], hops[v] = d, new
+                    touched.add(v)
+                    heapq.heappush(heap, (d, 1 if v < routers else 0, v))
+        return touched
+
+    def tree(self, name: str) -> _Tree:
+        node = self.index[name]
+        tree = self._trees.get(node)
+        if tree is None:
+            tree = self._trees[node] = self._spf(node)
+        return tree
+
+    def compute_all(self):
+        """为所有 OSPF 路由器计算 SPF 树（已缓存的跳过）"""
+        for name in self.routers:
+            self.tree(name)
+
+    # ---------- 路由表 ----------
+    def _ospf_route(self, node: int, tree: _Tree, seg: _Segment) -> Route:
+        """路由器 node 到某个 OSPF 网段的路由；本机直连或不可达时返回 None"""
+        dist, hops = tree.dist, tree.hops
+        up = [m for m in seg.members if m.up]
+        if not up or any(m.router == node for m in up):
+            return None   # 无人通告，或本机直连（直连路由优先）
+        if seg.node is not None and sum(1 for m in up if not m.passive) >= 2:
+            best, best_hops = dist[seg.node], hops[seg.node]
+        else:
+            best, best_hops = INF, ()
+            for m in up:
+                d = dist[m.router] + m.cost
+                if d < best:
+                    best, best_hops = d, hops[m.router]
+                elif d == best and d < INF:
+                    best_hops = _merge(best_hops, hops[m.router])
+        if best == INF or not best_hops:
+            return None
+        return Route(seg.network, "O", DISTANCE["O"], best, best_hops)
+
+    def _ospf_default(self, node: int, tree: _Tree) -> Route:
+        """O*E2 默认路由：各 ASBR 的 metric 相同（1），按到 ASBR 的距离选，等距离时合并下一跳"""
+        best, best_hops = INF, ()
+        for asbr in self.asbr:
+            if asbr == node or not self._originates_default(asbr):
+                continue
+            d = tree.dist[asbr]
+            if d < best:
+                best, best_hops = d, tree.hops[asbr]
+            elif d == best and d < INF:
+                best_hops = _merge(best_hops, tree.hops[asbr])
+        if best == INF or not best_hops:
+            return None
+        return Route(EXTERNAL_DEFAULT, "O*E2", DISTANCE["O"], 1, best_hops)
+
+    def _ospf_prefix(self, node: int, tree: _Tree, prefix) -> Route:
+        if prefix == EXTERNAL_DEFAULT:
+            return self._ospf_default(node, tree)
+        seg = self.segments.get(prefix)
+        return self._ospf_route(node, tree, seg) if seg is not None else None
+
+    def _originates_default(self, node: int) -> bool:
+        """default-information originate 需要本机路由表中已有非 OSPF 的默认路由（always 除外）"""
+        if self.asbr.get(node) == "always":
+            return True
+        dev = self.topology.devices[self.routers[node]]
+        connected = self._connected(dev)
+        return any(r["prefix"] == "0.0.0.0/0" and self._static_next_hop(dev, r, lambda a: _lpm(connected, a))
+                   for r in dev.static_routes)
+
+    def _connected(self, dev) -> dict:
+        routes = {}
+        if not dev.routes_ip:
+            return routes
+        for iface in dev.interfaces.values():
+            if iface.address is not None and not iface.shutdown:
+                net = iface.address.network
+                routes.setdefault(net, Route(net, "C", DISTANCE["C"], 0, ((iface.name, None),)))
+        return routes
+
+    def _static_next_hop(self, dev, route, resolve):
+        """
+        静态路由的出接口与下一跳；resolve(地址) 在直连与 OSPF 路由（不含默认路由）中查找下一跳，
+        下一跳不可达时返回 None
+        """
+        if route["interface"]:
+            iface = dev.interfaces.get(route["interface"])
+            if iface is None or iface.shutdown:
+                return None
+            return ((route["interface"], route["next_hop"]),)
+        via = resolve(ipaddress.IPv4Address(route["next_hop"]))
+        if via is None:
+            return None
+        return tuple((ifname, route["next_hop"]) for ifname, _ in via.next_hops)
+
+    def _static_routes(self, dev, resolve) -> dict:
+        routes = {}
+        for static in dev.static_routes:
+            hops = self._static_next_hop(dev, static, resolve)
+            if hops is None:
+                continue
+            prefix = ipaddress.IPv4Network(static["prefix"])
+            current = routes.get(prefix)
+            if current is None or static["distance"] < current.distance:
+                routes[prefix] = Route(prefix, "S", static["distance"], 0, hops)
+            elif static["distance"] == current.distance:
+                current.next_hops = _merge(current.next_hops, hops)
+        return routes
+
+    def _context(self, dev):
+        """设备的直连路由、SPF 树与静态路由（静态路由的下一跳经直连 / OSPF 递归解析）"""
+        connected = self._connected(dev)
+        node = self.index.get(dev.name)
+        tree = self.tree(dev.name) if node is not None else None
+
+        def dynamic(address):
+            value = int(address)
+            for plen in range(32, 0, -1):
+                prefix = ipaddress.IPv4Network((value >> (32 - plen) << (32 - plen), plen))
+                route = connected.get(prefix) or (self._ospf_prefix(node, tree, prefix) if tree else None)
+                if route is not None:
+                    return route
+            return None
+
+        return connected, node, tree, self._static_routes(dev, dynamic)
+
+    def routing_table(self, name: str) -> dict:
+        """设备的路由表 {prefix: Route}，按管理距离选出每个前缀的最优路由"""
+        dev = self.topology.device(name)
+        table = self._tables.get(dev.name)
+        if table is not None:
+            return table
+        connected, node, tree, statics = self._context(dev)
+        ospf = {}
+        if tree is not None:
+            for seg in self.segments.values():
+                route = self._ospf_route(node, tree, seg)
+                if route is not None:
+                    ospf[seg.network] = route
+            route = self._ospf_default(node, tree)
+            if route is not None:
+                ospf[EXTERNAL_DEFAULT] = route
+        table = {}
+        for prefix in set(connected) | set(statics) | set(ospf):
+            table[prefix] = _pick(connected.get(prefix), statics.get(prefix), ospf.get(prefix))
+        table = dict(sorted(table.items(), key=lambda kv: (kv[0].network_address, kv[0].prefixlen)))
+        self._tables[dev.name] = table
+        return table
+
+    def route(self, name: str, destination) -> Route:
+        """
+        最长前缀匹配：设备去往 destination 使用的路由，没有时返回 None；
+        路由表未缓存时逐个前缀长度探测，不推导整张表（假设分析后的单次查询用）
+        """
+        address = ipaddress.IPv4Address(destination)
+        dev = self.topology.device(name)
+        table = self._tables.get(dev.name)
+        if table is not None:
+            return _lpm(table, address)
+        connected, node, tree, statics = self._context(dev)
+        value = int(address)
+        for plen in range(32, -1, -1):
+            prefix = ipaddress.IPv4Network((value >> (32 - plen) << (32 - plen), plen))
+            route = _pick(connected.get(prefix), statics.get(prefix),
+                          self._ospf_prefix(node, tree, prefix) if tree else None)
+            if route is not None:
+                return route
+        return None
+
+    def forwarding_index(self, name: str) -> LpmIndex:
+        """设备路由表的 LPM 索引（结果为 Route），用于大量地址的查表；接口变化后重新构建"""
+        dev = self.topology.device(name)
+        index = self._fibs.get(dev.name)
+        if index is None:
+            index = self._fibs[dev.name] = LpmIndex(self.routing_table(dev.name).items())
+        return index
+
+    # ---------- 变化与增量 SPF ----------
+    def _interface(self, device: str, iface: str):
+        """(设备, 接口, 对应的 OSPF 接口或 None)；找不到时抛出 KeyError"""
+        dev = self.topology.device(device)
+        interface = dev.find_interface(iface)
+        return dev, interface, self.interfaces.get((dev.name, interface.name))
+
+    def set_interface(self, device: str, iface: str, shutdown: bool = None, cost: int = None) -> dict:
+        """
+        修改接口状态或 OSPF 开销，返回 {"trees": 改动的 SPF 树数, "nodes": 重新确定的节点数,
+        "cached": 缓存的树数, "seconds": 用时}；接口不参与 OSPF 时只影响直连 / 静态路由
+        """
+        start = time.perf_counter()
+        changed = self._apply(device, iface, shutdown, cost)
+        return {"trees": len(changed), "nodes": sum(map(len, changed.values())), "cached": len(self._trees),
+                "seconds": time.perf_counter() - start}
+
+    def _apply(self, device: str, iface: str, shutdown: bool = None, cost: int = None):
+        """set_interface() 的实现，返回 {SPF 树被改动的路由器节点号: 树中重新确定的节点集合}"""
+        _, interface, oif = self._interface(device, iface)
+        if shutdown is not None:
+            interface.shutdown = shutdown
+        changed = {}
+        if oif is not None:
+            if shutdown is not None:
+                oif.up = not shutdown
+            if cost is not None:
+                oif.cost = cost
+            seg = oif.segment
+            old = seg.edges
+            self._unlink(seg)
+            self._link(seg)
+            changed = self._update_trees(old, seg.edges)
+        self._tables.clear()   # 路由表按需重新推导（前缀的通告者也可能变了）
+        self._fibs.clear()
+        return changed
+
+    def _update_trees(self, old_edges, new_edges):
+        """把网段边的变化增量地应用到所有已缓存的 SPF 树，返回 {改动的树的根节点号: 重新确定的节点集合}"""
+        old = {(u, v, ifname): (cost, nh) for u, v, cost, ifname, nh in old_edges}
+        new = {(u, v, ifname): (cost, nh) for u, v, cost, ifname, nh in new_edges}
+        worse = [(u, v, c) for (u, v, i), (c, _) in old.items() if (u, v, i) not in new or new[(u, v, i)][0] > c]
+        better = [(u, v, c, i, nh) for (u, v, i), (c, nh) in new.items() if (u, v, i) not in old or old[(u, v, i)][0] > c]
+        changed = {}
+        for root, tree in self._trees.items():
+            nodes = self._repair_worse(root, tree, worse) if worse else set()
+            if better:
+                nodes |= self._repair_better(root, tree, better)
+            if nodes:
+                changed[root] = nodes
+        return changed
+
+    def invalidate(self):
+        """丢弃全部 SPF 树与路由表（用于与增量更新对比的全量重算）"""
+        self._trees.clear()
+        self._tables.clear()
+        self._fibs.clear()
+
+    def _exposure(self, dev, oif) -> dict:
+        """
+        SPF 树不变时路由表仍可能变化的部分：各缓存树到被修改网段的路由（通告者或开销变了），
+        以及修改的是 ASBR 时的默认路由（默认路由的通告条件可能变了）；{路由器节点号: (网段路由, 默认路由)}
+        """
+        seg = oif.segment if oif is not None else None
+        asbr = self.index.get(dev.name) in self.asbr
+        if seg is None and not asbr:
+            return {}
+        return {node: (self._ospf_route(node, tree, seg) if seg is not None else None,
+                       self._ospf_default(node, tree) if asbr else None)
+                for node, tree in self._trees.items()}
+
+    def _partial_table(self, dev, segments, prefixes) -> list:
+        """
+        设备去往 segments（只看 OSPF 路由）与 prefixes（按管理距离完整选择）的路由，与参数顺序一一对应，
+        没有路由为 None；不推导整张表，假设分析时变化前后按位置比较
+        """
+        connected, node, tree, statics = self._context(dev)
+        routes = [self._ospf_route(node, tree, seg) for seg in segments] if tree else [None] * len(segments)
+        for prefix in prefixes:
+            routes.append(_pick(connected.get(prefix), statics.get(prefix),
+                                self._ospf_prefix(node, tree, prefix) if tree else None))
+        return routes
+
+    def _affected(self, name, dev, oif, changed):
+        """
+        修改 dev 的接口后，设备 name 的路由表中可能变化的部分：(OSPF 网段列表, 前缀列表)。
+        网段为被修改的网段和 SPF 树中重新确定的节点所连的网段；本机直连、静态路由的前缀（下一跳可能改走别处）
+        以及受影响的默认路由放入前缀列表完整比较，对应的网段不再重复
+        """
+        target = self.topology.devices[name]
+        prefixes = {ipaddress.IPv4Network(r["prefix"]) for r in target.static_routes}
+        prefixes.update(i.address.network for i in target.interfaces.values() if i.address is not None)
+        segments = {oif.segment} if oif is not None else set()
+        node = self.index.get(name)
+        if node is not None:
+            touched = changed.get(node, ())
+            for x in touched:
+                segments.update(self.attached[x])
+            if self.index.get(dev.name) in self.asbr or any(x in self.asbr for x in touched):
+                prefixes.add(EXTERNAL_DEFAULT)
+        local = {self.segments.get(prefix) for prefix in prefixes}
+        return [seg for seg in segments if seg not in local], list(prefixes)
+
+    def what_if(self, device: str, iface: str, shutdown: bool = None, cost: int = None, devices=None) -> dict:
+        """
+        假设修改某接口，返回 {"changes": {设备名: (消失的路由, 新增的路由)}, "compared", "trees", "nodes", "seconds"}，
+        计算完成后恢复原状态（出错时也恢复）。devices 为要比较的设备；默认只比较接口所在设备，
+        以及 SPF 树已缓存、且树或受影响网段的路由确实变化的路由器（未缓存树的路由器不参与比较，
+        需要全网结果时先调用 compute_all()）。每台设备只比较 _affected() 给出的部分，
+        变化后的在恢复前推导，变化前的在恢复后推导
+        """
+        start = time.perf_counter()
+        dev, interface, oif = self._interface(device, iface)
+        saved_shutdown = interface.shutdown
+        saved_cost = oif.cost if oif is not None else None
+        if devices is not None:
+            devices = [self.topology.device(d).name for d in devices]
+        # 变化前先建好要比较的树（默认总会比较接口所在设备），变化时随其他缓存的树一起增量更新，才知道哪些节点变了
+        for name in [dev.name] if devices is None else devices:
+            if name in self.index:
+                self.tree(name)
+        exposed = self._exposure(dev, oif)
+        try:
+            changed = self._apply(device, iface, shutdown, cost)
+            if devices is None:
+                nodes = set(changed) | {node for node, value in self._exposure(dev, oif).items()
+                                        if value != exposed[node]}
+                names = {dev.name} | {self.routers[node] for node in nodes}
+                devices = [d.name for d in self.topology.devices.values() if d.routes_ip and d.name in names]
+            parts = {d: self._affected(d, dev, oif, changed) for d in devices}
+            after = {d: self._partial_table(self.topology.devices[d], *parts[d]) for d in devices}
+        finally:
+            self._apply(device, iface, saved_shutdown, saved_cost)
+        changes = {}
+        for d in devices:
+            before = self._partial_table(self.topology.devices[d], *parts[d])
+            diff = [(old, new) for old, new in zip(before, after[d]) if old != new]
+            if diff:
+                changes[d] = (sorted((old for old, _ in diff if old is not None), key=_route_key),
+                              sorted((new for _, new in diff if new is not None), key=_route_key))
+        return {"changes": changes, "compared": len(devices), "trees": len(changed),
+                "nodes": sum(map(len, changed.values())), "seconds": time.perf_counter() - start}
+
+
+def _hop_key(hop):
+    return hop[0] or "", hop[1] or ""
+
+
+def _pick(*routes):
+    """同一前缀的候选路由中取管理距离最小的（参数顺序即同距离时的优先级）"""
+    best = None
+    for route in routes:
+        if route is not None and (best is None or route.distance < best.distance):
+            best = route
+    return best
+
+
+def _lpm(table, address):
+    best = None
+    for prefix, route in table.items():
+        if address in prefix and (best is None or prefix.prefixlen > best.prefix.prefixlen):
+            best = route
+    return best
+
+
+def _merge(a, b):
+    return tuple(sorted(set(a) | set(b), key=_hop_key))
+
+
+def _via(root, routers, u, hops_u, ifname, nh):
+    """经 u 的边 (ifname, nh) 到达邻居时的下一跳集合"""
+    if u == root:
+        return ((ifname, nh),)
+    if u >= routers:
+        # 伪节点：与根直连的网段，下一跳是对端路由器在该网段上的地址
+        hops = tuple((i, nh if a is None else a) for i, a in hops_u)
+        return hops if len(hops) < 2 else tuple(sorted(set(hops), key=_hop_key))
+    return hops_u
+
+
+def _route_key(route):
+    return int(route.prefix.network_address), route.prefix.prefixlen, route.protocol
+
+
+def _parse_target(text: str):
+    device, sep, iface = text.partition(":")
+    if not sep or not iface:
+        raise argparse.ArgumentTypeError("格式应为 设备:接口，例如 Core-Router1:f0/1")
+    return device, iface
+
+
+def _parse_cost(text: str):
+    target, sep, value = text.rpartition("=")
+    if not sep or not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError("格式应为 设备:接口=开销，开销为正整数，例如 Core-Router2:f0/1=50")
+    return _parse_target(target) + (int(value),)
+
+
+def print_table(engine, name):
+    dev = engine.topology.device(name)
+    print(f"---- {dev.hostname} ({dev.name}) ----")
+    for route in engine.routing_table(dev.name).values():
+        print(f"  {route}")
+
+
+def print_what_if(engine, device, iface, shutdown=None, cost=None):
+    result = engine.what_if(device, iface, shutdown=shutdown, cost=cost)
+    label = f"关闭 {device} {iface}" if cost is None else f"{device} {iface} 开销改为 {cost}"
+    print(f"[假设] {label}：增量更新 SPF 树 {result['trees']} 棵（{result['nodes']} 个节点），"
+          f"用时 {result['seconds'] * 1e3:.2f} ms")
+    if not result["changes"]:
+        print("  所有设备的路由表均无变化")
+    for name, (removed, added) in result["changes"].items():
+        print(f"---- {engine.topology.devices[name].hostname} ({name}) ----")
+        for route in removed:
+            print(f"  - {route}")
+        for route in added:
+            print(f"  + {route}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="由设备配置计算 OSPF / 静态 / 直连路由表，支持假设分析")
+    parser.add_argument("paths", nargs="*", default=[BASE_DIR], help="抄录文件或目录（默认 Experiment_final）")
+    parser.add_argument("--device", action="append", help="只打印指定设备（文件名或主机名），可重复")
+    parser.add_argument("--shutdown", type=_parse_target, metavar="设备:接口", help="假设关闭该接口")
+    parser.add_argument("--cost", type=_parse_cost, metavar="设备:接口=开销", help="假设修改该接口的 OSPF 开销")
+    parser.add_argument("--no-cache", action="store_true", help="不读写解析缓存")
+    args = parser.parse_args()
+
+    topo = load_topology(args.paths, None if args.no_cache else DEFAULT_CACHE_DIR)
+    engine = OspfEngine(topo)
+    start = time.perf_counter()
+    engine.compute_all()
+    print(f"[SPF] OSPF 路由器 {len(engine.routers)} 台，网段 {len(engine.segments)}，"
+          f"全量 SPF 用时 {(time.perf_counter() - start) * 1e3:.2f} ms")
+    try:
+        if args.shutdown:
+            print_what_if(engine, *args.shutdown, shutdown=True)
+        if args.cost:
+            device, iface, cost = args.cost
+            print_what_if(engine, device, iface, cost=cost)
+        if not (args.shutdown or args.cost):
+            for name in args.device or [d.name for d in topo.devices.values() if d.routes_ip]:
+                print_table(engine, name)
+    except KeyError as e:
+        sys.exit(e.args[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成网络：生成与 Experiment_final 抄录风格相同的大规模路由器配置，供解析、SPF 与查表基准使用
+
+- 路由器之间先连成随机生成树保证连通，再按 --degree 补充随机链路；每条链路一个 /30（10.0.0.0/8 中分配），
+  每台路由器带一个 /24 用户网段（100.64.0.0/10 中分配，最多 16384 台）
+- 抄录里混入与真实文件相同的噪声：敲了一半的命令、`% Incomplete command.`、日志行与 `//` 注释
+- 同一 seed 生成的内容完全相同
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+
+LINK_BASE = int(ipaddress.IPv4Address("10.0.0.0"))
+LAN_BASE = int(ipaddress.IPv4Address("100.64.0.0"))
+MAX_ROUTERS = 16384
+
+
+def router_links(n: int, degree: float = 3.0, seed: int = 1):
+    """随机连通图的边列表 [(a, b)]，平均度数约为 degree"""
+    rng = random.Random(seed)
+    edges = set()
+    for i in range(1, n):
+        # 偏向最近加入的节点，生成树不会退化成星形
+        j = rng.randrange(max(0, i - 50), i)
+        edges.add((j, i))
+    # 不超过完全图的边数，否则小规模或高度数时永远凑不够
+    target = min(int(n * degree / 2), n * (n - 1) // 2)
+    while len(edges) < target:
+        a, b = rng.sample(range(n), 2)
+        edges.add((min(a, b), max(a, b)))
+    return sorted(edges)
+
+
+def generate_transcripts(n: int, degree: float = 3.0, seed: int = 1, default_router: int = 0):
+    """返回 {文件名: 抄录文本}；default_router 号路由器配置默认路由并 default-information originate"""
+    if not 1 <= n <= MAX_ROUTERS:
+        raise ValueError(f"路由器数量需在 1..{MAX_ROUTERS} 之间")
+    rng = random.Random(seed)
+    ports = [[] for _ in range(n)]  # 每台路由器的 (接口名, 地址, 掩码)
+    for k, (a, b) in enumerate(router_links(n, degree, seed)):
+        net = LINK_BASE + k * 4
+        for side, host in ((a, 1), (b, 2)):
+            ports[side].append((f"g0/{len(ports[side])}", str(ipaddress.IPv4Address(net + host)), "255.255.255.252"))
+
+    files = {}
+    for i in range(n):
+        host = f"R{i}"
+        lan = str(ipaddress.IPv4Address(LAN_BASE + i * 256 + 1))
+        lines = ["Router>en", "Router#conf t", "Enter configuration commands, one per line.  End with CNTL/Z.",
+                 f"Router(config)#hostname {host}", ""]
+        lines += [f"{host}(config)#int f0/0", f"{host}(config-if)#ip add",
+                  f"{host}(config-if)#ip address {lan} 255.255.255.0", f"{host}(config-if)#no shut",
+                  f"{host}(config-if)#exit"]
+        for name, address, mask in ports[i]:
+            lines += [f"{host}(config)#int {name}"]
+            if rng.random() < 0.2:
+                lines += [f"{host}(config-if)#ip address {address}", "% Incomplete command.", ""]
+            lines += [f"{host}(config-if)#ip address {address} {mask}", f"{host}(config-if)#no shutdown",
+                      "%LINK-5-CHANGED: Interface changed state to up", f"{host}(config-if)#exit"]
+        lines += ["", "//OSPF配置", f"{host}(config)#router ospf 1",
+                  f"{host}(config-router)#network {ipaddress.IPv4Address(LAN_BASE + i * 256)} 0.0.0.255 area 0"]
+        for name, address, _ in ports[i]:
+            net = ipaddress.IPv4Network(f"{address}/30", strict=False)
+            if rng.random() < 0.1:
+                lines.append(f"{host}(config-router)#net")
+            lines.append(f"{host}(config-router)#network {net.network_address} 0.0.0.3 area 0")
+        if i == default_router:
+            lines += [f"{host}(config-router)#def", f"{host}(config-router)#default-information originate",
+                      f"{host}(config-router)#exit", f"{host}(config)#ip route 0.0.0.0 0.0.0.0 f0/0"]
+        else:
+            lines.append(f"{host}(config-router)#exit")
+        files[f"{i:05d}. {host}.txt"] = "\n".join(lines) + "\n"
+    return files
+
+
+def write_transcripts(directory: str, n: int, degree: float = 3.0, seed: int = 1) -> list:
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, text in generate_transcripts(n, degree, seed).items():
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成路由器抄录")
+    parser.add_argument("directory", help="输出目录")
+    parser.add_argument("--routers", type=int, default=1000, help="路由器数量")
+    parser.add_argument("--degree", type=float, default=3.0, help="平均邻居数")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    args = parser.parse_args()
+    paths = write_transcripts(args.directory, args.routers, args.degree, args.seed)
+    print(f"已生成 {len(paths)} 个抄录文件: {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
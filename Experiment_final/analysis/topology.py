@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+由解析后的设备配置构建三层拓扑：处于同一子网的接口视为相连
+
+- 每个子网是一个网段（Segment），两台设备即点到点链路，三台及以上为多路访问网段
+  （如核心交换机 SVI 与学院路由器共处的 VLAN）；图是“设备 - 网段”的二部图，
+  neighbors() / links() 再展开为设备之间的邻接关系
+- 只统计配置了地址且未 shutdown 的接口；二层交换机没有三层接口，作为孤立节点保留
+- 两端掩码不一致（如 /30 对 /27）但地址互相落在对方子网内时仍视为相连，并记为告警；
+  同一地址出现在多个接口上（地址冲突）同样记为告警
+- 按网络地址分组一次完成，掩码不一致的合并只需对每个网段查询各个更短前缀，
+  数千台设备时仍是线性时间
+
+用法（在 Experiment_final 目录下）：
+    python analysis/topology.py                 # 打印网段、设备邻接与告警
+    python analysis/topology.py --json topo.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from config_parser import BASE_DIR, DEFAULT_CACHE_DIR, load_devices
+
+
+class Segment:
+    """一个三层网段：network 为成员中最短前缀对应的网络，members 为 (设备名, 接口名)"""
+    __slots__ = ("network", "members")
+
+    def __init__(self, network):
+        self.network = network
+        self.members = []
+
+    @property
+    def is_transit(self) -> bool:
+        return len({dev for dev, _ in self.members}) > 1
+
+    def to_dict(self) -> dict:
+        return {"network": str(self.network), "members": [list(m) for m in self.members]}
+
+
+class Topology:
+    def __init__(self, devices):
+        self.devices = {}
+        self.warnings = []
+        self._hostnames = defaultdict(list)
+        for dev in devices:
+            if dev.name in self.devices:
+                raise ValueError(f"设备名重复: {dev.name}")
+            self.devices[dev.name] = dev
+            self._hostnames[dev.hostname].append(dev.name)
+        self.segments = {}          # IPv4Network -> Segment
+        self._segment_of = {}       # (设备名, 接口名) -> Segment
+        self._build()
+
+    # ---------- 构建 ----------
+    def _build(self):
+        groups = defaultdict(list)  # 网络 -> [(设备名, 接口名)]
+        owners = defaultdict(list)  # 地址 -> [(设备名, 接口名)]
+        for dev in self.devices.values():
+            for iface in dev.interfaces.values():
+                if iface.address is None or iface.shutdown:
+                    continue
+                groups[iface.address.network].append((dev.name, iface.name))
+                owners[iface.address.ip].append((dev.name, iface.name))
+
+        for ip, members in owners.items():
+            if len(members) > 1:
+                self.warnings.append(f"地址冲突 {ip}: " + ", ".join(f"{d} {i}" for d, i in members))
+
+        # 掩码不一致的合并：较长前缀的网段并入包含它、且成员地址也落在它里面的较短前缀网段
+        prefixes = sorted({net.prefixlen for net in groups})
+        merged_into = {}
+        for net in sorted(groups, key=lambda n: n.prefixlen):
+            for plen in prefixes:
+                if plen >= net.prefixlen:
+                    break
+                parent = net.supernet(new_prefix=plen)
+                parent = merged_into.get(parent, parent)
+                if parent in groups and parent not in merged_into and \
+                        all(self._address(d, i).ip in net for d, i in groups[parent]):
+                    merged_into[net] = parent
+                    self.warnings.append(
+                        f"掩码不一致 {net} / {parent}: " + ", ".join(f"{d} {i}" for d, i in groups[net] + groups[parent]))
+                    break
+
+        for net, members in groups.items():
+            seg_net = merged_into.get(net, net)
+            seg = self.segments.get(seg_net)
+            if seg is None:
+                seg = self.segments[seg_net] = Segment(seg_net)
+            seg.members += members
+        for seg in self.segments.values():
+            seg.members.sort()
+            for member in seg.members:
+                self._segment_of[member] = seg
+
+    def _address(self, device_name, iface_name):
+        return self.devices[device_name].interfaces[iface_name].address
+
+    # ---------- 查询 ----------
+    def device(self, name: str):
+        """按设备名（文件名）或唯一的主机名查找设备，找不到或主机名重复时抛出 KeyError"""
+        dev = self.devices.get(name)
+        if dev is not None:
+            return dev
+        names = self._hostnames.get(name, [])
+        if len(names) == 1:
+            return self.devices[names[0]]
+        if names:
+            raise KeyError(f"主机名 {name} 不唯一: {', '.join(names)}")
+        raise KeyError(f"找不到设备: {name}")
+
+    def segment_of(self, device_name: str, iface_name: str):
+        return self._segment_of.get((device_name, iface_name))
+
+    def neighbors(self, device_name: str) -> dict:
+        """{邻居设备名: [(本端接口, 对端接口, 网段)]}"""
+        result = defaultdict(list)
+        dev = self.devices[device_name]
+        for iface in dev.interfaces.values():
+            seg = self._segment_of.get((device_name, iface.name))
+            if seg is None:
+                continue
+            for other, other_iface in seg.members:
+                if other != device_name:
+                    result[other].append((iface.name, other_iface, seg.network))
+        return dict(result)
+
+    def links(self):
+        """设备之间的无向链路：(设备A, 接口A, 设备B, 接口B, 网段)，每对只出现一次"""
+        for seg in self.segments.values():
+            members = seg.members
+            for i, (a, ia) in enumerate(members):
+                for b, ib in members[i + 1:]:
+                    if a != b:
+                        yield a, ia, b, ib, seg.network
+
+    def components(self):
+        """按链路划分的连通分量（设备名列表），孤立的二层交换机各自成为一个分量"""
+        parent = {name: name for name in self.devices}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for seg in self.segments.values():
+            first = find(seg.members[0][0])
+            for dev, _ in seg.members[1:]:
+                root = find(dev)
+                if root != first:
+                    parent[root] = first
+        groups = defaultdict(list)
+        for name in self.devices:
+            groups[find(name)].append(name)
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "devices": {name: {"hostname": d.hostname, "kind": d.kind} for name, d in self.devices.items()},
+            "segments": [s.to_dict() for s in sorted(self.segments.values(), key=lambda s: s.network)],
+            "warnings": self.warnings,
+        }
+
+
+def load_topology(paths=(BASE_DIR,), cache_dir=DEFAULT_CACHE_DIR, workers: int = 0) -> Topology:
+    return Topology(load_devices(paths, cache_dir, workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="由设备配置构建三层拓扑（同子网的接口视为相连）")
+    parser.add_argument("paths", nargs="*", default=[BASE_DIR], help="抄录文件或目录（默认 Experiment_final）")
+    parser.add_argument("--json", metavar="FILE", help="把拓扑写为 JSON")
+    parser.add_argument("--no-cache", action="store_true", help="不读写解析缓存")
+    args = parser.parse_args()
+
+    topo = load_topology(args.paths, None if args.no_cache else DEFAULT_CACHE_DIR)
+    print(f"[拓扑] 设备 {len(topo.devices)}，网段 {len(topo.segments)}，"
+          f"链路 {sum(1 for _ in topo.links())}，连通分量 {len(topo.components())}")
+    for seg in sorted(topo.segments.values(), key=lambda s: s.network):
+        members = ", ".join(f"{topo.devices[d].hostname}({d}) {i}" for d, i in seg.members)
+        print(f"  {str(seg.network):<18} {'中转' if seg.is_transit else '末端'}  {members}")
+    for warning in topo.warnings:
+        print(f"⚠️  {warning}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(topo.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LPM 查表基准：比较三种查找方式的 查找/秒
+- 朴素线性扫描（LinearTable，按前缀长度从长到短逐条比较；只测 --naive 个地址）
+- LpmIndex.lookup_index() 逐个查找
+- LpmIndex.bulk_lookup() NumPy 批量查找（未安装 NumPy 时跳过）
+两张路由表：校园网 --device 的真实路由表（地址为 172.16.0.0/20 全部地址反复铺满 --count 个），
+以及合成 --routers 台路由器中 R0 的路由表（地址在用户网段与链路网段中随机取）。
+朴素扫描查过的地址同时用来核对三种方式的结果一致。
+
+用法（在 Experiment_final 目录下）：
+    python bench/bench_lpm.py
+    python bench/bench_lpm.py --count 5000000 --routers 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_DIR, "analysis"))
+from config_parser import DEFAULT_CACHE_DIR, device_name_from_path, parse_transcript
+from lpm import LinearTable, LpmIndex, network_addresses, np
+from ospf import OspfEngine
+from synthetic import LAN_BASE, LINK_BASE, generate_transcripts
+from topology import Topology, load_topology
+
+
+def rate(count, seconds):
+    return f"{count / seconds:>14,.0f}"
+
+
+def run(label, table, addresses, naive_count):
+    routes = list(table.items())
+    start = time.perf_counter()
+    index = LpmIndex(routes)
+    t_build = time.perf_counter() - start
+    linear = LinearTable(routes)
+    stats = index.stats()
+    print(f"== {label}：前缀 {stats['prefixes']}，二级块 {stats['level2_blocks']}，三级块 {stats['level3_blocks']}，"
+          f"索引 {stats['bytes'] / 1024:.0f} KB，构建 {t_build * 1e3:.1f} ms")
+
+    sample = [int(a) for a in addresses[:naive_count]]
+    start = time.perf_counter()
+    expected = [linear.lookup_index(a) for a in sample]
+    t_naive = time.perf_counter() - start
+
+    plain = [int(a) for a in addresses]
+    start = time.perf_counter()
+    lookup = index.lookup_index
+    single = [lookup(a) for a in plain]
+    t_single = time.perf_counter() - start
+
+    rows = [("朴素线性扫描", len(sample), t_naive), ("LPM 逐个查找", len(plain), t_single)]
+    mismatches = sum(1 for a, b in zip(expected, single) if a != b)
+    if np is not None:
+        array = np.asarray(addresses, dtype=np.uint32)
+        index.bulk_lookup(array[:1])   # 预先建立 NumPy 视图
+        start = time.perf_counter()
+        bulk = index.bulk_lookup(array)
+        t_bulk = time.perf_counter() - start
+        rows.append(("LPM NumPy 批量", len(array), t_bulk))
+        mismatches += int(np.count_nonzero(bulk[:len(expected)] != np.asarray(expected, dtype=np.uint32)))
+    else:
+        print("  未安装 NumPy，跳过批量查找")
+
+    print(f"  {'方式':<14}{'地址数':>12}{'耗时 ms':>12}{'查找/秒':>16}{'相对朴素':>10}")
+    for name, count, seconds in rows:
+        speedup = (count / seconds) / (len(sample) / t_naive)
+        print(f"  {name:<14}{count:>12,}{seconds * 1e3:>12.1f}{rate(count, seconds)}{speedup:>9.0f}x")
+    print(f"  与朴素扫描结果不一致：{mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LPM 转发索引查表基准")
+    parser.add_argument("--device", default="Core-Router1", help="校园网中要测的设备（文件名或主机名）")
+    parser.add_argument("--count", type=int, default=1000000, help="每张表查找的地址数")
+    parser.add_argument("--naive", type=int, default=20000, help="朴素线性扫描查找的地址数")
+    parser.add_argument("--routers", type=int, default=10000, help="合成网络的路由器数量，0 表示不测")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    engine = OspfEngine(load_topology([BASE_DIR], DEFAULT_CACHE_DIR))
+    campus = list(network_addresses("172.16.0.0/20"))
+    addresses = (campus * (args.count // len(campus) + 1))[:args.count]
+    run(f"校园网 {args.device}（172.16.0.0/20）", engine.routing_table(args.device), addresses,
+        min(args.naive, args.count))
+
+    if args.routers:
+        texts = generate_transcripts(args.routers, seed=args.seed)
+        devices = [parse_transcript(text.splitlines(), device_name_from_path(name)) for name, text in texts.items()]
+        engine = OspfEngine(Topology(devices))
+        links = len(engine.segments) - args.routers
+        addresses = [LAN_BASE + rng.randrange(args.routers * 256) if rng.random() < 0.5
+                     else LINK_BASE + rng.randrange(links * 4) for _ in range(args.count)]
+        run(f"合成网络 R0（{args.routers} 台路由器）", engine.routing_table("R0"), addresses, args.naive // 10)
+
+
+if __name__ == "__main__":
+    main()
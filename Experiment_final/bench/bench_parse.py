@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解析基准：在临时目录生成 --routers 个合成抄录，比较
+- 冷解析（无缓存，单进程 / --workers 个进程）
+- 首次加载（解析并写入缓存）与再次加载（全部命中缓存）
+- 由解析结果构建拓扑
+输出每个阶段的耗时与 文件/秒。
+
+用法（在 Experiment_final 目录下）：
+    python bench/bench_parse.py
+    python bench/bench_parse.py --routers 5000 --workers 4
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_DIR, "analysis"))
+from config_parser import load_devices
+from synthetic import write_transcripts
+from topology import Topology
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="设备抄录解析与缓存基准")
+    parser.add_argument("--routers", type=int, default=2000, help="合成抄录的文件数")
+    parser.add_argument("--workers", type=int, default=0, help="冷解析额外测一次多进程（进程数）")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_parse_")
+    try:
+        src = os.path.join(tmp, "configs")
+        cache = os.path.join(tmp, "cache")
+        write_transcripts(src, args.routers, seed=args.seed)
+        size = sum(os.path.getsize(os.path.join(src, f)) for f in os.listdir(src))
+
+        rows = []
+        devices, t = timed(lambda: load_devices([src], cache_dir=None))
+        rows.append(("冷解析（单进程）", t))
+        if args.workers > 1:
+            _, t = timed(lambda: load_devices([src], cache_dir=None, workers=args.workers))
+            rows.append((f"冷解析（{args.workers} 进程）", t))
+        _, t = timed(lambda: load_devices([src], cache_dir=cache))
+        rows.append(("首次加载（写缓存）", t))
+        cached, t = timed(lambda: load_devices([src], cache_dir=cache))
+        rows.append(("再次加载（命中缓存）", t))
+        topo, t = timed(lambda: Topology(cached))
+        rows.append(("构建拓扑", t))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    ignored = sum(d.ignored for d in devices)
+    print(f"文件 {args.routers} 个，共 {size / 1e6:.1f} MB；忽略的不完整命令 {ignored} 条；"
+          f"拓扑网段 {len(topo.segments)}，连通分量 {len(topo.components())}")
+    print(f"{'阶段':<16}{'耗时 ms':>10}{'文件/秒':>12}")
+    for label, t in rows:
+        print(f"{label:<16}{t * 1e3:>10.1f}{args.routers / t:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SPF 基准：在 --routers 台合成路由器上
+- 单棵 SPF 树的计算耗时（--sources 台路由器各算一棵并缓存）
+- 随机关闭 --changes 条链路接口：增量更新缓存的树 + 查询一条路由 + 恢复 的耗时，
+  与把缓存的树全部重算一遍对比
+- 对同样的变化调用 what_if()（增量更新 + 比较受影响设备可能变化的路由 + 恢复）的耗时：
+  只问一台设备（devices=[...]），以及默认比较所有 SPF 树发生变化的路由器
+- --verify 时每次变化后用全量重算核对增量结果（较慢）
+
+用法（在 Experiment_final 目录下）：
+    python bench/bench_spf.py
+    python bench/bench_spf.py --routers 10000 --sources 200 --changes 50
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(BASE_DIR, "analysis"))
+from config_parser import parse_transcript, device_name_from_path
+from ospf import OspfEngine
+from synthetic import LAN_BASE, generate_transcripts
+from topology import Topology
+
+
+def snapshot(engine, names):
+    return {name: (list(engine.tree(name).dist), list(engine.tree(name).hops)) for name in names}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSPF SPF 与增量 SPF 基准")
+    parser.add_argument("--routers", type=int, default=10000, help="合成路由器数量")
+    parser.add_argument("--degree", type=float, default=3.0, help="平均邻居数")
+    parser.add_argument("--sources", type=int, default=100, help="计算并缓存 SPF 树的路由器数")
+    parser.add_argument("--changes", type=int, default=30, help="随机关闭的链路接口数")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--verify", action="store_true", help="用全量重算核对每次增量更新")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    start = time.perf_counter()
+    texts = generate_transcripts(args.routers, args.degree, args.seed)
+    devices = [parse_transcript(text.splitlines(), device_name_from_path(name)) for name, text in texts.items()]
+    topo = Topology(devices)
+    t_load = time.perf_counter() - start
+    start = time.perf_counter()
+    engine = OspfEngine(topo)
+    t_build = time.perf_counter() - start
+    print(f"路由器 {len(engine.routers)}，OSPF 网段 {len(engine.segments)}，"
+          f"生成+解析+拓扑 {t_load:.1f} s，构建链路状态图 {t_build * 1e3:.0f} ms")
+
+    sources = rng.sample(engine.routers, min(args.sources, len(engine.routers)))
+    start = time.perf_counter()
+    for name in sources:
+        engine.tree(name)
+    t_full = time.perf_counter() - start
+    per_tree = t_full / len(sources)
+    print(f"全量 SPF：{len(sources)} 棵树 {t_full * 1e3:.0f} ms，每棵 {per_tree * 1e3:.2f} ms")
+
+    start = time.perf_counter()
+    table = engine.routing_table(sources[0])
+    print(f"由 SPF 树推导一台路由器的完整路由表（{len(table)} 条）：{(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    links = [(name, iface) for (name, iface), oif in engine.interfaces.items()
+             if oif.segment.node is None and len(oif.segment.members) == 2]
+    destination = ipaddress.IPv4Address(LAN_BASE + rng.randrange(args.routers) * 256 + 1)
+    latencies, touched, mismatches = [], [], 0
+    single, what_ifs, compared, routes = [], [], [], []
+    for device, iface in rng.sample(links, min(args.changes, len(links))):
+        start = time.perf_counter()
+        stats = engine.set_interface(device, iface, shutdown=True)
+        engine.route(sources[0], destination)
+        elapsed = time.perf_counter() - start
+        if args.verify:
+            incremental = snapshot(engine, sources)
+            engine.invalidate()
+            mismatches += snapshot(engine, sources) != incremental
+        start = time.perf_counter()
+        engine.set_interface(device, iface, shutdown=False)
+        latencies.append(elapsed + time.perf_counter() - start)
+        touched.append((stats["trees"], stats["nodes"]))
+        single.append(engine.what_if(device, iface, shutdown=True, devices=[sources[0]])["seconds"])
+        result = engine.what_if(device, iface, shutdown=True)
+        what_ifs.append(result["seconds"])
+        compared.append(result["compared"])
+        routes.append(sum(len(removed) + len(added) for removed, added in result["changes"].values()))
+        if args.verify:
+            incremental = snapshot(engine, sources)
+            engine.invalidate()
+            mismatches += snapshot(engine, sources) != incremental
+
+    print(f"假设分析 {len(latencies)} 次（关闭 + 查询 + 恢复）：中位数 {statistics.median(latencies) * 1e3:.1f} ms，"
+          f"最大 {max(latencies) * 1e3:.1f} ms；平均每次改动 {statistics.mean(t for t, _ in touched):.1f} / {len(sources)} 棵树、"
+          f"{statistics.mean(n for _, n in touched):.0f} 个节点")
+    print(f"what_if() 只问一台设备：中位数 {statistics.median(single) * 1e3:.1f} ms，最大 {max(single) * 1e3:.1f} ms")
+    print(f"what_if() 默认：中位数 {statistics.median(what_ifs) * 1e3:.1f} ms，最大 {max(what_ifs) * 1e3:.1f} ms；"
+          f"平均比较 {statistics.mean(compared):.1f} 台设备，报告 {statistics.mean(routes):.0f} 条路由变化")
+    print(f"同样的变化若全量重算缓存的树：每次约 {2 * t_full * 1e3:.0f} ms，"
+          f"增量加速约 {2 * t_full / statistics.median(latencies):.0f} 倍")
+    if args.verify:
+        print(f"核对：增量与全量结果不一致 {mismatches} 次")
+
+
+if __name__ == "__main__":
+    main()